@@ -0,0 +1,317 @@
+"""
+Task 5: Portfolio Backtesting Engine
+Vectorized replacement for the iterrows-based simulate_portfolio in
+Notebooks/Task5/strategy_backtesting.ipynb.
+
+Between rebalance points every asset simply drifts with its returns, so each
+holding period is one cumulative product over a block of rows instead of a
+Python step per day.
+"""
+
+import numpy as np
+import pandas as pd
+import warnings
+warnings.filterwarnings('ignore')
+
+def _weight_array(weights, columns):
+    if isinstance(weights, dict):
+        return np.array([weights.get(asset, 0) for asset in columns], dtype=np.float64)
+    if isinstance(weights, pd.Series):
+        return weights.reindex(columns).fillna(0).to_numpy(dtype=np.float64)
+    return np.asarray(weights, dtype=np.float64)
+
+def rebalance_schedule(dates, rebalance_freq='M'):
+    """
+    Row positions at whose close the portfolio is rebalanced
+
+    Args:
+        dates (pd.DatetimeIndex): Trading dates of the backtest
+        rebalance_freq (str or list): Pandas frequency ('W', 'M', 'Q', 'A', ...) - the
+            portfolio is rebalanced on the last trading day of each period - or an
+            explicit list of rebalance dates; None never rebalances
+
+    Returns:
+        np.ndarray: Sorted row positions (the final row is never included)
+    """
+    if rebalance_freq is None or len(dates) == 0:
+        return np.array([], dtype=np.int64)
+
+    if isinstance(rebalance_freq, str):
+        positions = pd.Series(np.arange(len(dates)), index=dates).resample(rebalance_freq).last()
+        positions = positions.dropna().to_numpy(dtype=np.int64)
+    else:
+        positions = np.flatnonzero(dates.isin(pd.DatetimeIndex(rebalance_freq)))
+
+    return positions[positions < len(dates) - 1]
+
+def rebalance_weights(drifted, target, no_trade_band=None):
+    """
+    Weights after rebalancing drifted weights towards target
+
+    Args:
+        drifted (np.ndarray): Current (drifted) weights
+        target (np.ndarray): Target weights
+        no_trade_band (float or np.ndarray): Assets within this absolute distance of
+            their target are not traded; the others go to target, scaled so the
+            weights still sum to 1 (None = trade everything back to target)
+
+    Returns:
+        np.ndarray: Weights after the trades
+    """
+    if no_trade_band is None:
+        return target.copy()
+    trade = np.abs(drifted - target) > no_trade_band
+    if not trade.any():
+        return drifted.copy()
+    new_weights = np.where(trade, target, drifted)
+    # Whatever the untouched assets hold over/under their target comes out of the traded ones
+    traded_target = target[trade].sum()
+    if traded_target > 0:
+        new_weights[trade] *= (1 - drifted[~trade].sum()) / traded_target
+    else:
+        # Only zero-target assets are sold: the proceeds go to the untouched assets pro rata
+        new_weights[~trade] *= 1 / drifted[~trade].sum()
+    return new_weights
+
+def trading_cost(trade_values, cost_rate=0.0, fixed_cost=0.0, slippage=None):
+    """
+    Cost of one rebalance
+
+    Args:
+        trade_values (np.ndarray): Signed traded amount per asset (currency)
+        cost_rate (float or np.ndarray): Proportional commission per unit traded
+        fixed_cost (float): Fixed charge per asset traded
+        slippage (float, np.ndarray or callable): Slippage per unit traded (e.g. half the
+            bid-ask spread), or a function of the trade values returning the slippage
+            cost, e.g. a square-root market impact model
+
+    Returns:
+        float: Total cost in currency
+    """
+    traded = np.abs(trade_values)
+    cost = np.sum(cost_rate * traded) + fixed_cost * np.count_nonzero(traded)
+    if callable(slippage):
+        cost += np.sum(slippage(trade_values))
+    elif slippage is not None:
+        cost += np.sum(slippage * traded)
+    return cost
+
+def backtest(returns, weights, rebalance_freq='M', threshold=None, initial_value=100000,
+             block_size=252, cost_rate=0.0, fixed_cost=0.0, slippage=None, no_trade_band=None):
+    """
+    Simulate a portfolio rebalanced back to target weights
+
+    Weights drift with prices between rebalances. A rebalance happens at the close of
+    each calendar rebalance date and, if threshold is set, at the close of any day on
+    which a drifted weight is more than threshold away from its target.
+
+    Args:
+        returns (pd.DataFrame): Daily asset returns, dates x assets (NaN counts as 0)
+        weights (dict, pd.Series, array or pd.DataFrame): Target weights per asset, or a
+            dates x assets weight schedule (e.g. from walk_forward) - the backtest then
+            starts after the first date and rebalances to each row at its date
+        rebalance_freq (str or list): Calendar schedule, see rebalance_schedule (None = none;
+            ignored for a weight schedule)
+        threshold (float): Absolute weight drift that triggers a rebalance (None = off)
+        initial_value (float): Starting portfolio value
+        block_size (int): Maximum rows drifted in one cumulative product
+        cost_rate (float or np.ndarray): Proportional cost per unit traded, see trading_cost
+        fixed_cost (float): Fixed cost per asset traded
+        slippage (float, np.ndarray or callable): Slippage model, see trading_cost
+        no_trade_band (float or np.ndarray): No-trade band, see rebalance_weights
+
+    Costs are charged at the close of each rebalance and reduce the portfolio value;
+    the initial portfolio is formed without cost.
+
+    Returns:
+        dict: 'dates', 'values' (end-of-day portfolio value, net of costs), 'returns'
+            (daily portfolio returns), 'weights' (dates x assets weights held over each
+            day, i.e. at the previous close after any rebalance), 'turnover' (sum of
+            absolute weight changes per day), 'costs' (costs charged per day),
+            'assets', 'rebalance_dates' and 'initial_value'
+    """
+    schedule = {}
+    scheduled = isinstance(weights, pd.DataFrame)
+    if scheduled:
+        # Weight schedule: hold the first row from the day after its date, then rebalance
+        # at the close of each later row's date (or the last trading day before it)
+        weights = weights.reindex(columns=returns.columns).fillna(0)
+        returns = returns.loc[returns.index > weights.index[0]]
+        positions = np.searchsorted(returns.index, weights.index[1:], side='right') - 1
+        for position, row in zip(positions, weights.to_numpy(dtype=np.float64)[1:]):
+            if 0 <= position < len(returns) - 1:
+                schedule[position] = row / row.sum()
+        weights = weights.iloc[0]
+
+    dates = returns.index
+    growth = returns.to_numpy(dtype=np.float64, copy=True)
+    growth[np.isnan(growth)] = 0
+    growth += 1
+    target = _weight_array(weights, returns.columns)
+    target = target / target.sum()
+    n_days, n_assets = growth.shape
+
+    values = np.empty(n_days)
+    weight_history = np.empty((n_days, n_assets))
+    turnover = np.zeros(n_days)
+    costs = np.zeros(n_days)
+    if scheduled:
+        # Only the schedule's own dates, even when none of them fall in the backtest
+        calendar = np.array(sorted(schedule), dtype=np.int64)
+    else:
+        calendar = rebalance_schedule(dates, rebalance_freq)
+    rebalances = []
+
+    start = 0
+    value = initial_value
+    current = target.copy()
+    next_calendar = 0
+    while start < n_days:
+        # The block ends at the next calendar rebalance, the block size or the last day
+        while next_calendar < len(calendar) and calendar[next_calendar] < start:
+            next_calendar += 1
+        stop = min(start + block_size, n_days) - 1
+        is_calendar = next_calendar < len(calendar) and calendar[next_calendar] <= stop
+        if is_calendar:
+            stop = calendar[next_calendar]
+
+        # Drift over the block: asset growth since the block start, portfolio growth and weights
+        cumulative = np.cumprod(growth[start:stop + 1], axis=0)
+        portfolio_growth = cumulative @ current
+        drifted = np.multiply(cumulative, current, out=cumulative)
+        drifted /= portfolio_growth[:, None]
+
+        rebalance = is_calendar
+        if threshold is not None:
+            breached = np.flatnonzero(np.abs(drifted - target).max(axis=1) > threshold)
+            if len(breached) and start + breached[0] < stop + (not is_calendar):
+                stop = start + breached[0]
+                rebalance = True
+                length = stop - start + 1
+                portfolio_growth, drifted = portfolio_growth[:length], drifted[:length]
+
+        values[start:stop + 1] = value * portfolio_growth
+        weight_history[start] = current
+        weight_history[start + 1:stop + 1] = drifted[:-1]
+
+        value = values[stop]
+        current = drifted[-1]
+        if rebalance and stop < n_days - 1:
+            target = schedule.get(stop, target)
+            new_weights = rebalance_weights(current, target, no_trade_band)
+            trades = new_weights - current
+            trades[np.abs(trades) < 1e-12] = 0  # rounding dust is not a trade
+            if np.any(trades):
+                turnover[stop] = np.abs(trades).sum()
+                costs[stop] = trading_cost(trades * value, cost_rate, fixed_cost, slippage)
+                value -= costs[stop]
+                values[stop] = value
+                current = new_weights
+                rebalances.append(dates[stop])
+        start = stop + 1
+
+    portfolio_returns = np.diff(values, prepend=initial_value) / np.concatenate([[initial_value], values[:-1]])
+
+    return {
+        'dates': dates,
+        'values': values,
+        'returns': portfolio_returns,
+        'weights': weight_history,
+        'turnover': turnover,
+        'costs': costs,
+        'assets': list(returns.columns),
+        'rebalance_dates': pd.DatetimeIndex(rebalances),
+        'initial_value': initial_value
+    }
+
+def to_frame(result):
+    """
+    Backtest result as the Portfolio_Value / Daily_Return DataFrame used in the Task 5 notebook
+    """
+    portfolio_df = pd.DataFrame({
+        'Portfolio_Value': result['values'],
+        'Daily_Return': result['returns']
+    }, index=result['dates'])
+    portfolio_df.index.name = 'Date'
+    return portfolio_df
+
+def simulate_portfolio(returns, weights, rebalance_freq='M', initial_value=100000):
+    """
+    Drop-in replacement for simulate_portfolio in the Task 5 notebook
+
+    Note: the notebook only rebalanced when a period-end calendar date happened to be a
+    trading day; this rebalances on the last trading day of every period.
+
+    Returns:
+        tuple: (portfolio DataFrame with Portfolio_Value and Daily_Return, list of rebalance records)
+    """
+    result = backtest(returns, weights, rebalance_freq, initial_value=initial_value)
+    target = _weight_array(weights, returns.columns)
+
+    portfolio_weights_history = []
+    for date in result['rebalance_dates']:
+        record = {'Date': date, 'Action': 'Rebalanced'}
+        record.update(dict(zip(result['assets'], target)))
+        portfolio_weights_history.append(record)
+
+    return to_frame(result), portfolio_weights_history
+
+def calculate_metrics(result, risk_free_rate=0.045):
+    """
+    Calculate comprehensive portfolio metrics (as in the Task 5 notebook)
+
+    Args:
+        result (dict or pd.DataFrame): backtest() result, or a DataFrame with
+            Portfolio_Value and Daily_Return columns
+        risk_free_rate (float): Annual risk-free rate
+
+    Returns:
+        dict: Total/annualized return, volatility, Sharpe ratio, max drawdown, win rate and
+            final value, plus annual turnover, total costs and annual cost drag for a
+            backtest() result
+    """
+    if isinstance(result, pd.DataFrame):
+        values = result['Portfolio_Value'].to_numpy(dtype=np.float64)
+        daily_returns = result['Daily_Return'].to_numpy(dtype=np.float64)
+        initial_value = values[0] / (1 + daily_returns[0])
+    else:
+        values, daily_returns, initial_value = result['values'], result['returns'], result['initial_value']
+
+    # Annualized returns
+    total_return = values[-1] / initial_value - 1
+    days = len(values)
+    annualized_return = (1 + total_return) ** (252/days) - 1
+
+    # Volatility
+    annualized_vol = np.std(daily_returns, ddof=1) * np.sqrt(252)
+
+    # Sharpe Ratio
+    excess_return = annualized_return - risk_free_rate
+    sharpe_ratio = excess_return / annualized_vol if annualized_vol != 0 else 0
+
+    # Max Drawdown (from the initial value on)
+    cumulative = np.concatenate([[initial_value], values])
+    rolling_max = np.maximum.accumulate(cumulative)
+    max_drawdown = np.min((cumulative - rolling_max) / rolling_max)
+
+    # Win Rate
+    win_rate = np.sum(daily_returns > 0) / len(daily_returns)
+
+    metrics = {
+        'Total Return': total_return,
+        'Annualized Return': annualized_return,
+        'Annualized Volatility': annualized_vol,
+        'Sharpe Ratio': sharpe_ratio,
+        'Max Drawdown': max_drawdown,
+        'Win Rate': win_rate,
+        'Final Value': values[-1]
+    }
+
+    # Trading activity (backtest() results only)
+    if isinstance(result, dict) and 'costs' in result:
+        value_before_cost = values + result['costs']
+        metrics['Annual Turnover'] = result['turnover'].sum() * 252 / days
+        metrics['Total Costs'] = result['costs'].sum()
+        metrics['Annual Cost Drag'] = np.sum(result['costs'] / value_before_cost) * 252 / days
+
+    return metrics
@@ -0,0 +1,224 @@
+"""
+Performance benchmarks
+Times the optimized implementations against the loop versions they replace
+and checks that both give the same numbers
+"""
+
+import time
+import numpy as np
+import pandas as pd
+import warnings
+warnings.filterwarnings('ignore')
+
+from utils import (calculate_sharpe_ratio, calculate_var, calculate_cvar, calculate_max_drawdown,
+                   rolling_sharpe_ratio, rolling_var, rolling_cvar, rolling_max_drawdown,
+                   rolling_skewness, rolling_kurtosis)
+from scipy.optimize import minimize
+from portfolio_optimization import (negative_sharpe_ratio, negative_sharpe_ratio_gradient,
+                                    minimize_variance, minimize_variance_gradient, budget_constraint)
+from backtest import backtest, rebalance_schedule
+from statsmodels.tsa.arima.model import ARIMA
+from forecasting import rolling_origin_forecast
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def _simulated_returns(n_days, n_assets=1, seed=42):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2015-07-01', periods=n_days)
+    returns = pd.DataFrame(rng.standard_t(4, size=(n_days, n_assets)) * 0.01, index=dates,
+                           columns=[f'ASSET_{i}' for i in range(n_assets)])
+    return returns
+
+def benchmark_rolling_metrics(n_days=2520, window=252):
+    """
+    Compare the rolling metric functions with per-window loops (as in metrics.ipynb)
+
+    Args:
+        n_days (int): Length of the simulated return series
+        window (int): Rolling window size
+
+    Returns:
+        pd.DataFrame: Loop time, rolling time, speedup and max abs difference per metric
+    """
+    print(f"\n=== ROLLING METRICS: {n_days} days, {window}-day window ===")
+    returns = _simulated_returns(n_days).iloc[:, 0]
+    prices = (1 + returns).cumprod()
+
+    def loop(metric, series):
+        return np.array([metric(series.iloc[j - window + 1:j + 1])
+                         for j in range(window - 1, len(series))])
+
+    cases = {
+        'Sharpe': (lambda: loop(calculate_sharpe_ratio, returns), lambda: rolling_sharpe_ratio(returns, window)),
+        'VaR 5%': (lambda: loop(calculate_var, returns), lambda: rolling_var(returns, window)),
+        'CVaR 5%': (lambda: loop(calculate_cvar, returns), lambda: rolling_cvar(returns, window)),
+        'Max Drawdown': (lambda: loop(calculate_max_drawdown, prices), lambda: rolling_max_drawdown(prices, window)),
+        'Skewness': (lambda: loop(pd.Series.skew, returns), lambda: rolling_skewness(returns, window)),
+        'Kurtosis': (lambda: loop(pd.Series.kurtosis, returns), lambda: rolling_kurtosis(returns, window)),
+    }
+
+    rows = {}
+    for name, (loop_version, rolling_version) in cases.items():
+        expected, loop_time = _timed(loop_version)
+        result, rolling_time = _timed(rolling_version)
+        rows[name] = {
+            'Loop (s)': loop_time,
+            'Rolling (s)': rolling_time,
+            'Speedup': loop_time / rolling_time,
+            'Max Abs Diff': np.max(np.abs(result.values[window - 1:] - expected))
+        }
+
+    results = pd.DataFrame(rows).T
+    print(results.round(6))
+    return results
+
+def benchmark_portfolio_gradients(n_assets=50, n_days=2520):
+    """
+    Compare SLSQP with finite differences on pandas inputs (the old optimize_portfolios)
+    against analytic gradients on ndarrays
+    
+    Args:
+        n_assets (int): Number of simulated assets
+        n_days (int): Length of the simulated return history
+    
+    Returns:
+        pd.DataFrame: Iterations, function evaluations, time and objective difference per objective
+    """
+    print(f"\n=== SLSQP GRADIENTS: {n_assets} assets ===")
+    returns = _simulated_returns(n_days, n_assets) + np.linspace(-0.0005, 0.001, n_assets)
+    expected_returns = returns.mean() * 252
+    cov_matrix = returns.cov() * 252
+    mu, cov = expected_returns.values, cov_matrix.values
+    
+    bounds = tuple((0, 1) for _ in range(n_assets))
+    initial_guess = np.array([1/n_assets] * n_assets)
+    old_constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
+    
+    cases = {
+        'Max Sharpe': (negative_sharpe_ratio, negative_sharpe_ratio_gradient),
+        'Min Variance': (minimize_variance, minimize_variance_gradient),
+    }
+    
+    rows = {}
+    for name, (objective, gradient) in cases.items():
+        old, old_time = _timed(minimize, objective, initial_guess, args=(expected_returns, cov_matrix),
+                               method='SLSQP', bounds=bounds, constraints=old_constraints)
+        new, new_time = _timed(minimize, objective, initial_guess, args=(mu, cov), jac=gradient,
+                               method='SLSQP', bounds=bounds, constraints=(budget_constraint(n_assets),))
+        rows[name] = {
+            'FD Iterations': old.nit,
+            'FD Evaluations': old.nfev,
+            'Analytic Iterations': new.nit,
+            'Analytic Evaluations': new.nfev + new.njev,
+            'FD (s)': old_time,
+            'Analytic (s)': new_time,
+            'Speedup': old_time / new_time,
+            'Objective Diff': new.fun - old.fun
+        }
+    
+    results = pd.DataFrame(rows).T
+    print(results.round(6))
+    return results
+
+def _simulate_portfolio_loop(returns, weights, rebalance_dates, initial_value=100000):
+    # Day-by-day loop of the Task 5 notebook's simulate_portfolio
+    current_value = initial_value
+    current_weights = weights.copy()
+    values = []
+    for date, daily_returns in returns.iterrows():
+        current_value *= 1 + np.sum(current_weights * daily_returns.values)
+        current_weights = current_weights * (1 + daily_returns.values)
+        current_weights = current_weights / np.sum(current_weights)
+        if date in rebalance_dates:
+            current_weights = weights.copy()
+        values.append(current_value)
+    return np.array(values)
+
+def benchmark_backtest(n_days=2520, n_assets=1000, rebalance_freq='M'):
+    """
+    Compare the vectorized backtest with the notebook's day-by-day loop
+    
+    Args:
+        n_days (int): Length of the simulated return series
+        n_assets (int): Number of simulated assets
+        rebalance_freq (str): Calendar rebalancing frequency
+    
+    Returns:
+        pd.DataFrame: Loop time, vectorized time, speedup and max relative value difference
+    """
+    print(f"\n=== BACKTEST: {n_days} days, {n_assets} assets, rebalance '{rebalance_freq}' ===")
+    returns = _simulated_returns(n_days, n_assets)
+    weights = np.full(n_assets, 1 / n_assets)
+    rebalance_dates = set(returns.index[rebalance_schedule(returns.index, rebalance_freq)])
+    
+    expected, loop_time = _timed(_simulate_portfolio_loop, returns, weights, rebalance_dates)
+    result, vectorized_time = _timed(backtest, returns, weights, rebalance_freq)
+    _, threshold_time = _timed(backtest, returns, weights, None, threshold=0.5 / n_assets)
+    _, cost_time = _timed(backtest, returns, weights, rebalance_freq, cost_rate=0.001,
+                          fixed_cost=1.0, no_trade_band=0.1 / n_assets)
+    
+    results = pd.DataFrame({
+        'Loop (s)': [loop_time],
+        'Vectorized (s)': [vectorized_time],
+        'Threshold (s)': [threshold_time],
+        'Costs + Bands (s)': [cost_time],
+        'Speedup': [loop_time / vectorized_time],
+        'Max Rel Diff': [np.max(np.abs(result['values'] / expected - 1))]
+    }, index=['Backtest'])
+    print(results.round(6))
+    return results
+
+def benchmark_rolling_forecast(n_days=2520, n_test=500, order=(0, 1, 1), n_refits=10):
+    """
+    Compare rolling-origin ARIMA evaluation with a single fit against refitting at every
+    origin (timed on n_refits origins and extrapolated)
+    
+    Args:
+        n_days (int): Length of the simulated price series
+        n_test (int): Number of forecast origins
+        order (tuple): ARIMA order
+        n_refits (int): Origins actually refitted for the timing and the comparison
+    
+    Returns:
+        pd.DataFrame: Refit time (extrapolated), single-fit time, speedup and the max
+            one-step forecast difference on the refitted origins
+    """
+    print(f"\n=== ROLLING ARIMA{order}: {n_test} origins ===")
+    returns = _simulated_returns(n_days + 1)['ASSET_0']
+    prices = 100 * (1 + returns).cumprod()
+    n_train = len(prices) - n_test
+    
+    result, single_time = _timed(rolling_origin_forecast, prices, order, n_train, (1,), verbose=False)
+    
+    origins = np.linspace(n_train - 1, len(prices) - 2, n_refits).astype(int)
+    refit_forecasts = []
+    start = time.perf_counter()
+    for origin in origins:
+        fit = ARIMA(prices.iloc[:origin + 1], order=order).fit()
+        refit_forecasts.append(fit.forecast(1).iloc[0])
+    refit_time = (time.perf_counter() - start) / n_refits * n_test
+    
+    single_forecasts = result['forecasts']['h=1'].to_numpy()[origins - (n_train - 1)]
+    results = pd.DataFrame({
+        'Refit Every Origin (s)': [refit_time],
+        'Single Fit (s)': [single_time],
+        'Speedup': [refit_time / single_time],
+        'Max Forecast Diff': [np.max(np.abs(single_forecasts - np.array(refit_forecasts)))]
+    }, index=['Rolling ARIMA'])
+    print(results.round(6))
+    return results
+
+def run_all_benchmarks():
+    """
+    Run every benchmark in this module
+    """
+    benchmark_rolling_metrics()
+    benchmark_portfolio_gradients()
+    benchmark_backtest()
+    benchmark_rolling_forecast()
+
+if __name__ == "__main__":
+    run_all_benchmarks()
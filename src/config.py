@@ -8,7 +8,8 @@ DATA_CONFIG = {
     'tickers': ['TSLA', 'BND', 'SPY'],
     'start_date': '2015-07-01',
     'end_date': '2025-07-31',
-    'data_folder': 'data'
+    'data_folder': 'data',
+    'refresh_mode': 'cached'  # 'cached' reuses stored data, 'incremental' appends new days, 'full' refetches
 }
 
 # Asset Information
@@ -17,7 +18,8 @@ ASSET_INFO = {
         'name': 'Tesla Inc.',
         'type': 'High-growth stock',
         'sector': 'Consumer Discretionary',
-        'description': 'High returns with high volatility'
+        'description': 'High returns with high volatility',
+        'forecast_return_6m': -0.356  # LSTM forecast used as expected return (fallback if no forecast file)
     },
     'BND': {
         'name': 'Vanguard Total Bond Market ETF',
@@ -33,6 +35,19 @@ ASSET_INFO = {
     }
 }
 
+# Metadata for tickers of the universe without an ASSET_INFO entry
+DEFAULT_ASSET_INFO = {
+    'type': 'Equity',
+    'sector': 'Unknown',
+    'description': 'No description available'
+}
+
+def get_asset_info(ticker):
+    """
+    Asset metadata for any ticker of the universe (ASSET_INFO entry or the defaults)
+    """
+    return {'name': ticker, **DEFAULT_ASSET_INFO, **ASSET_INFO.get(ticker, {})}
+
 # Analysis Parameters
 ANALYSIS_CONFIG = {
     'rolling_window': 20,
@@ -0,0 +1,382 @@
+"""
+Covariance estimation
+Sample, Ledoit-Wolf shrinkage, EWMA and factor (low-rank plus diagonal) covariance
+estimators over an arbitrary ticker list, shared by the portfolio optimization scripts.
+
+Tickers with different histories (IPO dates, delistings, holidays) can be combined
+without dropping every date on which one of them is missing: the pairwise estimators
+use, for each pair, all dates on which both have a return, with every pair computed at
+once from matrix products of the zero-filled returns and their observation mask.
+"""
+
+import numpy as np
+import pandas as pd
+from returns_panel import ReturnsPanel
+import warnings
+warnings.filterwarnings('ignore')
+
+def returns_matrix(assets_data, tickers=None, column='Daily_Return', dropna=True):
+    """
+    Align daily returns of several assets into one dates x tickers DataFrame
+
+    Args:
+        assets_data (dict or ReturnsPanel): Dictionary containing asset dataframes, or
+            an already aligned returns panel (used as-is, without re-aligning)
+        tickers (list): Tickers to include (default all keys of assets_data)
+        column (str): Return column; calculated from Close if missing
+        dropna (bool): Keep only the dates where every ticker has a return; otherwise
+            every date any ticker has one, with NaN where a ticker has none
+
+    Returns:
+        pd.DataFrame: Aligned daily returns
+    """
+    if isinstance(assets_data, ReturnsPanel):
+        panel = assets_data if tickers is None else assets_data.select(tickers)
+        return panel.frame.dropna() if dropna and panel.policy != 'intersection' else panel.frame
+    return ReturnsPanel.from_assets(assets_data, tickers, column,
+                                    policy='intersection' if dropna else 'pairwise').frame
+
+def _centered(returns):
+    values = np.asarray(returns, dtype=np.float64)
+    return values - values.mean(axis=0)
+
+def _labelled(matrix, returns):
+    if isinstance(returns, pd.DataFrame):
+        return pd.DataFrame(matrix, index=returns.columns, columns=returns.columns)
+    return matrix
+
+def sample_covariance(returns, annualize=252):
+    """
+    Sample covariance matrix (same as returns.cov() * annualize)
+
+    Args:
+        returns (pd.DataFrame): Daily returns, dates x tickers, without missing values
+        annualize (int): Periods per year (1 keeps daily units)
+
+    Returns:
+        pd.DataFrame: Covariance matrix
+    """
+    X = _centered(returns)
+    cov = X.T @ X * (annualize / (len(X) - 1))
+    return _labelled(cov, returns)
+
+def ledoit_wolf_covariance(returns, annualize=252):
+    """
+    Ledoit-Wolf shrinkage towards a scaled identity (Ledoit & Wolf, 2004)
+
+    Well conditioned even when there are more tickers than observations. The
+    shrinkage intensity is stored in the result's attrs['shrinkage'].
+
+    Args:
+        returns (pd.DataFrame): Daily returns, dates x tickers, without missing values
+        annualize (int): Periods per year
+
+    Returns:
+        pd.DataFrame: Shrunk covariance matrix
+    """
+    X = _centered(returns)
+    n_obs, n_assets = X.shape
+    sample = X.T @ X / n_obs
+    X2 = X ** 2
+
+    target = np.trace(sample) / n_assets
+    delta = (np.sum(sample ** 2) - 2 * target * np.trace(sample) + n_assets * target ** 2) / n_assets
+    # sum_ij (X2'X2)_ij is the sum over dates of the squared row norms, O(TN) instead of O(TN^2)
+    beta = (np.sum(X2.sum(axis=1) ** 2) / n_obs - np.sum(sample ** 2)) / (n_assets * n_obs)
+    beta = min(beta, delta)
+    shrinkage = 0.0 if beta == 0 else beta / delta
+
+    cov = (1 - shrinkage) * sample
+    cov[np.diag_indices(n_assets)] += shrinkage * target
+    cov = _labelled(cov * annualize, returns)
+    if isinstance(cov, pd.DataFrame):
+        cov.attrs['shrinkage'] = shrinkage
+    return cov
+
+def ewma_covariance(returns, decay=0.94, annualize=252):
+    """
+    Exponentially weighted covariance, most recent returns weighted highest (RiskMetrics)
+
+    Args:
+        returns (pd.DataFrame): Daily returns, dates x tickers, without missing values
+        decay (float): Weight ratio between consecutive days
+        annualize (int): Periods per year
+
+    Returns:
+        pd.DataFrame: Covariance matrix
+    """
+    values = np.asarray(returns, dtype=np.float64)
+    weights = decay ** np.arange(len(values) - 1, -1, -1, dtype=np.float64)
+    weights /= weights.sum()
+    X = values - weights @ values
+    cov = (X * weights[:, None]).T @ X * annualize
+    return _labelled(cov, returns)
+
+class FactorCovariance:
+    """
+    Covariance matrix in factor form: C = B F B' + diag(d)
+
+    Stores the N x K loadings, the K x K factor covariance and the N specific variances
+    instead of the dense N x N matrix, so products with weight vectors cost O(NK).
+    Supports cov @ w (and cov @ W for a N x M block of weight vectors), so it can be
+    passed to the portfolio_optimization objectives in place of a dense matrix.
+    """
+
+    def __init__(self, loadings, factor_cov, specific_var, index=None):
+        """
+        Args:
+            loadings (np.ndarray): N x K factor loadings B
+            factor_cov (np.ndarray): K x K factor covariance F
+            specific_var (np.ndarray): N specific (idiosyncratic) variances d
+            index (list): Ticker labels
+        """
+        self.loadings = np.asarray(loadings, dtype=np.float64)
+        self.factor_cov = np.asarray(factor_cov, dtype=np.float64)
+        self.specific_var = np.asarray(specific_var, dtype=np.float64)
+        self.index = pd.Index(index if index is not None else range(len(self.specific_var)))
+        # B L with F = L L', so that w'Cw = |L'B'w|^2 + sum(d w^2)
+        self._root = self.loadings @ np.linalg.cholesky(self.factor_cov)
+
+    @property
+    def shape(self):
+        n = len(self.specific_var)
+        return (n, n)
+
+    def matvec(self, weights):
+        """
+        C @ w in O(NK) (w may also be an N x M block of weight vectors)
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        specific = self.specific_var[:, None] if weights.ndim == 2 else self.specific_var
+        return self._root @ (self._root.T @ weights) + specific * weights
+
+    __matmul__ = matvec
+
+    def __rmatmul__(self, weights):
+        # C is symmetric, so w' C = (C w)'
+        return self.matvec(np.asarray(weights).T).T
+
+    def quad_form(self, weights):
+        """
+        w'Cw in O(NK); for an M x N array of weight vectors returns the M variances
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        factor_part = weights @ self._root
+        return np.sum(factor_part ** 2, axis=-1) + np.sum(self.specific_var * weights ** 2, axis=-1)
+
+    def diagonal(self):
+        return np.sum(self._root ** 2, axis=1) + self.specific_var
+
+    def to_dense(self):
+        """
+        Dense N x N covariance DataFrame
+        """
+        dense = self._root @ self._root.T
+        dense[np.diag_indices_from(dense)] += self.specific_var
+        return pd.DataFrame(dense, index=self.index, columns=self.index)
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.to_dense().values
+        return dense if dtype is None else dense.astype(dtype)
+
+    def __repr__(self):
+        return f"FactorCovariance(n_assets={self.shape[0]}, n_factors={self.loadings.shape[1]})"
+
+def factor_covariance(returns, n_factors=3, factors=None, annualize=252):
+    """
+    Low-rank plus diagonal covariance from statistical (PCA) or given factors
+
+    Args:
+        returns (pd.DataFrame): Daily returns, dates x tickers, without missing values
+        n_factors (int): Number of principal components (ignored when factors is given)
+        factors (pd.DataFrame): Optional factor returns (e.g. SPY), dates x factors,
+            aligned with returns; loadings are then the OLS betas on these factors
+        annualize (int): Periods per year
+
+    Returns:
+        FactorCovariance: Compact covariance estimate
+    """
+    X = _centered(returns)
+    n_obs, n_assets = X.shape
+    index = returns.columns if isinstance(returns, pd.DataFrame) else None
+
+    if factors is None:
+        # Top principal components from a thin SVD of the centered returns
+        _, singular, components = np.linalg.svd(X, full_matrices=False)
+        k = min(n_factors, len(singular))
+        loadings = components[:k].T * (singular[:k] / np.sqrt(n_obs - 1))
+        factor_cov = np.eye(k)
+        total_var = np.sum(X ** 2, axis=0) / (n_obs - 1)
+        specific_var = total_var - np.sum(loadings ** 2, axis=1)
+    else:
+        Z = _centered(factors)
+        betas, *_ = np.linalg.lstsq(Z, X, rcond=None)
+        loadings = betas.T
+        factor_cov = np.atleast_2d(Z.T @ Z / (n_obs - 1))
+        residuals = X - Z @ betas
+        specific_var = np.sum(residuals ** 2, axis=0) / (n_obs - 1)
+
+    # Keep the specific variances strictly positive so the matrix stays positive definite
+    specific_var = np.maximum(specific_var, 1e-12)
+    return FactorCovariance(loadings, factor_cov * annualize, specific_var * annualize, index)
+
+def _masked(returns):
+    """
+    Zero-filled returns centered on each column's mean, observation mask and labels
+    """
+    if isinstance(returns, ReturnsPanel):
+        values, mask, labels = returns.values, returns.mask, returns.tickers
+    else:
+        values = np.asarray(returns, dtype=np.float64)
+        mask = ~np.isnan(values)
+        labels = returns.columns if isinstance(returns, pd.DataFrame) else None
+    counts = mask.sum(axis=0)
+    means = np.where(mask, values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+    # Centering is exact for pairwise statistics (they are shift invariant) and keeps
+    # the sums below from cancelling
+    X = np.where(mask, values - means, 0.0)
+    return X, mask.astype(np.float64), labels
+
+def _pairwise_moments(X, M, min_periods):
+    """
+    Pairwise overlap counts N and co-moments (S - A * A' / N), NaN where N < min_periods
+    """
+    # N[i, j]: dates on which both i and j are observed (0/1 products are exact in float32)
+    mask = M.astype(np.float32)
+    N = (mask.T @ mask).astype(np.float64)
+    A = X.T @ M                 # A[i, j]: sum of i's returns over the dates j is observed
+    comoment = X.T @ X - A * A.T / np.where(N > 0, N, 1)
+    comoment[N < max(min_periods, 2)] = np.nan
+    return N, A, comoment
+
+def _labelled_pairs(matrix, labels):
+    return pd.DataFrame(matrix, index=labels, columns=labels) if labels is not None else matrix
+
+def nearest_psd(matrix, min_eigenvalue=0.0):
+    """
+    Positive semi-definite repair of a symmetric matrix, keeping its diagonal
+
+    Negative eigenvalues are raised to min_eigenvalue and the result is rescaled so the
+    diagonal (variances, or the unit diagonal of a correlation matrix) is unchanged.
+    Missing entries (pairs without enough common dates) are treated as zero covariance.
+    A matrix that is already positive definite is returned as it is.
+
+    Args:
+        matrix (pd.DataFrame or np.ndarray): Symmetric covariance or correlation matrix
+        min_eigenvalue (float): Smallest eigenvalue of the repaired matrix
+
+    Returns:
+        pd.DataFrame or np.ndarray: Repaired matrix
+    """
+    values = np.nan_to_num(np.asarray(matrix, dtype=np.float64))
+    values = (values + values.T) / 2
+    try:
+        np.linalg.cholesky(values)
+        repaired = values
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(values)
+        repaired = (eigenvectors * np.maximum(eigenvalues, min_eigenvalue)) @ eigenvectors.T
+        diagonal = np.diag(values)
+        scale = np.sqrt(np.divide(diagonal, np.diag(repaired), out=np.zeros_like(diagonal),
+                                  where=np.diag(repaired) > 0))
+        repaired = repaired * np.outer(scale, scale)
+    if isinstance(matrix, pd.DataFrame):
+        return pd.DataFrame(repaired, index=matrix.index, columns=matrix.columns)
+    return repaired
+
+def pairwise_covariance(returns, annualize=252, min_periods=2, psd=True):
+    """
+    Pairwise-complete covariance: each pair uses every date on which both have a return
+
+    Equal to returns.cov(min_periods=min_periods) * annualize, but all pairs come from
+    three matrix products over the zero-filled returns and their mask instead of a loop
+    over pairs. Pairs with fewer than min_periods common dates are NaN (before repair).
+
+    Args:
+        returns (pd.DataFrame or ReturnsPanel): Daily returns, dates x tickers, NaN
+            where a ticker has no return
+        annualize (int): Periods per year
+        min_periods (int): Fewest common dates for a pair
+        psd (bool): Repair the matrix with nearest_psd (pairwise estimates of different
+            samples need not be positive semi-definite)
+
+    Returns:
+        pd.DataFrame: Covariance matrix
+    """
+    X, M, labels = _masked(returns)
+    N, _, comoment = _pairwise_moments(X, M, min_periods)
+    cov = comoment / (N - 1) * annualize
+    if psd:
+        cov = nearest_psd(cov)
+    return _labelled_pairs(cov, labels)
+
+def pairwise_correlation(returns, min_periods=2, psd=False):
+    """
+    Pairwise-complete correlation, as returns.corr(min_periods=min_periods)
+
+    Both the covariance and the two variances of a pair use the dates on which both
+    tickers have a return.
+
+    Args:
+        returns (pd.DataFrame or ReturnsPanel): Daily returns, dates x tickers, NaN
+            where a ticker has no return
+        min_periods (int): Fewest common dates for a pair
+        psd (bool): Repair the matrix with nearest_psd
+
+    Returns:
+        pd.DataFrame: Correlation matrix
+    """
+    X, M, labels = _masked(returns)
+    N, A, comoment = _pairwise_moments(X, M, min_periods)
+    # Q[i, j]: sum of i's squared returns over the dates j is observed
+    Q = (X * X).T @ M
+    variance = Q - A * A / np.where(N > 0, N, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = comoment / np.sqrt(variance * variance.T)
+    corr = np.clip(corr, -1, 1)
+    diagonal = np.diag_indices_from(corr)
+    corr[diagonal] = np.where(np.isnan(corr[diagonal]), np.nan, 1.0)
+    if psd:
+        corr = nearest_psd(corr)
+    return _labelled_pairs(corr, labels)
+
+ESTIMATORS = {
+    'sample': sample_covariance,
+    'ledoit_wolf': ledoit_wolf_covariance,
+    'ewma': ewma_covariance,
+    'factor': factor_covariance,
+    'pairwise': pairwise_covariance,
+}
+
+def estimate_covariance(returns, method='sample', annualize=252, **kwargs):
+    """
+    Estimate a covariance matrix with one of the estimators in this module
+
+    Args:
+        returns (pd.DataFrame): Daily returns, dates x tickers, without missing values
+            (NaN allowed for 'pairwise')
+        method (str): 'sample', 'ledoit_wolf', 'ewma', 'factor' or 'pairwise'
+        annualize (int): Periods per year
+        **kwargs: Estimator options (decay for ewma, n_factors/factors for factor,
+            min_periods/psd for pairwise)
+
+    Returns:
+        pd.DataFrame or FactorCovariance: Annualized covariance estimate
+    """
+    if method not in ESTIMATORS:
+        raise ValueError(f"Unknown covariance method: {method} (choose from {', '.join(ESTIMATORS)})")
+    return ESTIMATORS[method](returns, annualize=annualize, **kwargs)
+
+def correlation_from_covariance(cov_matrix):
+    """
+    Correlation matrix implied by a covariance matrix
+
+    Args:
+        cov_matrix (pd.DataFrame or FactorCovariance): Covariance matrix
+
+    Returns:
+        pd.DataFrame: Correlation matrix
+    """
+    dense = cov_matrix.to_dense() if isinstance(cov_matrix, FactorCovariance) else cov_matrix
+    std = np.sqrt(np.diag(dense))
+    return dense / np.outer(std, std)
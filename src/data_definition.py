@@ -1,28 +1,58 @@
 """
 Data Definition Script
-This script provides easy access to the stock data for TSLA, BND, and SPY.
+This script provides easy access to the stock data for the ticker universe in
+config.DATA_CONFIG (TSLA, BND and SPY by default).
+
+Nothing is downloaded at import time. Data is loaded on first access through the
+cached accessors (get_prices, get_clean, get_returns) and the legacy module
+variables (df_tsla, df_spy_clean, df_bnd_returns, ...) resolve lazily to them.
+Prices keep the shape yf.download gave them: tz-naive dates, no Ticker column,
+and an empty frame for a ticker without data.
 """
 
 import pandas as pd
-import yfinance as yf
 import numpy as np
-from datetime import datetime
+from functools import lru_cache
+from config import DATA_CONFIG
+from data_loading import fetch_many, fetch_with_retry
+
+TICKERS = list(DATA_CONFIG['tickers'])
+START_DATE = DATA_CONFIG['start_date']
+END_DATE = DATA_CONFIG['end_date']
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Provider used by the lazy accessors (None means yfinance)
+_provider = None
+_price_cache = {}
 
-def load_stock_data():
+def _download_shape(data):
     """
-    Load stock data for TSLA, BND, and SPY
+    Price data in the shape yf.download returned: no Ticker column, tz-naive dates and
+    the price columns even when there are no rows
     """
-    # Define our assets and time period
-    tickers = ['TSLA', 'BND', 'SPY']
-    start_date = '2015-07-01'
-    end_date = '2025-07-31'
+    data = data.drop(columns='Ticker', errors='ignore')
+    if data.empty:
+        return pd.DataFrame(columns=PRICE_COLUMNS, index=pd.DatetimeIndex([], name='Date'), dtype=float)
+    if isinstance(data.index, pd.DatetimeIndex) and data.index.tz is not None:
+        # Keep the exchange's calendar dates rather than converting to UTC
+        data.index = data.index.tz_localize(None)
+    return data
+
+def load_stock_data(provider=None):
+    """
+    Load stock data for every ticker of the universe
     
-    # Download data for all tickers
-    data = {}
-    for ticker in tickers:
-        print(f"Loading {ticker} data...")
-        data[ticker] = yf.download(ticker, start=start_date, end=end_date)
+    Args:
+        provider: Price provider passed to data_loading.fetch_many (default yfinance)
+    """
+    # Download data for all tickers concurrently
+    print(f"Loading {len(TICKERS)} tickers: {', '.join(TICKERS[:10])}{' ...' if len(TICKERS) > 10 else ''}")
+    data, failures = fetch_many(TICKERS, START_DATE, END_DATE, provider=provider, allow_empty=True)
+    data = {ticker: _download_shape(frame) for ticker, frame in data.items()}
+    for ticker in data:
         print(f"✓ {ticker}: {len(data[ticker])} trading days")
+    for ticker, error in failures.items():
+        print(f"✗ {ticker}: {error}")
     
     return data
 
@@ -58,39 +88,109 @@ def calculate_returns(cleaned_data):
     
     return returns_data
 
-# Load and process the data
-print("Loading stock data...")
-data = load_stock_data()
-cleaned_data = clean_data(data)
-returns_data = calculate_returns(cleaned_data)
-
-# Define easy access variables
-df = data  # Main data dictionary with all tickers
-
-# Individual ticker data
-df_tsla = data['TSLA']
-df_bnd = data['BND']
-df_spy = data['SPY']
-
-# Cleaned data
-df_tsla_clean = cleaned_data['TSLA']
-df_bnd_clean = cleaned_data['BND']
-df_spy_clean = cleaned_data['SPY']
-
-# Returns data
-df_tsla_returns = returns_data['TSLA']
-df_bnd_returns = returns_data['BND']
-df_spy_returns = returns_data['SPY']
-
-print("\n=== Data Variables Defined ===")
-print("• df - main data dictionary with all tickers")
-print("• df_tsla, df_bnd, df_spy - individual ticker data")
-print("• df_tsla_clean, df_bnd_clean, df_spy_clean - cleaned data")
-print("• df_tsla_returns, df_bnd_returns, df_spy_returns - returns data")
-
-print(f"\nData shapes:")
-print(f"TSLA: {df_tsla.shape}")
-print(f"BND: {df_bnd.shape}")
-print(f"SPY: {df_spy.shape}")
-
-print("\n✓ Data successfully loaded and ready for analysis!")
+def set_provider(provider):
+    """
+    Choose the price provider used by the lazy accessors and drop anything already cached
+    
+    Args:
+        provider: Object with a fetch(ticker, start_date, end_date) method, e.g.
+            data_loading.LocalFileProvider() for offline use (None means yfinance)
+    """
+    global _provider
+    _provider = provider
+    _price_cache.clear()
+    get_clean.cache_clear()
+    get_returns.cache_clear()
+
+def get_prices(ticker):
+    """
+    Raw price data for one ticker, loaded on first access and cached
+    
+    Args:
+        ticker (str): Stock ticker symbol
+    
+    Returns:
+        pd.DataFrame: Historical stock data with tz-naive dates, empty if the provider has
+            none (shared cached object - copy before modifying)
+    """
+    if ticker not in _price_cache:
+        data = fetch_with_retry(ticker, START_DATE, END_DATE, provider=_provider, allow_empty=True)
+        _price_cache[ticker] = _download_shape(data)
+    return _price_cache[ticker]
+
+@lru_cache(maxsize=None)
+def get_clean(ticker):
+    """
+    Cleaned price data for one ticker, loaded on first access and cached
+    
+    Args:
+        ticker (str): Stock ticker symbol
+    
+    Returns:
+        pd.DataFrame: Price data with missing values filled
+    """
+    return clean_data({ticker: get_prices(ticker)})[ticker]
+
+@lru_cache(maxsize=None)
+def get_returns(ticker):
+    """
+    Daily returns for one ticker, loaded on first access and cached
+    
+    Args:
+        ticker (str): Stock ticker symbol
+    
+    Returns:
+        pd.Series: Daily returns
+    """
+    return calculate_returns({ticker: get_clean(ticker)})[ticker]
+
+def prefetch(tickers=None):
+    """
+    Warm the price cache for several tickers with one concurrent fetch
+    
+    Args:
+        tickers (list): Tickers to load (default TICKERS)
+    """
+    missing = [t for t in (tickers or TICKERS) if t not in _price_cache]
+    if missing:
+        data, failures = fetch_many(missing, START_DATE, END_DATE, provider=_provider, allow_empty=True)
+        _price_cache.update({ticker: _download_shape(frame) for ticker, frame in data.items()})
+        for ticker, error in failures.items():
+            print(f"✗ {ticker}: {error}")
+
+def _all_tickers(accessor):
+    prefetch()
+    return {ticker: accessor(ticker) for ticker in TICKERS}
+
+# Legacy module variables, resolved lazily on first attribute access
+_LAZY_VARIABLES = {
+    'data': lambda: _all_tickers(get_prices),
+    'df': lambda: _all_tickers(get_prices),
+    'cleaned_data': lambda: _all_tickers(get_clean),
+    'returns_data': lambda: _all_tickers(get_returns),
+}
+for _ticker in TICKERS:
+    _LAZY_VARIABLES[f'df_{_ticker.lower()}'] = lambda t=_ticker: get_prices(t)
+    _LAZY_VARIABLES[f'df_{_ticker.lower()}_clean'] = lambda t=_ticker: get_clean(t)
+    _LAZY_VARIABLES[f'df_{_ticker.lower()}_returns'] = lambda t=_ticker: get_returns(t)
+
+def __getattr__(name):
+    if name in _LAZY_VARIABLES:
+        return _LAZY_VARIABLES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+if __name__ == "__main__":
+    print("Loading stock data...")
+    prefetch()
+    
+    print("\n=== Data Variables Defined ===")
+    print("• df - main data dictionary with all tickers")
+    print("• df_<ticker>, e.g. df_tsla - individual ticker data")
+    print("• df_<ticker>_clean - cleaned data")
+    print("• df_<ticker>_returns - returns data")
+    
+    print(f"\nData shapes:")
+    for ticker in TICKERS:
+        print(f"{ticker}: {get_prices(ticker).shape}")
+    
+    print("\n✓ Data successfully loaded and ready for analysis!")
@@ -1,15 +1,97 @@
 """
-This script fetches historical financial data for TSLA, BND, and SPY using yfinance
+This script fetches historical financial data for the ticker universe in
+config.DATA_CONFIG (TSLA, BND and SPY by default) using yfinance
 """
 
-import yfinance as yf
+import os
+import time
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import DATA_CONFIG
+from price_store import (save_prices, load_assets, load_prices, has_ticker, last_date,
+                         new_rows, append_prices, migrate_csv)
 import warnings
 warnings.filterwarnings('ignore')
 
-def fetch_stock_data(ticker, start_date, end_date):
+# Columns derived from Close that are kept in the store by refresh_assets
+DERIVED_COLUMNS = ['Daily_Return', 'Volatility_20', 'MA_20']
+
+class YFinanceProvider:
+    """
+    Price provider backed by Yahoo Finance
+    """
+    name = 'yfinance'
+    
+    def fetch(self, ticker, start_date, end_date):
+        """
+        Download daily history for one ticker (end date exclusive)
+        """
+        import yfinance as yf
+        return yf.Ticker(ticker).history(start=start_date, end=end_date)
+
+class LocalFileProvider:
+    """
+    Offline price provider that serves history from a local data folder
+    (price store or legacy CSV files) instead of the network
+    """
+    name = 'local'
+    
+    def __init__(self, folder='data'):
+        self.folder = folder
+    
+    def fetch(self, ticker, start_date, end_date):
+        """
+        Read daily history for one ticker (end date exclusive, like yfinance)
+        """
+        end = None
+        if end_date is not None:
+            end = pd.Timestamp(end_date) - pd.Timedelta(nanoseconds=1)
+        return load_assets([ticker], self.folder, start=start_date, end=end)[ticker]
+
+def fetch_with_retry(ticker, start_date, end_date, provider=None, max_retries=3, backoff=1.0,
+                     allow_empty=False):
+    """
+    Fetch one ticker through a provider, retrying failed requests with exponential backoff
+    
+    Args:
+        ticker (str): Stock ticker symbol
+        start_date (str): Start date in 'YYYY-MM-DD' format
+        end_date (str): End date in 'YYYY-MM-DD' format
+        provider: Object with a fetch(ticker, start_date, end_date) method (default yfinance)
+        max_retries (int): Retries after the first failed attempt
+        backoff (float): Initial delay in seconds, doubled after each failure
+        allow_empty (bool): Return an empty frame instead of raising when the provider has no rows
+    
+    Returns:
+        pd.DataFrame: Historical stock data with a 'Ticker' column
+    
+    Raises:
+        ValueError: If the provider returns no rows and allow_empty is False
+        Exception: The provider's last error once retries are exhausted
+    """
+    provider = provider or YFinanceProvider()
+    
+    for attempt in range(max_retries + 1):
+        try:
+            data = provider.fetch(ticker, start_date, end_date)
+            break
+        except Exception:
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+    
+    if data is None or data.empty:
+        if not allow_empty:
+            raise ValueError(f"No data found for {ticker}")
+        data = pd.DataFrame() if data is None else data
+    
+    # Add ticker column for identification
+    data['Ticker'] = ticker
+    return data
+
+def fetch_stock_data(ticker, start_date, end_date, provider=None):
     """
     Fetch historical stock data for a given ticker
     
@@ -17,59 +99,198 @@ def fetch_stock_data(ticker, start_date, end_date):
         ticker (str): Stock ticker symbol
         start_date (str): Start date in 'YYYY-MM-DD' format
         end_date (str): End date in 'YYYY-MM-DD' format
+        provider: Price provider (default yfinance)
     
     Returns:
         pd.DataFrame: Historical stock data
     """
     try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(start=start_date, end=end_date)
-        
-        if data.empty:
-            print(f"Warning: No data found for {ticker}")
-            return None
-            
-        # Add ticker column for identification
-        data['Ticker'] = ticker
+        data = fetch_with_retry(ticker, start_date, end_date, provider, max_retries=0)
         print(f"Successfully fetched data for {ticker}: {len(data)} records")
         return data
         
+    except ValueError as e:
+        print(f"Warning: {str(e)}")
+        return None
     except Exception as e:
         print(f"Error fetching data for {ticker}: {str(e)}")
         return None
 
-def load_all_assets():
+def fetch_many(tickers, start_date, end_date, provider=None, max_workers=8, max_retries=3, backoff=1.0,
+               allow_empty=False):
     """
-    Load data for all three assets: TSLA, BND, SPY
+    Fetch many tickers concurrently on a bounded thread pool
+    
+    Args:
+        tickers (list): Stock ticker symbols
+        start_date (str or dict): Start date in 'YYYY-MM-DD' format, or a start date per ticker
+        end_date (str): End date in 'YYYY-MM-DD' format
+        provider: Price provider shared by all workers (default yfinance)
+        max_workers (int): Maximum concurrent requests
+        max_retries (int): Retries per ticker
+        backoff (float): Initial retry delay in seconds
+        allow_empty (bool): Return empty frames for tickers without rows instead of failing them
+    
+    Returns:
+        tuple: (dict of dataframes per fetched ticker, dict of error messages per failed ticker)
+    """
+    provider = provider or YFinanceProvider()
+    asset_data = {}
+    failures = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_with_retry, ticker,
+                            start_date[ticker] if isinstance(start_date, dict) else start_date,
+                            end_date, provider, max_retries, backoff, allow_empty): ticker
+            for ticker in tickers
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                asset_data[ticker] = future.result()
+            except Exception as e:
+                failures[ticker] = str(e)
+    
+    # Keep the caller's ticker order regardless of completion order
+    asset_data = {ticker: asset_data[ticker] for ticker in tickers if ticker in asset_data}
+    return asset_data, failures
+
+def load_all_assets(provider=None, max_workers=8, tickers=None, start_date=None, end_date=None):
+    """
+    Load data for every asset of the universe
+    
+    Args:
+        provider: Price provider (default yfinance, LocalFileProvider for offline runs)
+        max_workers (int): Maximum concurrent requests
+        tickers (list): Tickers to load (default DATA_CONFIG['tickers'])
+        start_date (str): First date (default DATA_CONFIG['start_date'])
+        end_date (str): End date (default DATA_CONFIG['end_date'])
     
     Returns:
         dict: Dictionary containing dataframes for each asset
     """
-    # Define our assets
-    tickers = ['TSLA', 'BND', 'SPY']
-    start_date = '2015-07-01'
-    end_date = '2025-07-31'
+    tickers = list(tickers or DATA_CONFIG['tickers'])
+    start_date = start_date or DATA_CONFIG['start_date']
+    end_date = end_date or DATA_CONFIG['end_date']
     
-    print("Starting data fetch...")
+    print(f"Starting data fetch for {len(tickers)} tickers...")
     print(f"Period: {start_date} to {end_date}")
     print("-" * 40)
     
-    asset_data = {}
+    asset_data, failures = fetch_many(tickers, start_date, end_date,
+                                      provider=provider, max_workers=max_workers)
     
-    for ticker in tickers:
-        print(f"Fetching data for {ticker}...")
-        data = fetch_stock_data(ticker, start_date, end_date)
-        
-        if data is not None:
-            asset_data[ticker] = data
-        else:
-            print(f"Failed to fetch data for {ticker}")
+    for ticker, data in asset_data.items():
+        print(f"Successfully fetched data for {ticker}: {len(data)} records")
+    for ticker, error in failures.items():
+        print(f"Failed to fetch data for {ticker}: {error}")
     
     print("-" * 40)
     print(f"Data loading complete. Loaded {len(asset_data)} assets.")
     
     return asset_data
 
+def compute_derived_columns(close, window=20, start=0):
+    """
+    Calculate Daily_Return, Volatility_20 and MA_20 for the rows of a close series from position start on
+    
+    Only the window rows before start are read, so appending rows to a long history
+    costs time proportional to the number of new rows.
+    
+    Args:
+        close (pd.Series): Close prices
+        window (int): Rolling window size
+        start (int): Position of the first row to calculate
+    
+    Returns:
+        pd.DataFrame: Derived columns indexed like close.iloc[start:]
+    """
+    context = close.iloc[max(start - window, 0):]
+    daily_return = context.pct_change()
+    
+    derived = pd.DataFrame({
+        'Daily_Return': daily_return,
+        'Volatility_20': daily_return.rolling(window).std(),
+        'MA_20': context.rolling(window).mean()
+    })
+    return derived.iloc[len(context) - (len(close) - start):]
+
+def refresh_assets(tickers, start_date='2015-07-01', end_date=None, provider=None,
+                   folder='data', window=20, max_workers=8):
+    """
+    Incrementally update the price store, fetching only dates after each ticker's last stored row
+    
+    Tickers that only exist as legacy {TICKER}_data.csv files are migrated into the
+    store first and then refreshed like stored ones; tickers with neither are fetched
+    from start_date. The derived columns (Daily_Return, Volatility_20, MA_20) are
+    calculated for the new rows only and appended with them in a single atomic write. A stored ticker with no new bar yet
+    (weekend, holiday, or before the provider posts the day's bar) appends 0 rows.
+    
+    Args:
+        tickers (list): Stock ticker symbols
+        start_date (str): Start date for tickers without stored history
+        end_date (str): End date, exclusive (default tomorrow, i.e. up to today)
+        provider: Price provider (default yfinance)
+        folder (str): Data folder
+        window (int): Rolling window for the derived columns
+        max_workers (int): Maximum concurrent requests
+    
+    Returns:
+        dict: Number of rows appended per ticker
+    """
+    if end_date is None:
+        end_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    
+    start_dates = {}
+    for ticker in tickers:
+        if not has_ticker(ticker, folder) and os.path.exists(os.path.join(folder, f'{ticker}_data.csv')):
+            migrate_csv(ticker, folder)
+        last = last_date(ticker, folder) if has_ticker(ticker, folder) else None
+        if last is None:
+            start_dates[ticker] = start_date
+            continue
+        next_day = (last + timedelta(days=1)).strftime('%Y-%m-%d')
+        if next_day < end_date:
+            start_dates[ticker] = next_day
+    
+    appended = {ticker: 0 for ticker in tickers}
+    if not start_dates:
+        print("Price store is up to date.")
+        return appended
+    
+    new_data, failures = fetch_many(list(start_dates), start_dates, end_date,
+                                    provider=provider, max_workers=max_workers, allow_empty=True)
+    
+    for ticker, tail in new_data.items():
+        if tail.empty:
+            # An empty tail is only a failure for a ticker with no stored history
+            if not has_ticker(ticker, folder):
+                failures[ticker] = f"No data found for {ticker}"
+            continue
+        tail = new_rows(ticker, tail, folder)
+        if tail.empty:
+            continue
+        if has_ticker(ticker, folder):
+            # Stores written before refresh existed get the derived columns once, for their whole history
+            if 'Daily_Return' not in load_prices(ticker, folder, last_rows=0).columns:
+                full = load_prices(ticker, folder, mmap=False)
+                full[DERIVED_COLUMNS] = compute_derived_columns(full['Close'], window)
+                save_prices(ticker, full, folder)
+            history = load_prices(ticker, folder, columns=['Close'], last_rows=window)['Close']
+        else:
+            history = tail['Close'].iloc[:0]
+        
+        close = pd.concat([history, tail['Close']])
+        tail[DERIVED_COLUMNS] = compute_derived_columns(close, window, start=len(history)).values
+        appended[ticker] = append_prices(ticker, tail, folder)
+        print(f"{ticker}: appended {appended[ticker]} rows")
+    
+    for ticker, error in failures.items():
+        print(f"Failed to refresh {ticker}: {error}")
+    
+    return appended
+
 def basic_data_info(asset_data):
     """
     Display basic information about loaded data
@@ -88,21 +309,15 @@ def basic_data_info(asset_data):
 
 def save_data(asset_data, folder='data'):
     """
-    Save the loaded data to CSV files
+    Save the loaded data to the columnar price store
     
     Args:
         asset_data (dict): Dictionary containing asset dataframes
         folder (str): Folder to save data files
     """
-    import os
-    
-    if not os.path.exists(folder):
-        os.makedirs(folder)
-    
     for ticker, data in asset_data.items():
-        filename = f"{folder}/{ticker}_data.csv"
-        data.to_csv(filename)
-        print(f"Saved {ticker} data to {filename}")
+        path = save_prices(ticker, data, folder)
+        print(f"Saved {ticker} data to {path}")
 
 if __name__ == "__main__":
     # Load all asset data
@@ -6,11 +6,12 @@ Analyzes LSTM forecast results and provides investment insights
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from lstm_inference import load_forecast_results
 import warnings
 warnings.filterwarnings('ignore')
 
-# Your LSTM forecast results
-FORECAST_RESULTS = {
+# Your LSTM forecast results, used when there is no lstm_inference run to read
+FORECAST_DEFAULTS = {
     'current_price': 319.04,
     'forecast_6m_price': 205.52,
     'forecast_range_low': 205.52,
@@ -19,17 +20,33 @@ FORECAST_RESULTS = {
     'forecast_period': '6 months'
 }
 
+def forecast_results():
+    """
+    TSLA forecast summary: the latest lstm_inference run (outputs/forecast_results.json) or the defaults
+    """
+    return load_forecast_results('TSLA', default=FORECAST_DEFAULTS)
+
+def _forecast_range(scenario=None):
+    """
+    Low and high forecast price: from a simulated scenario if given, else the saved range
+    """
+    if scenario is not None:
+        return scenario['low'], scenario['high']
+    results = forecast_results()
+    return results['forecast_range_low'], results['forecast_range_high']
+
 def analyze_forecast_trends():
     """
     Analyze the LSTM forecast results and provide trend insights
     """
+    results = forecast_results()
     print("=== TESLA (TSLA) FORECAST ANALYSIS ===")
     print(f"Analysis based on LSTM model predictions\n")
     
     # Current situation
-    current_price = FORECAST_RESULTS['current_price']
-    forecast_price = FORECAST_RESULTS['forecast_6m_price']
-    expected_return = FORECAST_RESULTS['expected_return_6m']
+    current_price = results['current_price']
+    forecast_price = results['forecast_6m_price']
+    expected_return = results['expected_return_6m']
     
     print("1. CURRENT MARKET POSITION")
     print("-" * 35)
@@ -69,16 +86,20 @@ def analyze_forecast_trends():
     print(f"Trend Category: {trend_category}")
     print(f"Description: {trend_description}")
 
-def analyze_volatility_and_risk():
+def analyze_volatility_and_risk(scenario=None):
     """
     Analyze volatility and risk based on forecast range
+    
+    Args:
+        scenario (dict): price_simulation.forecast_scenario result; its low/high replace
+            the fixed forecast range
     """
+    results = forecast_results()
     print(f"\n4. VOLATILITY AND RISK ANALYSIS")
     print("-" * 40)
     
-    forecast_low = FORECAST_RESULTS['forecast_range_low']
-    forecast_high = FORECAST_RESULTS['forecast_range_high']
-    current_price = FORECAST_RESULTS['current_price']
+    forecast_low, forecast_high = _forecast_range(scenario)
+    current_price = results['current_price']
     
     # Calculate forecast uncertainty
     forecast_range = forecast_high - forecast_low
@@ -93,7 +114,7 @@ def analyze_volatility_and_risk():
     
     print(f"\nScenario Analysis:")
     print(f"• Best Case: {best_case_return*100:.1f}% return (${forecast_high:.2f})")
-    print(f"• Expected Case: {FORECAST_RESULTS['expected_return_6m']*100:.1f}% return (${FORECAST_RESULTS['forecast_6m_price']:.2f})")
+    print(f"• Expected Case: {results['expected_return_6m']*100:.1f}% return (${results['forecast_6m_price']:.2f})")
     print(f"• Worst Case: {worst_case_return*100:.1f}% return (${forecast_low:.2f})")
     
     # Risk assessment
@@ -116,14 +137,18 @@ def analyze_volatility_and_risk():
     print("• 6-month forecasts have moderate reliability for volatile stocks")
     print("• Confidence intervals widen significantly over longer periods")
 
-def market_opportunities_and_risks():
+def market_opportunities_and_risks(scenario=None):
     """
     Identify market opportunities and risks based on forecast
+    
+    Args:
+        scenario (dict): price_simulation.forecast_scenario result, see analyze_volatility_and_risk
     """
+    results = forecast_results()
     print(f"\n5. MARKET OPPORTUNITIES AND RISKS")
     print("-" * 45)
     
-    expected_return = FORECAST_RESULTS['expected_return_6m']
+    expected_return = results['expected_return_6m']
     
     print("IDENTIFIED RISKS:")
     if expected_return < -0.20:
@@ -140,8 +165,8 @@ def market_opportunities_and_risks():
     print("• Sector Risk: EV industry faces increasing competition")
     
     print(f"\nIDENTIFIED OPPORTUNITIES:")
-    forecast_high = FORECAST_RESULTS['forecast_range_high']
-    current_price = FORECAST_RESULTS['current_price']
+    _, forecast_high = _forecast_range(scenario)
+    current_price = results['current_price']
     upside_potential = (forecast_high - current_price) / current_price
     
     if upside_potential > 0:
@@ -156,10 +181,11 @@ def investment_recommendations():
     """
     Provide investment recommendations based on forecast
     """
+    results = forecast_results()
     print(f"\n6. INVESTMENT RECOMMENDATIONS")
     print("-" * 40)
     
-    expected_return = FORECAST_RESULTS['expected_return_6m']
+    expected_return = results['expected_return_6m']
     
     print("PORTFOLIO STRATEGY IMPLICATIONS:")
     
@@ -198,16 +224,19 @@ def investment_recommendations():
     print("• Maintain diversification across asset classes")
     print("• Regular monitoring and rebalancing")
 
-def confidence_interval_analysis():
+def confidence_interval_analysis(scenario=None):
     """
     Analyze the confidence intervals and their implications
+    
+    Args:
+        scenario (dict): price_simulation.forecast_scenario result, see analyze_volatility_and_risk
     """
+    results = forecast_results()
     print(f"\n7. CONFIDENCE INTERVAL ANALYSIS")
     print("-" * 40)
     
-    current_price = FORECAST_RESULTS['current_price']
-    forecast_low = FORECAST_RESULTS['forecast_range_low']
-    forecast_high = FORECAST_RESULTS['forecast_range_high']
+    current_price = results['current_price']
+    forecast_low, forecast_high = _forecast_range(scenario)
     
     print("FORECAST RELIABILITY ASSESSMENT:")
     
@@ -245,6 +274,8 @@ def generate_forecast_report():
     print("COMPREHENSIVE FORECAST ANALYSIS REPORT")
     print("="*60)
     
+    # Sections 4, 5 and 7 use the saved forecast range (the simulated band written by
+    # lstm_inference with the ticker's historical volatility), as the forecast plots do
     analyze_forecast_trends()
     analyze_volatility_and_risk()
     market_opportunities_and_risks()
@@ -7,7 +7,11 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from datetime import datetime, timedelta
+from datetime import datetime
+from config import DATA_CONFIG
+from price_store import load_prices
+from price_simulation import forecast_scenario
+from lstm_inference import load_forecast_results, forecast_returns_6m
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -21,53 +25,55 @@ FORECAST_DATA = {
     'forecast_period_months': 6
 }
 
+def forecast_data():
+    """
+    FORECAST_DATA updated with the latest lstm_inference run (outputs/forecast_results.json), if any
+    """
+    data = dict(FORECAST_DATA)
+    latest = load_forecast_results('TSLA')
+    if latest is not None:
+        data.update({
+            'current_price': latest['current_price'],
+            'forecast_price': latest['forecast_6m_price'],
+            'forecast_high': latest['forecast_range_high'],
+            'forecast_low': latest['forecast_range_low'],
+            'expected_return': latest['expected_return_6m']
+        })
+    return data
+
 def plot_forecast_scenario():
     """
     Create a visualization of the forecast scenario
     """
     print("Creating forecast scenario visualization...")
-    
-    # Create dates for visualization
-    current_date = datetime.now()
-    forecast_date = current_date + timedelta(days=180)  # 6 months
-    
-    # Create price path simulation
-    dates = pd.date_range(start=current_date, end=forecast_date, freq='D')
-    
-    # Simple linear decline for visualization (actual LSTM would be more complex)
-    n_days = len(dates)
-    price_path = np.linspace(FORECAST_DATA['current_price'], FORECAST_DATA['forecast_price'], n_days)
-    
-    # Add some realistic volatility around the trend
-    np.random.seed(42)
-    volatility = 0.03  # 3% daily volatility
-    daily_returns = np.random.normal(0, volatility, n_days-1)
-    
-    # Adjust returns to end at forecast price
-    adjustment_factor = (FORECAST_DATA['forecast_price'] / FORECAST_DATA['current_price'] - 1) / (n_days-1)
-    daily_returns = daily_returns + adjustment_factor
-    
-    # Calculate price path with volatility
-    realistic_path = [FORECAST_DATA['current_price']]
-    for ret in daily_returns:
-        realistic_path.append(realistic_path[-1] * (1 + ret))
-    
-    # Ensure we end at forecast price
-    realistic_path[-1] = FORECAST_DATA['forecast_price']
+    forecast = forecast_data()
+    
+    # Daily volatility from TSLA history (3% if no price data is available)
+    try:
+        tsla = load_prices('TSLA', columns=['Close'])
+        volatility = tsla['Close'].pct_change().std()
+    except Exception:
+        volatility = 0.03
+    
+    # Simulated price paths whose median ends at the LSTM forecast (126 trading days = 6 months)
+    n_days = 126
+    scenario = forecast_scenario(forecast['current_price'], forecast['forecast_price'],
+                                 n_days=n_days, daily_volatility=volatility, confidence=0.90,
+                                 n_paths=20000)
+    bands = scenario['bands']
+    dates = pd.bdate_range(start=datetime.now(), periods=n_days + 1)
     
     # Create the plot
     plt.figure(figsize=(14, 10))
     
     # Plot 1: Price forecast with confidence interval
     plt.subplot(2, 2, 1)
-    plt.plot(dates, realistic_path, 'b-', linewidth=2, label='LSTM Forecast Path')
-    plt.axhline(y=FORECAST_DATA['current_price'], color='green', linestyle='--', alpha=0.7, label='Current Price')
-    plt.axhline(y=FORECAST_DATA['forecast_price'], color='red', linestyle='--', alpha=0.7, label='Target Price')
+    plt.plot(dates, bands['p50'], 'b-', linewidth=2, label='Median Simulated Path')
+    plt.axhline(y=forecast['current_price'], color='green', linestyle='--', alpha=0.7, label='Current Price')
+    plt.axhline(y=forecast['forecast_price'], color='red', linestyle='--', alpha=0.7, label='Target Price')
     
-    # Add confidence interval
-    upper_bound = np.linspace(FORECAST_DATA['current_price'], FORECAST_DATA['forecast_high'], n_days)
-    lower_bound = np.linspace(FORECAST_DATA['current_price'], FORECAST_DATA['forecast_low'], n_days)
-    plt.fill_between(dates, lower_bound, upper_bound, alpha=0.2, color='blue', label='Confidence Interval')
+    # Add 90% band of the simulated paths
+    plt.fill_between(dates, bands['p5'], bands['p95'], alpha=0.2, color='blue', label='90% Simulated Band')
     
     plt.title('TSLA 6-Month Price Forecast', fontweight='bold', fontsize=14)
     plt.ylabel('Price ($)')
@@ -79,9 +85,9 @@ def plot_forecast_scenario():
     plt.subplot(2, 2, 2)
     scenarios = ['Best Case', 'Expected', 'Worst Case']
     returns = [
-        (FORECAST_DATA['forecast_high'] - FORECAST_DATA['current_price']) / FORECAST_DATA['current_price'] * 100,
-        FORECAST_DATA['expected_return'] * 100,
-        (FORECAST_DATA['forecast_low'] - FORECAST_DATA['current_price']) / FORECAST_DATA['current_price'] * 100
+        (scenario['high'] - forecast['current_price']) / forecast['current_price'] * 100,
+        forecast['expected_return'] * 100,
+        (scenario['low'] - forecast['current_price']) / forecast['current_price'] * 100
     ]
     colors = ['green', 'orange', 'red']
     
@@ -96,35 +102,35 @@ def plot_forecast_scenario():
         plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + (1 if return_val > 0 else -3),
                 f'{return_val:.1f}%', ha='center', va='bottom' if return_val > 0 else 'top', fontweight='bold')
     
-    # Plot 3: Risk comparison with other assets
+    # Plot 3: Risk comparison with the other assets of the universe
     plt.subplot(2, 2, 3)
-   # Plot 3: Risk comparison with other assets
-plt.subplot(2, 2, 3)
-try:
-    # Load other assets for comparison
-    bnd = pd.read_csv('data/BND_data.csv', index_col=0, parse_dates=True)
-    spy = pd.read_csv('data/SPY_data.csv', index_col=0, parse_dates=True)
-    
-    # Calculate historical volatilities (annualized)
-    bnd_vol = bnd['Close'].pct_change().std() * np.sqrt(252) * 100
-    spy_vol = spy['Close'].pct_change().std() * np.sqrt(252) * 100
-    tsla_vol = 40  # Approximate based on TSLA historical volatility
-    
-    assets = ['BND', 'SPY', 'TSLA']
-    volatilities = [bnd_vol, spy_vol, tsla_vol]
-    expected_returns_comp = [3, 10, FORECAST_DATA['expected_return'] * 100]  # percent
-    
-    # Create a scatter plot: Volatility vs Expected Return
-    plt.scatter(volatilities, expected_returns_comp, color=['blue','orange','red'], s=100)
-    for i, asset in enumerate(assets):
-        plt.text(volatilities[i]+0.2, expected_returns_comp[i], asset, fontsize=12, fontweight='bold')
-    
-    plt.xlabel('Annualized Volatility (%)')
-    plt.ylabel('Expected Return (%)')
-    plt.title('Risk vs Return Comparison', fontweight='bold', fontsize=14)
-    plt.grid(True, alpha=0.3)
-
-except FileNotFoundError:
-    plt.text(0.5, 0.5, 'BND/SPY data not found', ha='center', va='center', fontsize=12)
-    plt.title('Risk vs Return Comparison', fontweight='bold', fontsize=14)
-    plt.axis('off')
+    assets, volatilities, expected_returns_comp = [], [], []
+    forecast_returns = forecast_returns_6m()
+    for ticker in DATA_CONFIG['tickers']:
+        try:
+            daily_returns = load_prices(ticker, columns=['Close'])['Close'].pct_change().dropna()
+        except FileNotFoundError:
+            continue
+        assets.append(ticker)
+        # Historical annualized volatility; forecast tickers' returns are the LSTM forecasts
+        volatilities.append(daily_returns.std() * np.sqrt(252) * 100)
+        if ticker in forecast_returns:
+            expected_returns_comp.append(forecast_returns[ticker] * 100)
+        else:
+            expected_returns_comp.append(daily_returns.mean() * 252 * 100)  # percent
+    
+    if assets:
+        # Create a scatter plot: Volatility vs Expected Return
+        colors = ['red' if asset in forecast_returns else plt.cm.tab10(i % 10) for i, asset in enumerate(assets)]
+        plt.scatter(volatilities, expected_returns_comp, color=colors, s=100)
+        for i, asset in enumerate(assets):
+            plt.text(volatilities[i]+0.2, expected_returns_comp[i], asset, fontsize=12, fontweight='bold')
+        
+        plt.xlabel('Annualized Volatility (%)')
+        plt.ylabel('Expected Return (%)')
+        plt.title('Risk vs Return Comparison', fontweight='bold', fontsize=14)
+        plt.grid(True, alpha=0.3)
+    else:
+        plt.text(0.5, 0.5, 'Price data not found', ha='center', va='center', fontsize=12)
+        plt.title('Risk vs Return Comparison', fontweight='bold', fontsize=14)
+        plt.axis('off')
@@ -0,0 +1,296 @@
+"""
+Rolling-origin forecast evaluation
+Evaluates ARIMA one-step and h-step forecasts from every origin of a test span, as in
+the Task 2 notebook's ARIMA model but without refitting at each origin, and searches
+ARIMA orders for a universe of tickers in parallel with an on-disk fit cache.
+
+The model is fitted once on the training span. Its parameters are then held fixed and
+the whole series is run through the Kalman filter in one pass, which gives the
+predicted state a(t+1|t) at every origin. Forecasts h steps ahead from all origins are
+then propagated together: y(t+h|t) = Z T^(h-1) a(t+1|t) plus intercepts, one matrix
+product per horizon step.
+"""
+
+import os
+import json
+import time
+import signal
+import hashlib
+import itertools
+import uuid
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statsmodels.tsa.arima.model import ARIMA
+import warnings
+warnings.filterwarnings('ignore')
+
+def forecast_metrics(actual, predicted):
+    """
+    Forecast error metrics (as in the Task 2 notebook), skipping missing values
+
+    Args:
+        actual (array-like): Actual values
+        predicted (array-like): Forecasts
+
+    Returns:
+        dict: MAE, RMSE, MAPE (percent) and the number of forecasts N
+    """
+    actual = np.asarray(actual, dtype=np.float64)
+    predicted = np.asarray(predicted, dtype=np.float64)
+    valid = ~(np.isnan(actual) | np.isnan(predicted))
+    errors = actual[valid] - predicted[valid]
+    return {
+        'MAE': np.mean(np.abs(errors)),
+        'RMSE': np.sqrt(np.mean(errors ** 2)),
+        'MAPE': np.mean(np.abs(errors / actual[valid])) * 100,
+        'N': int(valid.sum())
+    }
+
+def _intercept(model, name, positions):
+    """
+    Observation or state intercept at the given time positions (one column per position)
+    """
+    intercept = model[name]
+    if intercept.ndim == 2:
+        return intercept[:, np.minimum(positions, intercept.shape[1] - 1)]
+    return intercept[:, None]
+
+def _timestamp_like(value, index):
+    """
+    value as a Timestamp comparable with a DatetimeIndex (same tz-awareness and zone)
+    """
+    value = pd.Timestamp(value)
+    tz = getattr(index, 'tz', None)
+    if value.tz is None:
+        return value if tz is None else value.tz_localize(tz)
+    return value.tz_convert(tz) if tz is not None else value.tz_convert('UTC').tz_localize(None)
+
+def multi_step_forecasts(results, origins, horizons=(1,)):
+    """
+    Forecasts h steps ahead from many origins of one filtered model
+
+    Args:
+        results: statsmodels state-space results (e.g. a fitted ARIMA) covering the origins
+        origins (np.ndarray): Row positions of the last observation used for each forecast
+        horizons (tuple): Forecast horizons in steps
+
+    Returns:
+        np.ndarray: len(origins) x len(horizons) forecasts, y(origin + h | origin); NaN
+            where the target lies past the end of the filtered sample
+    """
+    model = results.model.ssm
+    if model['transition'].ndim == 3 or model['design'].ndim == 3:
+        raise ValueError("Time-varying transition or design matrices are not supported")
+    transition, design = model['transition'], model['design']
+
+    origins = np.asarray(origins, dtype=np.int64)
+    horizons = sorted(horizons)
+    forecasts = np.empty((len(origins), len(horizons)))
+
+    # a(t+1|t) for every origin, propagated one step at a time
+    state = results.predicted_state[:, origins + 1]
+    column = 0
+    for step in range(1, horizons[-1] + 1):
+        targets = origins + step
+        if step == horizons[column]:
+            forecast = design @ state + _intercept(model, 'obs_intercept', targets)
+            forecasts[:, column] = np.where(targets < model.nobs, forecast[0], np.nan)
+            column += 1
+            if column == len(horizons):
+                break
+        state = transition @ state + _intercept(model, 'state_intercept', targets)
+    return forecasts
+
+def rolling_origin_forecast(series, order=(0, 1, 1), train_end='2024-01-01', horizons=(1, 5, 21),
+                            trend=None, verbose=True):
+    """
+    Rolling-origin ARIMA evaluation over a test span with a single fit
+
+    Every test date is a forecast origin: forecasts for origin t use observations up
+    to t and the parameters estimated on the training span only.
+
+    Args:
+        series (pd.Series): Observations, e.g. TSLA closing prices, indexed by date
+        order (tuple): ARIMA (p, d, q) order
+        train_end (str or int): First test date (the notebook's split_date), or the
+            number of training observations
+        horizons (tuple): Forecast horizons in trading days
+        trend (str): ARIMA trend term (statsmodels default if None)
+        verbose (bool): Print timings and the metrics table
+
+    Returns:
+        dict: 'forecasts' and 'actuals' (origin date x horizon DataFrames, NaN where the
+            target lies past the end of the series), 'metrics' (MAE/RMSE/MAPE/N per horizon),
+            'params', 'fit_time' and 'filter_time'
+    """
+    series = series.dropna()
+    if isinstance(train_end, int):
+        n_train = train_end
+    else:
+        n_train = int(np.searchsorted(series.index, _timestamp_like(train_end, series.index)))
+    if not 0 < n_train < len(series):
+        raise ValueError(f"Training span must leave a test span (got {n_train} of {len(series)} observations)")
+
+    # Fit once on the training span
+    start = time.perf_counter()
+    fitted = ARIMA(series.iloc[:n_train], order=order, trend=trend).fit()
+    fit_time = time.perf_counter() - start
+
+    # Filter the full series with the fitted parameters, no re-estimation
+    start = time.perf_counter()
+    filtered = fitted.apply(series)
+    origins = np.arange(n_train - 1, len(series) - 1)
+    forecasts = multi_step_forecasts(filtered, origins, horizons)
+    filter_time = time.perf_counter() - start
+
+    horizons = sorted(horizons)
+    values = series.to_numpy(dtype=np.float64)
+    actuals = np.full(forecasts.shape, np.nan)
+    for column, h in enumerate(horizons):
+        available = origins + h < len(values)
+        actuals[available, column] = values[origins[available] + h]
+
+    columns = [f'h={h}' for h in horizons]
+    index = series.index[origins]
+    forecasts = pd.DataFrame(forecasts, index=index, columns=columns)
+    actuals = pd.DataFrame(actuals, index=index, columns=columns)
+    metrics = pd.DataFrame({column: forecast_metrics(actuals[column], forecasts[column])
+                            for column in columns}).T
+
+    if verbose:
+        print(f"ARIMA{order}: fitted on {n_train} observations in {fit_time:.2f}s, "
+              f"{len(origins)} origins filtered in {filter_time:.2f}s")
+        print(metrics.round(4))
+
+    return {
+        'forecasts': forecasts,
+        'actuals': actuals,
+        'metrics': metrics,
+        'params': fitted.params,
+        'fit_time': fit_time,
+        'filter_time': filter_time
+    }
+
+# Series being searched, set once per worker process (ticker -> pd.Series)
+_search_data = {}
+
+def _init_search_worker(data):
+    _search_data.update(data)
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError
+
+def series_hash(series):
+    """
+    Content hash of a series' dates and values (changes when data is appended or revised)
+    """
+    digest = hashlib.sha1(series.to_numpy(dtype=np.float64).tobytes())
+    digest.update(pd.DatetimeIndex(series.index).asi8.tobytes())
+    return digest.hexdigest()[:16]
+
+def _cache_file(cache_dir, ticker, data_hash, order):
+    name = f"{data_hash}_{'_'.join(str(o) for o in order)}.json"
+    return os.path.join(cache_dir, ticker, name)
+
+def _write_cache(path, record):
+    # Write to a temporary file and swap it in so readers never see a partial entry
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp, 'w') as f:
+        json.dump(record, f)
+    os.replace(temp, path)
+
+def _fit_order(ticker, order, timeout=None):
+    """
+    Fit one ARIMA order in a worker, giving up after timeout seconds (where SIGALRM exists)
+    """
+    record = {'Ticker': ticker, 'Order': list(order), 'AIC': np.nan, 'BIC': np.nan, 'Params': {}}
+    use_alarm = timeout is not None and hasattr(signal, 'SIGALRM')
+    start = time.perf_counter()
+    try:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, _raise_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        fitted = ARIMA(_search_data[ticker], order=order).fit()
+        record.update({'AIC': fitted.aic, 'BIC': fitted.bic, 'Params': fitted.params.to_dict(),
+                       'Status': 'ok'})
+    except TimeoutError:
+        record['Status'] = 'timeout'
+    except Exception as e:
+        record['Status'] = f"error: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    record['Fit Time (s)'] = time.perf_counter() - start
+    return record
+
+def search_arima_orders(series, orders=None, p_values=range(4), d_values=(0, 1), q_values=range(4),
+                        criterion='aic', timeout=60, max_workers=None, cache_dir='outputs/arima_cache'):
+    """
+    Fit candidate ARIMA orders for one or many series in a process pool and rank them
+
+    Fitted AIC, BIC and parameters are cached on disk under cache_dir, keyed by ticker,
+    a hash of the series and the order, so a rerun only fits the orders of series whose
+    data changed. Fits that time out are not cached and are retried on the next run.
+
+    Args:
+        series (pd.Series, dict or pd.DataFrame): One series (named by its name), a dict
+            of ticker -> series, or a DataFrame with one column per ticker
+        orders (list): Candidate (p, d, q) orders (default every combination of
+            p_values x d_values x q_values)
+        p_values, d_values, q_values: Candidate AR, differencing and MA orders
+        criterion (str): 'aic' or 'bic', the ranking criterion
+        timeout (float): Seconds allowed per fit (None = no limit)
+        max_workers (int): Worker processes (default os.cpu_count())
+        cache_dir (str): Fit cache folder (None = no cache)
+
+    Returns:
+        pd.DataFrame: One row per ticker and order - Rank within the ticker, Order, AIC,
+            BIC, Params, Status, Fit Time and Cached - sorted by ticker and criterion
+    """
+    if criterion not in ('aic', 'bic'):
+        raise ValueError(f"Unknown criterion: {criterion}")
+    if isinstance(series, pd.DataFrame):
+        data = {ticker: series[ticker] for ticker in series.columns}
+    elif isinstance(series, pd.Series):
+        data = {series.name or 'series': series}
+    else:
+        data = dict(series)
+    data = {ticker: values.dropna() for ticker, values in data.items()}
+    orders = [tuple(o) for o in orders] if orders is not None else list(itertools.product(p_values, d_values, q_values))
+
+    # Cached fits first; everything else goes to the pool
+    records, tasks = [], []
+    for ticker, values in data.items():
+        data_hash = series_hash(values)
+        for order in orders:
+            path = _cache_file(cache_dir, ticker, data_hash, order) if cache_dir else None
+            if path and os.path.exists(path):
+                with open(path) as f:
+                    record = json.load(f)
+                record['Cached'] = True
+                records.append(record)
+            else:
+                tasks.append((ticker, order, path))
+
+    print(f"ARIMA order search: {len(data)} series x {len(orders)} orders, "
+          f"{len(records)} cached, {len(tasks)} to fit")
+    if tasks:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_search_worker,
+                                 initargs=(data,)) as executor:
+            futures = {executor.submit(_fit_order, ticker, order, timeout): path
+                       for ticker, order, path in tasks}
+            for future in as_completed(futures):
+                record = future.result()
+                path = futures[future]
+                if path and record['Status'] != 'timeout':
+                    _write_cache(path, record)
+                record['Cached'] = False
+                records.append(record)
+
+    results = pd.DataFrame(records)
+    results['Order'] = results['Order'].map(tuple)
+    results = results.sort_values(['Ticker', criterion.upper()], na_position='last', kind='stable')
+    results.insert(1, 'Rank', results.groupby('Ticker').cumcount() + 1)
+    return results.reset_index(drop=True)
@@ -0,0 +1,339 @@
+"""
+LSTM inference in NumPy
+Runs the Task 2 LSTM (stacked Keras LSTM layers, dropout, dense output) from weights
+exported to a plain .npz file, without importing TensorFlow.
+
+Every sequence of a batch is run through each layer together: the input projection
+x W + b of a whole window is one matrix product and only the recurrent h U term is
+stepped in time. Multi-step forecasts are recursive like the notebook's loop (each
+prediction is appended to the window and the window rerun), but for all tickers at
+once, and the first layer's input projections are computed once per new value rather
+than once per window.
+
+Forecast summaries are written to outputs/forecast_results.json, which the forecast
+analysis, visualization and portfolio optimization scripts read instead of
+hard-coded numbers.
+"""
+
+import os
+import json
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from config import DATA_CONFIG, PATHS, ASSET_INFO
+from price_store import load_prices
+from price_simulation import forecast_scenario
+import warnings
+warnings.filterwarnings('ignore')
+
+FORECAST_RESULTS_FILE = os.path.join(PATHS['output_folder'], 'forecast_results.json')
+
+def _sigmoid(x):
+    # 0.5 * (tanh(x / 2) + 1), several times faster than scipy's expit on float32
+    out = np.multiply(x, 0.5)
+    np.tanh(out, out=out)
+    out += 1
+    out *= 0.5
+    return out
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+}
+
+def export_keras_weights(model, path, scaler=None, seq_length=60, ticker=None):
+    """
+    Save the weights of a trained Keras Sequential LSTM model to a .npz file
+
+    Args:
+        model: Keras model of LSTM, Dropout and Dense layers (as in the Task 2 notebook)
+        path (str): Output .npz file
+        scaler: Fitted MinMaxScaler of the training prices (stored for inference)
+        seq_length (int): Input window length the model was trained on
+        ticker (str): Ticker the scaler was fitted on
+    """
+    arrays, layers = {}, []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == 'Dropout':
+            continue  # inactive at inference
+        if kind not in ('LSTM', 'Dense'):
+            raise ValueError(f"Unsupported layer type: {kind}")
+        config = layer.get_config()
+        weights = layer.get_weights()
+        index = len(layers)
+        if kind == 'LSTM':
+            arrays[f'layer{index}_kernel'], arrays[f'layer{index}_recurrent'], arrays[f'layer{index}_bias'] = weights
+            layers.append(['lstm', config.get('activation', 'tanh'), config.get('recurrent_activation', 'sigmoid'),
+                           str(config.get('return_sequences', False))])
+        else:
+            arrays[f'layer{index}_kernel'], arrays[f'layer{index}_bias'] = weights
+            layers.append(['dense', config.get('activation', 'linear'), '', ''])
+
+    arrays['layers'] = np.array(layers)
+    arrays['seq_length'] = np.array(seq_length)
+    if scaler is not None:
+        arrays['scaler_min'] = np.asarray(scaler.data_min_, dtype=np.float64)
+        arrays['scaler_max'] = np.asarray(scaler.data_max_, dtype=np.float64)
+    if ticker is not None:
+        arrays['ticker'] = np.array(ticker)
+    np.savez(path, **arrays)
+
+class NumpyLSTM:
+    """
+    Forward pass of an exported Keras LSTM model
+    """
+
+    def __init__(self, layers, seq_length=60, scaler_range=None, ticker=None, dtype=np.float32):
+        """
+        Args:
+            layers (list): (kind, weights dict, activations) per layer
+            seq_length (int): Input window length
+            scaler_range (tuple): (data_min, data_max) of the training prices
+            ticker (str): Ticker the scaler was fitted on
+            dtype: Floating type of the computation
+        """
+        self.layers = layers
+        self.seq_length = seq_length
+        self.scaler_range = scaler_range
+        self.ticker = ticker
+        self.dtype = dtype
+
+    @classmethod
+    def load(cls, path, dtype=np.float32):
+        """
+        Load a model saved by export_keras_weights
+        """
+        with np.load(path) as data:
+            layers = []
+            for index, (kind, activation, recurrent_activation, return_sequences) in enumerate(data['layers']):
+                weights = {name: data[f'layer{index}_{name}'].astype(dtype)
+                           for name in ('kernel', 'recurrent', 'bias') if f'layer{index}_{name}' in data}
+                layers.append((str(kind), weights, {
+                    'activation': str(activation),
+                    'recurrent_activation': str(recurrent_activation),
+                    'return_sequences': return_sequences == 'True'
+                }))
+            scaler_range = (data['scaler_min'], data['scaler_max']) if 'scaler_min' in data else None
+            ticker = str(data['ticker']) if 'ticker' in data else None
+            return cls(layers, int(data['seq_length']), scaler_range, ticker, dtype)
+
+    @staticmethod
+    def _lstm(projected, weights, options):
+        """
+        LSTM layer over input projections (batch x time x 4 units), Keras gate order i, f, c, o
+        """
+        recurrent = weights['recurrent']
+        units = recurrent.shape[0]
+        activation = ACTIVATIONS[options['activation']]
+        gate = ACTIVATIONS[options['recurrent_activation']]
+        batch, steps, _ = projected.shape
+        h = np.zeros((batch, units), dtype=projected.dtype)
+        c = np.zeros((batch, units), dtype=projected.dtype)
+        outputs = np.empty((batch, steps, units), dtype=projected.dtype) if options['return_sequences'] else None
+        for t in range(steps):
+            z = projected[:, t] + h @ recurrent
+            candidate = activation(z[:, 2 * units:3 * units])
+            gates = gate(z)  # the candidate slice of this is unused
+            c *= gates[:, units:2 * units]
+            c += gates[:, :units] * candidate
+            h = gates[:, 3 * units:] * activation(c)
+            if outputs is not None:
+                outputs[:, t] = h
+        return outputs if outputs is not None else h
+
+    def _forward(self, x, first_projection=None):
+        for index, (kind, weights, options) in enumerate(self.layers):
+            if kind == 'lstm':
+                projected = first_projection if index == 0 and first_projection is not None \
+                    else x @ weights['kernel'] + weights['bias']
+                x = self._lstm(projected, weights, options)
+            else:
+                x = ACTIVATIONS[options['activation']](x @ weights['kernel'] + weights['bias'])
+        return x
+
+    def predict(self, X):
+        """
+        Model output for a batch of scaled windows
+
+        Args:
+            X (np.ndarray): batch x seq_length x features
+
+        Returns:
+            np.ndarray: batch x outputs
+        """
+        return self._forward(np.asarray(X, dtype=self.dtype))
+
+    def forecast(self, windows, n_steps=126):
+        """
+        Recursive multi-step forecast for a batch of univariate scaled windows
+
+        Args:
+            windows (np.ndarray): batch x seq_length (x 1) scaled recent values
+            n_steps (int): Steps to forecast
+
+        Returns:
+            np.ndarray: batch x n_steps scaled forecasts
+        """
+        windows = np.asarray(windows, dtype=self.dtype).reshape(len(windows), -1)
+        batch, length = windows.shape
+        kind, weights, _ = self.layers[0]
+        if kind != 'lstm' or weights['kernel'].shape[0] != 1:
+            raise ValueError("Recursive forecasts need a model with one input feature")
+
+        # Input projections of the history plus every forecast, filled in as they arrive
+        projections = np.empty((batch, length + n_steps, weights['kernel'].shape[1]), dtype=self.dtype)
+        projections[:, :length] = windows[:, :, None] * weights['kernel'][0] + weights['bias']
+        forecasts = np.empty((batch, n_steps), dtype=self.dtype)
+        for step in range(n_steps):
+            prediction = self._forward(None, projections[:, step:step + length])[:, 0]
+            forecasts[:, step] = prediction
+            projections[:, length + step] = prediction[:, None] * weights['kernel'][0] + weights['bias']
+        return forecasts
+
+def forecast_prices(model, prices, n_steps=126, scaler_ranges=None):
+    """
+    Recursive price forecasts for several tickers in one batch
+
+    Args:
+        model (NumpyLSTM): Loaded model
+        prices (dict or pd.DataFrame): Price history per ticker (at least seq_length days)
+        n_steps (int): Trading days to forecast (126 is about 6 months)
+        scaler_ranges (dict): (data_min, data_max) per ticker; defaults to the model's
+            stored scaler for the ticker it was trained on and the ticker's full price
+            range otherwise
+
+    Returns:
+        pd.DataFrame: Business-day dates after the last observation x tickers
+    """
+    prices = {ticker: series.dropna() for ticker, series in dict(prices).items()}
+    tickers = list(prices)
+    scaler_ranges = dict(scaler_ranges or {})
+    lows, highs, windows = [], [], []
+    for ticker in tickers:
+        series = prices[ticker]
+        if ticker in scaler_ranges:
+            low, high = scaler_ranges[ticker]
+        elif ticker == model.ticker and model.scaler_range is not None:
+            low, high = (float(np.ravel(v)[0]) for v in model.scaler_range)
+        else:
+            low, high = series.min(), series.max()
+        lows.append(low)
+        highs.append(high)
+        windows.append((series.to_numpy()[-model.seq_length:] - low) / (high - low))
+
+    lows, highs = np.array(lows)[:, None], np.array(highs)[:, None]
+    forecasts = model.forecast(np.array(windows), n_steps) * (highs - lows) + lows
+
+    last_date = max(prices[ticker].index[-1] for ticker in tickers)
+    dates = pd.bdate_range(start=last_date + pd.Timedelta(days=1), periods=n_steps)
+    return pd.DataFrame(forecasts.T, index=dates, columns=tickers)
+
+def save_forecast_results(forecasts, current_prices, path=FORECAST_RESULTS_FILE, daily_volatility=0.03,
+                          confidence=0.90):
+    """
+    Write a forecast summary per ticker in the FORECAST_DEFAULTS format of forcast_analysis
+
+    The forecast range is the confidence band at the horizon of simulated paths whose
+    median ends at the forecast price (price_simulation.forecast_scenario), not the
+    extremes of the single forecast path.
+
+    Args:
+        forecasts (pd.DataFrame): Forecast paths, dates x tickers
+        current_prices (dict or pd.Series): Last observed price per ticker
+        path (str): Output JSON file
+        daily_volatility (float or dict): Daily return volatility, or one per ticker
+        confidence (float): Two-sided confidence level of the forecast range
+    """
+    results = {}
+    for ticker in forecasts.columns:
+        path_values = forecasts[ticker].to_numpy(dtype=np.float64)
+        current = float(current_prices[ticker])
+        volatility = daily_volatility[ticker] if isinstance(daily_volatility, dict) else daily_volatility
+        scenario = forecast_scenario(current, path_values[-1], n_days=len(path_values),
+                                     daily_volatility=volatility, confidence=confidence)
+        results[ticker] = {
+            'current_price': current,
+            'forecast_6m_price': path_values[-1],
+            'forecast_range_low': scenario['low'],
+            'forecast_range_high': scenario['high'],
+            'forecast_range_confidence': confidence,
+            'expected_return_6m': path_values[-1] / current - 1,
+            'forecast_period': f"{len(path_values)} trading days",
+            'forecast_path': {str(date.date()): value for date, value in zip(forecasts.index, path_values)}
+        }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, default=float)
+    print(f"Forecast results for {len(results)} tickers saved to {path}")
+
+def load_forecast_results(ticker='TSLA', default=None, path=FORECAST_RESULTS_FILE):
+    """
+    Forecast summary of one ticker written by save_forecast_results
+
+    Args:
+        ticker (str): Ticker to read
+        default (dict): Returned when the file or the ticker is missing
+        path (str): Forecast results JSON file
+
+    Returns:
+        dict: current_price, forecast_6m_price, forecast_range_low/high (simulated
+            band at forecast_range_confidence), expected_return_6m, forecast_period
+            and forecast_path
+    """
+    if not os.path.exists(path):
+        return default
+    result = _read_forecast_file(os.path.abspath(path), os.path.getmtime(path)).get(ticker)
+    return dict(result) if result is not None else default
+
+def forecast_returns_6m(tickers=None, path=FORECAST_RESULTS_FILE):
+    """
+    6-month expected returns of the forecast assets
+
+    Args:
+        tickers (list): Universe (default DATA_CONFIG['tickers']); the assets with a
+            forecast_return_6m in ASSET_INFO are the forecast assets
+        path (str): Forecast results JSON file
+
+    Returns:
+        dict: Ticker -> latest saved forecast return, or the ASSET_INFO fallback
+    """
+    return {
+        ticker: load_forecast_results(ticker, {'expected_return_6m': ASSET_INFO[ticker]['forecast_return_6m']},
+                                      path)['expected_return_6m']
+        for ticker in (tickers or DATA_CONFIG['tickers']) if 'forecast_return_6m' in ASSET_INFO.get(ticker, {})
+    }
+
+@lru_cache(maxsize=8)
+def _read_forecast_file(path, modified):
+    # Parsed once per version of the file: a new run changes its modification time
+    with open(path) as f:
+        return json.load(f)
+
+def run_forecasts(weights_path=os.path.join(PATHS['output_folder'], 'lstm_weights.npz'), tickers=None,
+                  n_steps=126, folder='data'):
+    """
+    Forecast every ticker from its stored prices and save the summary for the analysis scripts
+
+    Args:
+        weights_path (str): .npz file written by export_keras_weights
+        tickers (list): Tickers to forecast (default DATA_CONFIG['tickers'])
+        n_steps (int): Trading days to forecast
+        folder (str): Price store data folder
+
+    Returns:
+        pd.DataFrame: Forecast paths, dates x tickers
+    """
+    model = NumpyLSTM.load(weights_path)
+    prices = {ticker: load_prices(ticker, folder, columns=['Close'])['Close']
+              for ticker in (tickers or DATA_CONFIG['tickers'])}
+    forecasts = forecast_prices(model, prices, n_steps)
+    save_forecast_results(forecasts, {ticker: series.dropna().iloc[-1] for ticker, series in prices.items()},
+                          daily_volatility={ticker: series.dropna().pct_change().std()
+                                            for ticker, series in prices.items()})
+    return forecasts
+
+if __name__ == "__main__":
+    run_forecasts()
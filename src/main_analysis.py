@@ -1,6 +1,11 @@
 """
 Main analysis script for Portfolio Management Task 1
 This script orchestrates the complete analysis workflow
+
+The workflow is a pipeline of cached stages (load -> clean -> features -> stationarity,
+risk, outliers, returns -> correlation and summary): a rerun only recomputes the stages whose
+input data, code or configuration changed, and the independent analysis stages run
+concurrently. The report is then printed from the stage outputs.
 """
 
 import os
@@ -11,13 +16,170 @@ import warnings
 warnings.filterwarnings('ignore')
 
 # Import our custom modules
-from config import DATA_CONFIG, ASSET_INFO, ANALYSIS_CONFIG
+from config import DATA_CONFIG, ANALYSIS_CONFIG, get_asset_info
 from utils import *
-from data_loading import load_all_assets, save_data
+from data_loading import load_all_assets, save_data, refresh_assets, compute_derived_columns, DERIVED_COLUMNS
+from price_store import has_ticker, load_assets
+from pipeline import Pipeline
+from stationarity import stationarity_tests
+from returns_panel import ReturnsPanel
+from covariance import pairwise_correlation
+
+def load_stage():
+    """
+    Load the price data (stored, incrementally refreshed or freshly fetched)
+    """
+    refresh_mode = DATA_CONFIG.get('refresh_mode', 'cached')
+    tickers = DATA_CONFIG['tickers']
+    stored = all(has_ticker(ticker) or os.path.exists(f'data/{ticker}_data.csv') for ticker in tickers)
+    
+    # Check if data already exists
+    if refresh_mode == 'incremental' and stored:
+        print("Refreshing existing data with new trading days...")
+        refresh_assets(tickers, start_date=DATA_CONFIG['start_date'],
+                       window=ANALYSIS_CONFIG['rolling_window'])
+        assets = load_assets(tickers)
+    elif refresh_mode != 'full' and stored:
+        print(f"Loading existing data for {len(tickers)} tickers...")
+        assets = load_assets(tickers)
+    else:
+        print("Fetching fresh data...")
+        assets = load_all_assets()
+        if assets:
+            save_data(assets)
+    
+    if not assets:
+        raise RuntimeError("Failed to load data")
+    return assets
 
-def main():
+def clean_stage(assets):
+    """
+    Fill missing values; derived columns from an incremental refresh are set aside as-is
+    
+    Returns:
+        dict: 'data' (cleaned frames), 'derived' (stored derived columns or None) and
+            'missing' ((before, after) per ticker)
+    """
+    cleaned, stored, missing = {}, {}, {}
+    for ticker, data in assets.items():
+        if set(DERIVED_COLUMNS).issubset(data.columns):
+            stored[ticker] = data[DERIVED_COLUMNS]
+            data = data.drop(columns=DERIVED_COLUMNS)
+        else:
+            stored[ticker] = None
+        
+        # Handle missing values
+        missing_before = data.isnull().sum().sum()
+        cleaned[ticker] = data.fillna(method='ffill').fillna(method='bfill')
+        missing[ticker] = (missing_before, cleaned[ticker].isnull().sum().sum())
+    
+    return {'data': cleaned, 'derived': stored, 'missing': missing}
+
+def features_stage(assets, cleaned):
+    """
+    Cleaned data plus the derived columns (returns, rolling volatility, moving average)
+    """
+    featured = {}
+    for ticker, data in cleaned['data'].items():
+        derived = cleaned['derived'][ticker]
+        if derived is None:
+            derived = compute_derived_columns(assets[ticker]['Close'], ANALYSIS_CONFIG['rolling_window'])
+        data = data.copy()
+        data[DERIVED_COLUMNS] = derived
+        featured[ticker] = data
+    return featured
+
+def stationarity_stage(assets):
+    """
+    ADF tests of prices and returns per ticker, run as one batch
+    """
+    series = {}
+    for ticker, data in assets.items():
+        series[f"{ticker} Prices"] = data['Close']
+        series[f"{ticker} Returns"] = data['Daily_Return']
+    results = stationarity_tests(series)
+
+    def test(title):
+        row = results.loc[title]
+        return {
+            'title': title,
+            'adf_statistic': row['ADF Statistic'],
+            'p_value': row['ADF P-Value'],
+            'critical_values': {level: row[f'Critical {level}'] for level in ('1%', '5%', '10%')},
+            'is_stationary': bool(row['ADF Stationary'])
+        }
+
+    return {
+        ticker: {'prices': test(f"{ticker} Prices"), 'returns': test(f"{ticker} Returns")}
+        for ticker in assets
+    }
+
+def risk_stage(assets):
+    """
+    Annualized return, volatility, Sharpe ratio, VaR, CVaR and max drawdown per ticker
+    """
+    risk_metrics = {}
+    for ticker, data in assets.items():
+        returns = data['Daily_Return'].dropna()
+        risk_metrics[ticker] = {
+            'annual_return': annualize_metrics(returns.mean(), 'return'),
+            'annual_volatility': annualize_metrics(returns.std(), 'volatility'),
+            'sharpe_ratio': annualize_metrics(calculate_sharpe_ratio(returns), 'sharpe'),
+            'var_5': calculate_var(returns, 0.05),
+            'var_1': calculate_var(returns, 0.01),
+            'cvar_5': calculate_cvar(returns, 0.05),
+            'max_drawdown': calculate_max_drawdown(data['Close'])
+        }
+    return risk_metrics
+
+def outliers_stage(assets):
+    """
+    Daily returns beyond 3 standard deviations per ticker
+    """
+    return {ticker: detect_outliers(data['Daily_Return'].dropna(), threshold=3)
+            for ticker, data in assets.items()}
+
+def returns_stage(assets):
+    """
+    Daily returns of every ticker aligned once into a shared panel
+    """
+    return ReturnsPanel.from_assets(assets, policy='pairwise')
+
+def correlation_stage(panel):
+    """
+    Correlation matrix of daily returns, each pair over all the dates both have a return
+    """
+    return pairwise_correlation(panel)
+
+def build_pipeline(cache_dir=None, max_workers=4):
+    """
+    The Task 1 workflow as a pipeline of cached stages
+    
+    Args:
+        cache_dir (str): Stage cache folder (default the Pipeline default)
+        max_workers (int): Stages run at the same time
+    
+    Returns:
+        Pipeline: Stages load, clean, features, stationarity, risk, outliers,
+            returns, correlation and summary
+    """
+    pipeline = Pipeline(max_workers=max_workers) if cache_dir is None else Pipeline(cache_dir, max_workers)
+    pipeline.add('load', load_stage, config={'data': DATA_CONFIG, 'analysis': ANALYSIS_CONFIG}, volatile=True)
+    pipeline.add('clean', clean_stage, inputs=['load'])
+    pipeline.add('features', features_stage, inputs=['load', 'clean'], config=ANALYSIS_CONFIG)
+    for name, func in (('stationarity', stationarity_stage), ('risk', risk_stage),
+                       ('outliers', outliers_stage), ('returns', returns_stage),
+                       ('summary', create_summary_table)):
+        pipeline.add(name, func, inputs=['features'], config=ANALYSIS_CONFIG)
+    pipeline.add('correlation', correlation_stage, inputs=['returns'])
+    return pipeline
+
+def main(force=()):
     """
     Main function to run the complete Task 1 analysis
+    
+    Args:
+        force (list): Pipeline stages to recompute even if cached
     """
     print("="*60)
     print("PORTFOLIO MANAGEMENT ANALYSIS - TASK 1")
@@ -28,40 +190,25 @@ def main():
     print("\n1. DATA LOADING")
     print("-" * 30)
     
-    # Check if data already exists
-    if os.path.exists('data/TSLA_data.csv'):
-        print("Loading existing data...")
-        tsla = pd.read_csv('data/TSLA_data.csv', index_col=0, parse_dates=True)
-        bnd = pd.read_csv('data/BND_data.csv', index_col=0, parse_dates=True)
-        spy = pd.read_csv('data/SPY_data.csv', index_col=0, parse_dates=True)
-        assets = {'TSLA': tsla, 'BND': bnd, 'SPY': spy}
-    else:
-        print("Fetching fresh data...")
-        assets = load_all_assets()
-        if assets:
-            save_data(assets)
-    
-    if not assets:
-        print("Failed to load data. Exiting...")
+    pipeline = build_pipeline()
+    try:
+        outputs = pipeline.run(force=force)
+    except RuntimeError as e:
+        print(f"{e}. Exiting...")
         return
     
+    status = pipeline.status
+    ran = [name for name in pipeline.stages if status.get(name) == 'ran']
+    cached = [name for name in pipeline.stages if status.get(name) == 'cached']
+    print(f"Pipeline: ran {', '.join(ran) or 'nothing'}; cached {', '.join(cached) or 'nothing'}")
+    
+    assets = outputs['features']
+    
     # Step 2: Data Cleaning and Preprocessing
     print("\n2. DATA CLEANING AND PREPROCESSING")
     print("-" * 40)
     
-    for ticker, data in assets.items():
-        # Handle missing values
-        missing_before = data.isnull().sum().sum()
-        assets[ticker] = data.fillna(method='ffill').fillna(method='bfill')
-        missing_after = assets[ticker].isnull().sum().sum()
-        
-        # Calculate additional features
-        assets[ticker]['Daily_Return'] = calculate_returns(data['Close'])
-        assets[ticker]['Volatility_20'] = calculate_rolling_volatility(
-            assets[ticker]['Daily_Return'], ANALYSIS_CONFIG['rolling_window']
-        )
-        assets[ticker]['MA_20'] = data['Close'].rolling(ANALYSIS_CONFIG['rolling_window']).mean()
-        
+    for ticker, (missing_before, missing_after) in outputs['clean']['missing'].items():
         print(f"{ticker}: Missing values {missing_before} → {missing_after}")
     
     # Step 3: Exploratory Data Analysis
@@ -72,7 +219,7 @@ def main():
     print("\nBasic Statistics:")
     for ticker, data in assets.items():
         returns = data['Daily_Return'].dropna()
-        print(f"\n{ticker} ({ASSET_INFO[ticker]['description']}):")
+        print(f"\n{ticker} ({get_asset_info(ticker)['description']}):")
         print(f"  Period: {data.index.min().date()} to {data.index.max().date()}")
         print(f"  Total records: {len(data)}")
         print(f"  Average daily return: {returns.mean()*100:.3f}%")
@@ -84,47 +231,21 @@ def main():
     print("\n4. STATIONARITY ANALYSIS")
     print("-" * 30)
     
-    stationarity_results = {}
-    for ticker, data in assets.items():
+    stationarity_results = outputs['stationarity']
+    for ticker, tests in stationarity_results.items():
         print(f"\n{ticker} Stationarity Tests:")
-        
-        # Test prices
-        price_test = perform_adf_test(data['Close'], f"{ticker} Prices")
-        print(f"  Prices: {'Stationary' if price_test['is_stationary'] else 'Non-Stationary'}")
-        print(f"    ADF Statistic: {price_test['adf_statistic']:.4f}")
-        print(f"    P-value: {price_test['p_value']:.6f}")
-        
-        # Test returns
-        returns_test = perform_adf_test(data['Daily_Return'].dropna(), f"{ticker} Returns")
-        print(f"  Returns: {'Stationary' if returns_test['is_stationary'] else 'Non-Stationary'}")
-        print(f"    ADF Statistic: {returns_test['adf_statistic']:.4f}")
-        print(f"    P-value: {returns_test['p_value']:.6f}")
-        
-        stationarity_results[ticker] = {
-            'prices': price_test,
-            'returns': returns_test
-        }
+        for label, key in (('Prices', 'prices'), ('Returns', 'returns')):
+            test = tests[key]
+            print(f"  {label}: {'Stationary' if test['is_stationary'] else 'Non-Stationary'}")
+            print(f"    ADF Statistic: {test['adf_statistic']:.4f}")
+            print(f"    P-value: {test['p_value']:.6f}")
     
     # Step 5: Risk Metrics Calculation
     print("\n5. RISK METRICS CALCULATION")
     print("-" * 35)
     
-    risk_metrics = {}
-    for ticker, data in assets.items():
-        returns = data['Daily_Return'].dropna()
-        
-        metrics = {
-            'annual_return': annualize_metrics(returns.mean(), 'return'),
-            'annual_volatility': annualize_metrics(returns.std(), 'volatility'),
-            'sharpe_ratio': annualize_metrics(calculate_sharpe_ratio(returns), 'sharpe'),
-            'var_5': calculate_var(returns, 0.05),
-            'var_1': calculate_var(returns, 0.01),
-            'cvar_5': calculate_cvar(returns, 0.05),
-            'max_drawdown': calculate_max_drawdown(data['Close'])
-        }
-        
-        risk_metrics[ticker] = metrics
-        
+    risk_metrics = outputs['risk']
+    for ticker, metrics in risk_metrics.items():
         print(f"\n{ticker} Risk Metrics:")
         print(f"  Annual Return: {metrics['annual_return']*100:.2f}%")
         print(f"  Annual Volatility: {metrics['annual_volatility']*100:.2f}%")
@@ -137,10 +258,7 @@ def main():
     print("\n6. OUTLIER ANALYSIS")
     print("-" * 25)
     
-    for ticker, data in assets.items():
-        returns = data['Daily_Return'].dropna()
-        outliers = detect_outliers(returns, threshold=3)
-        
+    for ticker, outliers in outputs['outliers'].items():
         print(f"\n{ticker} Outliers (>3σ):")
         print(f"  Total outliers: {len(outliers)}")
         
@@ -155,12 +273,7 @@ def main():
     print("\n7. CORRELATION ANALYSIS")
     print("-" * 30)
     
-    # Create returns dataframe
-    returns_df = pd.DataFrame({
-        ticker: data['Daily_Return'] for ticker, data in assets.items()
-    }).dropna()
-    
-    correlation_matrix = returns_df.corr()
+    correlation_matrix = outputs['correlation']
     print("\nCorrelation Matrix:")
     print(correlation_matrix.round(3))
     
@@ -168,7 +281,7 @@ def main():
     print("\n8. COMPREHENSIVE SUMMARY")
     print("-" * 30)
     
-    summary_table = create_summary_table(assets)
+    summary_table = outputs['summary']
     print("\nComplete Risk-Return Profile:")
     print(summary_table)
     
@@ -177,26 +290,22 @@ def main():
     print("-" * 30)
     
     print("\nAsset Characteristics:")
-    print(f"• TSLA: {ASSET_INFO['TSLA']['description']}")
-    print(f"  - Highest return potential: {risk_metrics['TSLA']['annual_return']*100:.1f}% annual")
-    print(f"  - Highest volatility: {risk_metrics['TSLA']['annual_volatility']*100:.1f}% annual")
-    print(f"  - Moderate risk-adjusted return: {risk_metrics['TSLA']['sharpe_ratio']:.2f} Sharpe")
-    
-    print(f"\n• BND: {ASSET_INFO['BND']['description']}")
-    print(f"  - Stable returns: {risk_metrics['BND']['annual_return']*100:.1f}% annual")
-    print(f"  - Lowest risk: {risk_metrics['BND']['annual_volatility']*100:.1f}% volatility")
-    print(f"  - Good for diversification")
-    
-    print(f"\n• SPY: {ASSET_INFO['SPY']['description']}")
-    print(f"  - Market-level returns: {risk_metrics['SPY']['annual_return']*100:.1f}% annual")
-    print(f"  - Moderate risk: {risk_metrics['SPY']['annual_volatility']*100:.1f}% volatility")
-    print(f"  - Solid risk-adjusted return: {risk_metrics['SPY']['sharpe_ratio']:.2f} Sharpe")
+    metrics_df = pd.DataFrame(risk_metrics).T
+    for ticker in metrics_df['sharpe_ratio'].sort_values(ascending=False).index[:10]:
+        metrics = risk_metrics[ticker]
+        print(f"• {ticker}: {get_asset_info(ticker)['description']}")
+        print(f"  - Return: {metrics['annual_return']*100:.1f}% annual")
+        print(f"  - Volatility: {metrics['annual_volatility']*100:.1f}% annual")
+        print(f"  - Risk-adjusted return: {metrics['sharpe_ratio']:.2f} Sharpe")
+    if len(metrics_df) > 10:
+        print(f"  ... {len(metrics_df) - 10} more assets in task1_summary_results.csv (top 10 by Sharpe shown)")
     
     print("\nPortfolio Construction Implications:")
-    print("• TSLA can boost portfolio returns but increases overall risk")
-    print("• BND provides stability and helps reduce portfolio volatility")  
-    print("• SPY offers broad market exposure with balanced risk-return")
-    print("• Combining all three allows for risk-return optimization")
+    print(f"• {metrics_df['annual_return'].idxmax()} has the highest return potential but "
+          f"{metrics_df['annual_volatility'].idxmax()} adds the most risk")
+    print(f"• {metrics_df['annual_volatility'].idxmin()} provides stability and helps reduce portfolio volatility")
+    print(f"• {metrics_df['sharpe_ratio'].idxmax()} offers the best risk-adjusted return")
+    print(f"• Combining all {len(metrics_df)} assets allows for risk-return optimization")
     
     # Step 10: Save Results
     print("\n10. SAVING RESULTS")
@@ -0,0 +1,257 @@
+"""
+Cached stage pipeline
+Runs a workflow as a dependency graph of named stages. Each stage's output is
+pickled to disk together with a key made of the stage's code (its own source and that
+of every module in its folder it uses, directly or through other such modules), its
+declared config values and the content hashes of its inputs; a stage whose key is unchanged is not
+run again and its cached output is only read from disk when a later stage or the
+caller needs it. Stages whose inputs are ready run concurrently on a thread pool.
+
+Because keys use the content hash of the inputs rather than the fact that an input
+stage ran, a stage that re-runs but produces the same output leaves everything
+downstream cached.
+
+Example:
+    pipeline = Pipeline()
+    pipeline.add('load', load_prices_stage, volatile=True)
+    pipeline.add('risk', risk_stage, inputs=['load'], config=ANALYSIS_CONFIG)
+    outputs = pipeline.run()
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import inspect
+import sys
+import types
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import PATHS
+import warnings
+warnings.filterwarnings('ignore')
+
+def content_hash(obj):
+    """
+    SHA-1 of an object's pickle (DataFrames, arrays, dicts of them, ...)
+    """
+    return hashlib.sha1(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+def _code_names(code):
+    # Global and imported names used by a code object and the functions nested in it
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+def _local_module(obj, folder):
+    if obj is None:
+        return None
+    module = obj if inspect.ismodule(obj) else inspect.getmodule(obj)
+    path = getattr(module, '__file__', None)
+    if path and os.path.dirname(os.path.abspath(path)) == folder:
+        return module
+    return None
+
+def _code_names_of_module(module):
+    # Names used anywhere in a module's functions (catches imports inside functions)
+    names = set()
+    for obj in vars(module).values():
+        if inspect.isfunction(obj) and obj.__module__ == module.__name__:
+            names |= _code_names(obj.__code__)
+        elif inspect.isclass(obj) and obj.__module__ == module.__name__:
+            for member in vars(obj).values():
+                member = getattr(member, '__func__', member)
+                if inspect.isfunction(member):
+                    names |= _code_names(member.__code__)
+    return names
+
+def _dependencies(func):
+    """
+    Modules in func's folder that func uses, directly or through each other
+    """
+    module = inspect.getmodule(func)
+    if getattr(module, '__file__', None) is None:
+        return []
+    folder = os.path.dirname(os.path.abspath(module.__file__))
+    namespace = getattr(func, '__globals__', vars(module))
+    code = getattr(func, '__code__', None)
+    names = _code_names(code) if code is not None else set()
+    # Names imported inside functions are not globals, but are in sys.modules once run
+    pending = [namespace.get(name, sys.modules.get(name)) for name in names]
+    found = {}
+    while pending:
+        dependency = _local_module(pending.pop(), folder)
+        if dependency is not None and dependency.__name__ not in found:
+            found[dependency.__name__] = dependency
+            pending.extend(vars(dependency).values())
+            pending.extend(sys.modules.get(name) for name in _code_names_of_module(dependency))
+    return [found[name] for name in sorted(found)]
+
+def _code_hash(func):
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = getattr(func, '__qualname__', repr(func))
+    digest = hashlib.sha1(source.encode())
+    # Editing a helper the stage calls (in any local module) must change the key too
+    for module in _dependencies(func):
+        with open(module.__file__, 'rb') as f:
+            digest.update(module.__name__.encode() + f.read())
+    return digest.hexdigest()
+
+class Stage:
+    """
+    One named step of a pipeline: func(*outputs of inputs) -> output
+    """
+
+    def __init__(self, name, func, inputs=(), config=None, volatile=False):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.config = config
+        self.volatile = volatile
+
+    def key(self, input_hashes):
+        parts = {
+            'code': _code_hash(self.func),
+            'config': self.config,
+            'inputs': [input_hashes[name] for name in self.inputs]
+        }
+        return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+class Pipeline:
+    """
+    Dependency graph of cached stages
+    """
+
+    def __init__(self, cache_dir=os.path.join(PATHS['output_folder'], 'pipeline_cache'), max_workers=4):
+        """
+        Args:
+            cache_dir (str): Folder for stage outputs (None = no caching)
+            max_workers (int): Stages run at the same time
+        """
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.stages = {}
+        self.status = {}
+
+    def add(self, name, func, inputs=(), config=None, volatile=False):
+        """
+        Register a stage
+
+        Args:
+            name (str): Stage name
+            func (callable): Called with the outputs of inputs, in order
+            inputs (list): Names of the stages whose outputs func takes
+            config (dict): Settings the stage depends on; a change re-runs it
+            volatile (bool): Always run (e.g. loading external data); later stages
+                still only re-run if its output changed
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self.stages[name] = Stage(name, func, inputs, config, volatile)
+
+    def stage(self, name, inputs=(), config=None, volatile=False):
+        """
+        Decorator form of add
+        """
+        def register(func):
+            self.add(name, func, inputs, config, volatile)
+            return func
+        return register
+
+    def _required(self, targets):
+        # Targets plus everything they depend on
+        required, pending = set(), list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage: {name}")
+            if name not in required:
+                required.add(name)
+                pending.extend(self.stages[name].inputs)
+        return required
+
+    def _paths(self, name):
+        base = os.path.join(self.cache_dir, name)
+        return base + '.json', base + '.pkl'
+
+    def _read_meta(self, name):
+        if self.cache_dir is None:
+            return None
+        meta_path, _ = self._paths(name)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f)
+
+    def _write(self, name, key, output_hash, output):
+        # Output first, then metadata, each swapped in atomically
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path, output_path = self._paths(name)
+        for path, write in ((output_path, lambda f: pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)),
+                            (meta_path, lambda f: f.write(json.dumps({'key': key, 'hash': output_hash}).encode()))):
+            temp = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(temp, 'wb') as f:
+                write(f)
+            os.replace(temp, path)
+
+    def _load(self, name, outputs):
+        if name not in outputs:
+            with open(self._paths(name)[1], 'rb') as f:
+                outputs[name] = pickle.load(f)
+        return outputs[name]
+
+    def run(self, targets=None, force=()):
+        """
+        Run the stages needed for targets, reusing cached outputs where the key matches
+
+        Args:
+            targets (list): Stages whose outputs are wanted (default all)
+            force (list): Stages to run even if cached
+
+        Returns:
+            dict: Output of every target stage
+        """
+        targets = list(targets or self.stages)
+        required = self._required(targets)
+        hashes, keys, outputs, self.status = {}, {}, {}, {}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(hashes) < len(required):
+                # Resolve cache hits and submit runnable stages until nothing new is ready
+                ready = True
+                while ready:
+                    ready = [name for name in required
+                             if name not in hashes and name not in running.values()
+                             and all(dep in hashes for dep in self.stages[name].inputs)]
+                    for name in ready:
+                        stage = self.stages[name]
+                        key = keys[name] = stage.key(hashes)
+                        meta = self._read_meta(name)
+                        if not stage.volatile and name not in force and meta is not None and meta['key'] == key:
+                            hashes[name] = meta['hash']
+                            self.status[name] = 'cached'
+                        else:
+                            args = [self._load(dep, outputs) for dep in stage.inputs]
+                            running[executor.submit(stage.func, *args)] = name
+
+                if not running:
+                    if len(hashes) < len(required):
+                        raise ValueError("Pipeline has a dependency cycle")
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    output = future.result()
+                    outputs[name] = output
+                    hashes[name] = content_hash(output)
+                    self.status[name] = 'ran'
+                    if self.cache_dir is not None:
+                        self._write(name, keys[name], hashes[name], output)
+
+        return {name: self._load(name, outputs) for name in targets}
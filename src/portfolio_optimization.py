@@ -2,16 +2,21 @@
 Task 4: Portfolio Optimization Using LSTM Forecast
 """
 
+import time
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.optimize import minimize
+from config import DATA_CONFIG
+from price_store import load_assets
+from portfolio_risk import monte_carlo_var
+from lstm_inference import forecast_returns_6m
+from returns_panel import ReturnsPanel
+from covariance import (returns_matrix, estimate_covariance, correlation_from_covariance,
+                        FactorCovariance)
 import warnings
 warnings.filterwarnings('ignore')
 
-# Your LSTM forecast results
-TSLA_FORECAST_RETURN = -0.356  # -35.6% over 6 months
-
 def load_and_prepare_data():
     """
     Load historical data and prepare inputs for optimization
@@ -20,12 +25,9 @@ def load_and_prepare_data():
     
     try:
         # Load historical data
-        tsla = pd.read_csv('data/TSLA_data.csv', index_col=0, parse_dates=True)
-        bnd = pd.read_csv('data/BND_data.csv', index_col=0, parse_dates=True)
-        spy = pd.read_csv('data/SPY_data.csv', index_col=0, parse_dates=True)
+        assets_data = load_assets(DATA_CONFIG['tickers'])
         
         # Calculate returns if not present
-        assets_data = {'TSLA': tsla, 'BND': bnd, 'SPY': spy}
         for name, data in assets_data.items():
             if 'Daily_Return' not in data.columns:
                 data['Daily_Return'] = data['Close'].pct_change()
@@ -40,59 +42,84 @@ def load_and_prepare_data():
 def calculate_expected_returns(assets_data):
     """
     Calculate expected returns for portfolio optimization
-    TSLA: Use LSTM forecast
-    BND & SPY: Use historical averages
+    Forecast assets (lstm_inference.forecast_returns_6m): Use LSTM forecast
+    Every other asset: Use historical averages
     """
+    forecasts = forecast_returns_6m()
     print("\n=== CALCULATING EXPECTED RETURNS ===")
     
     expected_returns = {}
-    
-    # TSLA: Use your LSTM forecast (annualized)
-    tsla_annual = TSLA_FORECAST_RETURN * 2  # Convert 6-month to annual (rough)
-    expected_returns['TSLA'] = tsla_annual
-    print(f"TSLA: {tsla_annual*100:.2f}% (from LSTM forecast)")
-    
-    # BND and SPY: Historical averages
-    for ticker in ['BND', 'SPY']:
-        daily_returns = assets_data[ticker]['Daily_Return'].dropna()
-        annual_return = daily_returns.mean() * 252
-        expected_returns[ticker] = annual_return
-        print(f"{ticker}: {annual_return*100:.2f}% (historical average)")
+    verbose = len(assets_data) <= 20
+    
+    for ticker, data in assets_data.items():
+        if ticker in forecasts:
+            # Your LSTM forecast (annualized)
+            expected_returns[ticker] = forecasts[ticker] * 2  # Convert 6-month to annual (rough)
+            source = 'from LSTM forecast'
+        else:
+            # Historical average
+            expected_returns[ticker] = data['Daily_Return'].dropna().mean() * 252
+            source = 'historical average'
+        if verbose or ticker in forecasts:
+            print(f"{ticker}: {expected_returns[ticker]*100:.2f}% ({source})")
+    if not verbose:
+        print(f"... and {len(assets_data) - len(forecasts)} assets at their historical average")
     
     return pd.Series(expected_returns)
 
-def calculate_covariance_matrix(assets_data):
+def calculate_covariance_matrix(assets_data, tickers=None, method='pairwise', **kwargs):
     """
     Calculate covariance matrix from historical returns
+    
+    Args:
+        assets_data (dict or ReturnsPanel): Asset dataframes, or their already aligned returns
+        tickers (list): Tickers to include (default all loaded assets)
+        method (str): 'pairwise' (each pair over the dates both have returns, PSD-repaired),
+            'sample', 'ledoit_wolf', 'ewma' or 'factor' (see covariance.py)
+        **kwargs: Estimator options, e.g. decay or n_factors
+    
+    Returns:
+        pd.DataFrame or FactorCovariance: Annualized covariance matrix
     """
     print("\n=== CALCULATING COVARIANCE MATRIX ===")
     
     # Combine daily returns
-    returns_df = pd.DataFrame({
-        'TSLA': assets_data['TSLA']['Daily_Return'],
-        'BND': assets_data['BND']['Daily_Return'],
-        'SPY': assets_data['SPY']['Daily_Return']
-    }).dropna()
+    # Only the pairwise estimator can use dates on which some tickers have no return
+    returns_df = returns_matrix(assets_data, tickers, dropna=method != 'pairwise')
     
     # Annualized covariance matrix
-    cov_matrix = returns_df.cov() * 252
+    cov_matrix = estimate_covariance(returns_df, method, **kwargs)
     
     print("Correlation Matrix:")
-    print(returns_df.corr().round(3))
+    print(correlation_from_covariance(cov_matrix).round(3))
     
     return cov_matrix
 
+def _as_covariance(cov_matrix):
+    """
+    Dense float array for a covariance matrix, leaving factor-form matrices compact
+    """
+    if isinstance(cov_matrix, FactorCovariance):
+        return cov_matrix
+    return np.asarray(cov_matrix, dtype=np.float64)
+
 def portfolio_metrics(weights, expected_returns, cov_matrix):
     """
     Calculate portfolio return and risk
     """
     portfolio_return = np.sum(expected_returns * weights)
-    portfolio_risk = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
+    portfolio_risk = np.sqrt(weights.T @ (cov_matrix @ weights))
     return portfolio_return, portfolio_risk
 
 def negative_sharpe_ratio(weights, expected_returns, cov_matrix, risk_free_rate=0.03):
     """
     Calculate negative Sharpe ratio for minimization
+    
+    Args:
+        weights (np.ndarray): Portfolio weights
+        expected_returns (np.ndarray): Expected annual returns
+        cov_matrix (np.ndarray): Annualized covariance matrix
+        risk_free_rate (float): Annual risk-free rate
     """
     port_return, port_risk = portfolio_metrics(weights, expected_returns, cov_matrix)
     if port_risk == 0:
@@ -100,89 +127,320 @@ def negative_sharpe_ratio(weights, expected_returns, cov_matrix, risk_free_rate=
     sharpe = (port_return - risk_free_rate) / port_risk
     return -sharpe
 
+def negative_sharpe_ratio_gradient(weights, expected_returns, cov_matrix, risk_free_rate=0.03):
+    """
+    Gradient of negative_sharpe_ratio: -(mu / risk - (return - rf) * C w / risk^3)
+    """
+    cov_weights = cov_matrix @ weights
+    port_risk = np.sqrt(weights @ cov_weights)
+    if port_risk == 0:
+        return np.zeros_like(weights)
+    excess = expected_returns @ weights - risk_free_rate
+    return -(expected_returns / port_risk - excess * cov_weights / port_risk**3)
+
 def minimize_variance(weights, expected_returns, cov_matrix):
     """
-    Minimize portfolio variance
+    Minimize portfolio variance (the objective is the volatility, which has the same minimizer)
+    
+    Args:
+        weights (np.ndarray): Portfolio weights
+        expected_returns (np.ndarray): Expected annual returns (unused)
+        cov_matrix (np.ndarray): Annualized covariance matrix
     """
     _, port_risk = portfolio_metrics(weights, expected_returns, cov_matrix)
     return port_risk
 
-def optimize_portfolios(expected_returns, cov_matrix):
+def minimize_variance_gradient(weights, expected_returns, cov_matrix):
+    """
+    Gradient of minimize_variance: C w / risk
+    """
+    cov_weights = cov_matrix @ weights
+    port_risk = np.sqrt(weights @ cov_weights)
+    if port_risk == 0:
+        return np.zeros_like(weights)
+    return cov_weights / port_risk
+
+def budget_constraint(n_assets):
+    """
+    Fully invested constraint sum(w) = 1 with its constant Jacobian
+    """
+    ones = np.ones(n_assets)
+    return {'type': 'eq', 'fun': lambda x: np.sum(x) - 1, 'jac': lambda x: ones}
+
+def return_target_constraint(expected_returns, target):
+    """
+    Target return constraint mu'w = target with its constant Jacobian (mu)
+    
+    Args:
+        expected_returns (np.ndarray): Expected annual returns
+        target (float or np.ndarray): Target return; a one-element array can be updated
+            in place between solves without rebuilding the constraint
+    """
+    return {'type': 'eq', 'fun': lambda x: expected_returns @ x - np.sum(target),
+            'jac': lambda x: expected_returns}
+
+def optimize_portfolios(expected_returns, cov_matrix, use_gradients=True, initial_guess=None, verbose=True):
     """
     Find optimal portfolios using different objectives
+    
+    Args:
+        expected_returns (pd.Series): Expected annual returns
+        cov_matrix (pd.DataFrame): Annualized covariance matrix
+        use_gradients (bool): Pass analytic gradients to SLSQP instead of finite differences
+        initial_guess (array or tuple): Starting weights (default equal weights), or a
+            (max Sharpe, min variance) pair, e.g. the previous solutions for a warm start
+        verbose (bool): Print progress
     """
-    print("\n=== OPTIMIZING PORTFOLIOS ===")
+    if verbose:
+        print("\n=== OPTIMIZING PORTFOLIOS ===")
     
-    n_assets = len(expected_returns)
+    mu = np.asarray(expected_returns, dtype=np.float64)
+    cov = _as_covariance(cov_matrix)
+    n_assets = len(mu)
     
     # Constraints and bounds
-    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
+    constraints = (budget_constraint(n_assets),)
     bounds = tuple((0, 1) for _ in range(n_assets))
-    initial_guess = np.array([1/n_assets] * n_assets)
+    if initial_guess is None:
+        initial_guess = np.array([1/n_assets] * n_assets)
+    if isinstance(initial_guess, tuple):
+        sharpe_guess, min_var_guess = initial_guess
+    else:
+        sharpe_guess = min_var_guess = initial_guess
     
     # 1. Maximum Sharpe Ratio Portfolio
-    print("Optimizing for Maximum Sharpe Ratio...")
+    if verbose:
+        print("Optimizing for Maximum Sharpe Ratio...")
     max_sharpe_result = minimize(
-        negative_sharpe_ratio, initial_guess,
-        args=(expected_returns, cov_matrix),
+        negative_sharpe_ratio, sharpe_guess,
+        args=(mu, cov),
+        jac=negative_sharpe_ratio_gradient if use_gradients else None,
         method='SLSQP', bounds=bounds, constraints=constraints
     )
     max_sharpe_weights = max_sharpe_result.x
     
     # 2. Minimum Variance Portfolio
-    print("Optimizing for Minimum Variance...")
+    if verbose:
+        print("Optimizing for Minimum Variance...")
     min_var_result = minimize(
-        minimize_variance, initial_guess,
-        args=(expected_returns, cov_matrix),
+        minimize_variance, min_var_guess,
+        args=(mu, cov),
+        jac=minimize_variance_gradient if use_gradients else None,
         method='SLSQP', bounds=bounds, constraints=constraints
     )
     min_var_weights = min_var_result.x
     
     return max_sharpe_weights, min_var_weights
 
-def generate_efficient_frontier(expected_returns, cov_matrix, num_portfolios=100):
+def critical_line(expected_returns, cov_matrix, max_iter=None):
     """
-    Generate efficient frontier
+    Trace the long-only, fully invested mean-variance frontier with the critical line algorithm
+    
+    Solves min 1/2 w'Cw - lam * mu'w subject to sum(w) = 1, w >= 0 for every lam from
+    +inf down to 0 in one pass. Between consecutive turning points the optimal weights
+    are linear in lam (and in the portfolio return), so the turning points describe the
+    whole frontier from the maximum return portfolio to the minimum variance portfolio.
+    
+    Args:
+        expected_returns (array-like): Expected annual returns
+        cov_matrix (array-like): Annualized covariance matrix (positive definite)
+        max_iter (int): Maximum number of turning points (default 10 * number of assets)
+    
+    Returns:
+        tuple: (lambdas, weights) - turning point lambdas (descending, last one 0) and
+            a (turning points x assets) weight array
     """
-    print("Generating Efficient Frontier...")
+    mu = np.asarray(expected_returns, dtype=np.float64)
+    cov = np.asarray(cov_matrix, dtype=np.float64)
+    n_assets = len(mu)
+    max_iter = max_iter or 10 * n_assets
+    tol = 1e-12 * max(1.0, np.abs(mu).max())
+    
+    # Start from the maximum return portfolio: the top asset(s) are free, the rest sit at 0
+    free = np.zeros(n_assets, dtype=bool)
+    free[mu >= mu.max() - tol] = True
+    lam = np.inf
+    lambdas, weights = [], []
+    
+    for _ in range(max_iter):
+        # KKT system on the free assets: C_FF w_F - gamma = lam * mu_F, sum(w_F) = 1
+        # solved for both right-hand sides so that (w_F, gamma) = a + lam * b
+        F = np.flatnonzero(free)
+        B = np.flatnonzero(~free)
+        kkt = np.zeros((len(F) + 1, len(F) + 1))
+        kkt[:-1, :-1] = cov[np.ix_(F, F)]
+        kkt[:-1, -1] = -1
+        kkt[-1, :-1] = 1
+        rhs = np.zeros((len(F) + 1, 2))
+        rhs[-1, 0] = 1
+        rhs[:-1, 1] = mu[F]
+        (a, b) = np.linalg.solve(kkt, rhs).T
+        
+        # Next event as lam decreases: a free weight reaching 0, or the KKT multiplier
+        # g_i = (C w)_i - lam * mu_i - gamma of an asset at 0 reaching 0 (it becomes free)
+        candidates = []
+        leaving = b[:-1] > tol
+        if leaving.any():
+            hit = -a[:-1][leaving] / b[:-1][leaving]
+            candidates.append((hit, F[leaving]))
+        if len(B):
+            cross = cov[np.ix_(B, F)] @ np.column_stack([a[:-1], b[:-1]])
+            p = cross[:, 0] - a[-1]
+            q = cross[:, 1] - mu[B] - b[-1]
+            entering = q > tol
+            if entering.any():
+                candidates.append((-p[entering] / q[entering], B[entering]))
+        
+        next_lam, asset = 0.0, None
+        for hit, assets in candidates:
+            valid = hit < lam * (1 - 1e-12) if np.isfinite(lam) else np.isfinite(hit)
+            if valid.any():
+                k = np.argmax(np.where(valid, hit, -np.inf))
+                if hit[k] > next_lam:
+                    next_lam, asset = hit[k], assets[k]
+        
+        w = np.zeros(n_assets)
+        w[F] = np.maximum(a[:-1] + next_lam * b[:-1], 0)
+        lambdas.append(next_lam)
+        weights.append(w / w.sum())
+        
+        if asset is None:
+            break
+        free[asset] = not free[asset]
+        lam = next_lam
     
-    n_assets = len(expected_returns)
-    results = []
+    return np.array(lambdas), np.array(weights)
+
+def _frontier_cla(expected_returns, cov_matrix, target_returns):
+    """
+    Minimum variance weights for each target return, interpolated between critical line turning points
+    """
+    mu = np.asarray(expected_returns, dtype=np.float64)
+    
+    # Efficient branch (max return -> min variance) and, tracing -mu, the inefficient
+    # branch (min return -> min variance); together they cover every feasible target
+    _, upper = critical_line(mu, cov_matrix)
+    _, lower = critical_line(-mu, cov_matrix)
+    turning = np.vstack([lower, upper[::-1]])
+    turning_returns = turning @ mu
+    
+    order = np.argsort(turning_returns, kind='stable')
+    turning, turning_returns = turning[order], turning_returns[order]
+    segment = np.clip(np.searchsorted(turning_returns, target_returns, side='right') - 1,
+                      0, len(turning) - 2)
+    
+    lo, hi = turning_returns[segment], turning_returns[segment + 1]
+    width = hi - lo
+    t = np.divide(target_returns - lo, width, out=np.zeros_like(width), where=width > 0)
+    t = np.clip(t, 0, 1)[:, None]
+    return (1 - t) * turning[segment] + t * turning[segment + 1], len(upper) + len(lower)
+
+def _frontier_slsqp(expected_returns, cov_matrix, target_returns):
+    """
+    Minimum variance weights for each target return with SLSQP, warm-started from the previous target
+    """
+    mu = np.asarray(expected_returns, dtype=np.float64)
+    cov = _as_covariance(cov_matrix)
+    n_assets = len(mu)
     
-    # Define target returns range
-    min_ret = expected_returns.min()
-    max_ret = expected_returns.max()
-    target_returns = np.linspace(min_ret, max_ret, num_portfolios)
+    # Constraints are built once; the return target is updated in place between solves
+    target = np.zeros(1)
+    constraints = [budget_constraint(n_assets), return_target_constraint(mu, target)]
+    bounds = tuple((0, 1) for _ in range(n_assets))
+    initial_guess = np.array([1/n_assets] * n_assets)
     
+    weights, rows = [], []
     for target_ret in target_returns:
-        # Constraints for target return
-        constraints = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-            {'type': 'eq', 'fun': lambda x, target=target_ret: np.sum(expected_returns * x) - target}
-        ]
-        bounds = tuple((0, 1) for _ in range(n_assets))
-        initial_guess = np.array([1/n_assets] * n_assets)
-        
+        target[0] = target_ret
+        start = time.perf_counter()
         try:
             result = minimize(
                 minimize_variance, initial_guess,
-                args=(expected_returns, cov_matrix),
+                args=(mu, cov), jac=minimize_variance_gradient,
                 method='SLSQP', bounds=bounds, constraints=constraints
             )
-            
-            if result.success:
-                weights = result.x
-                port_return, port_risk = portfolio_metrics(weights, expected_returns, cov_matrix)
-                results.append([port_return, port_risk, weights])
-        except:
-            continue
+            status, message, nit = result.status, result.message, result.nit
+        except (ValueError, np.linalg.LinAlgError) as e:
+            result, status, message, nit = None, -1, str(e), 0
+        elapsed = time.perf_counter() - start
+        
+        if result is not None and result.success:
+            weights.append(result.x)
+            initial_guess = result.x
+        else:
+            weights.append(None)
+        rows.append({'Status': status, 'Message': message, 'Iterations': nit, 'Time (s)': elapsed})
+    
+    return weights, rows
+
+def generate_efficient_frontier(expected_returns, cov_matrix, num_portfolios=100, method='cla',
+                                return_diagnostics=False):
+    """
+    Generate efficient frontier
+    
+    Args:
+        expected_returns (pd.Series): Expected annual returns
+        cov_matrix (pd.DataFrame): Annualized covariance matrix
+        num_portfolios (int): Number of target returns between the lowest and highest asset return
+        method (str): 'cla' traces the whole long-only frontier with the critical line
+            algorithm in one pass; 'slsqp' solves each target with SLSQP, warm-started
+            from the previous solution
+        return_diagnostics (bool): Also return per-point solver status and timing
+    
+    Returns:
+        list: [return, risk, weights] for every solved target (failed targets are left out)
+        pd.DataFrame: Per-point diagnostics (only if return_diagnostics) - Target Return,
+            Status (0 = success), Message, Iterations and Time (s)
+    """
+    print("Generating Efficient Frontier...")
+    
+    mu = np.asarray(expected_returns, dtype=np.float64)
+    cov = _as_covariance(cov_matrix)
+    
+    # Define target returns range
+    min_ret = mu.min()
+    max_ret = mu.max()
+    target_returns = np.linspace(min_ret, max_ret, num_portfolios)
     
+    start = time.perf_counter()
+    if method == 'cla':
+        weight_array, n_turning = _frontier_cla(mu, np.asarray(cov), target_returns)
+        elapsed = time.perf_counter() - start
+        weights = list(weight_array)
+        rows = [{'Status': 0, 'Message': 'Critical line interpolation', 'Iterations': n_turning,
+                 'Time (s)': elapsed / num_portfolios} for _ in range(num_portfolios)]
+    elif method == 'slsqp':
+        weights, rows = _frontier_slsqp(mu, cov, target_returns)
+        elapsed = time.perf_counter() - start
+    else:
+        raise ValueError(f"Unknown frontier method: {method}")
+    
+    # Returns and risks for all solved points at once
+    solved = [i for i, w in enumerate(weights) if w is not None]
+    W = np.array([weights[i] for i in solved]).reshape(len(solved), len(mu))
+    port_returns = W @ mu
+    if isinstance(cov, FactorCovariance):
+        port_variances = cov.quad_form(W)
+    else:
+        port_variances = np.einsum('ij,jk,ik->i', W, cov, W)
+    port_risks = np.sqrt(np.maximum(port_variances, 0))
+    results = [[port_returns[k], port_risks[k], W[k]] for k in range(len(solved))]
+    
+    diagnostics = pd.DataFrame(rows)
+    diagnostics.insert(0, 'Target Return', target_returns)
+    failed = len(target_returns) - len(solved)
+    print(f"✓ {len(solved)} frontier points in {elapsed:.3f}s ({method})"
+          + (f", {failed} failed" if failed else ""))
+    
+    if return_diagnostics:
+        return results, diagnostics
     return results
 
 def plot_efficient_frontier(efficient_frontier, max_sharpe_weights, min_var_weights, expected_returns, cov_matrix):
     """
     Plot the efficient frontier with optimal portfolios
     """
+    forecasts = forecast_returns_6m()
     print("\n=== CREATING EFFICIENT FRONTIER PLOT ===")
     
     if not efficient_frontier:
@@ -210,15 +468,16 @@ def plot_efficient_frontier(efficient_frontier, max_sharpe_weights, min_var_weig
                label='Min Variance', zorder=3)
     
     # Plot individual assets
+    asset_variances = _as_covariance(cov_matrix).diagonal()
     for i, asset in enumerate(expected_returns.index):
         asset_return = expected_returns[asset]
-        asset_risk = np.sqrt(cov_matrix.iloc[i, i])
-        plt.scatter(asset_risk, asset_return, marker='o', s=100, alpha=0.7, 
-                   label=f'{asset}')
+        asset_risk = np.sqrt(asset_variances[i])
+        plt.scatter(asset_risk, asset_return, marker='o', s=100 if len(expected_returns) <= 20 else 10, alpha=0.7, 
+                   label=f'{asset}' if len(expected_returns) <= 20 else None)
     
     plt.xlabel('Annual Risk (Standard Deviation)', fontsize=12)
     plt.ylabel('Annual Expected Return', fontsize=12)
-    plt.title('Efficient Frontier with LSTM Forecast for TSLA', fontsize=16, fontweight='bold')
+    plt.title(f"Efficient Frontier with LSTM Forecast for {', '.join(forecasts) or 'no assets'}", fontsize=16, fontweight='bold')
     plt.legend()
     plt.grid(True, alpha=0.3)
     
@@ -227,6 +486,21 @@ def plot_efficient_frontier(efficient_frontier, max_sharpe_weights, min_var_weig
     plt.show()
     print("Efficient frontier saved as 'efficient_frontier.png'")
 
+def _print_allocations(assets, weights, max_listed=20):
+    """
+    Print asset allocations; for large universes only the held assets, largest first
+    """
+    weights = np.asarray(weights)
+    print("Asset Allocations:")
+    if len(assets) <= max_listed:
+        for i, asset in enumerate(assets):
+            print(f"  {asset}: {weights[i]*100:.1f}%")
+        return
+    held = np.flatnonzero(weights >= 5e-4)
+    for i in held[np.argsort(-weights[held])][:max_listed]:
+        print(f"  {assets[i]}: {weights[i]*100:.1f}%")
+    print(f"  ({len(held)} of {len(assets)} assets held)")
+
 def display_portfolio_results(max_sharpe_weights, min_var_weights, expected_returns, cov_matrix):
     """
     Display detailed results for optimal portfolios
@@ -244,9 +518,7 @@ def display_portfolio_results(max_sharpe_weights, min_var_weights, expected_retu
     max_sharpe_return, max_sharpe_risk = portfolio_metrics(max_sharpe_weights, expected_returns, cov_matrix)
     max_sharpe_sharpe = (max_sharpe_return - 0.03) / max_sharpe_risk
     
-    print("Asset Allocations:")
-    for i, asset in enumerate(assets):
-        print(f"  {asset}: {max_sharpe_weights[i]*100:.1f}%")
+    _print_allocations(assets, max_sharpe_weights)
     
     print(f"\nPortfolio Metrics:")
     print(f"  Expected Annual Return: {max_sharpe_return*100:.2f}%")
@@ -260,9 +532,7 @@ def display_portfolio_results(max_sharpe_weights, min_var_weights, expected_retu
     min_var_return, min_var_risk = portfolio_metrics(min_var_weights, expected_returns, cov_matrix)
     min_var_sharpe = (min_var_return - 0.03) / min_var_risk
     
-    print("Asset Allocations:")
-    for i, asset in enumerate(assets):
-        print(f"  {asset}: {min_var_weights[i]*100:.1f}%")
+    _print_allocations(assets, min_var_weights)
     
     print(f"\nPortfolio Metrics:")
     print(f"  Expected Annual Return: {min_var_return*100:.2f}%")
@@ -307,9 +577,10 @@ def main():
     """
     Main portfolio optimization workflow
     """
+    forecasts = forecast_returns_6m()
     print("="*60)
     print("TASK 4: PORTFOLIO OPTIMIZATION")
-    print("Using LSTM Forecast for TSLA")
+    print(f"Using LSTM Forecast for {', '.join(forecasts) or 'no assets'}")
     print("="*60)
     
     # Step 1: Load data
@@ -321,7 +592,8 @@ def main():
     expected_returns = calculate_expected_returns(assets_data)
     
     # Step 3: Calculate covariance matrix
-    cov_matrix = calculate_covariance_matrix(assets_data)
+    returns_panel = ReturnsPanel.from_assets(assets_data, policy='pairwise')  # aligned once, shared read-only
+    cov_matrix = calculate_covariance_matrix(returns_panel)
     
     # Step 4: Optimize portfolios
     max_sharpe_weights, min_var_weights = optimize_portfolios(expected_returns, cov_matrix)
@@ -335,16 +607,28 @@ def main():
     # Step 7: Display results
     display_portfolio_results(max_sharpe_weights, min_var_weights, expected_returns, cov_matrix)
     
-    # Step 8: Save results
+    # Step 8: Monte Carlo risk of the optimized portfolios
+    n_scenarios = 1000000
+    risk = monte_carlo_var({'Max Sharpe Ratio': max_sharpe_weights, 'Min Variance': min_var_weights},
+                           expected_returns, cov_matrix, n_scenarios=n_scenarios, horizon=21)
+    print(f"\nMonte Carlo 1-month risk ({len(expected_returns)} assets, {n_scenarios:,} scenarios):")
+    print((risk * 100).round(2).to_string())
+    
+    # Step 9: Save results
     save_optimization_results(max_sharpe_weights, min_var_weights, expected_returns, cov_matrix)
     
     print(f"\n" + "="*60)
     print("PORTFOLIO OPTIMIZATION COMPLETED!")
     print("="*60)
     print("\nKey Findings:")
-    print("• TSLA's negative forecast significantly impacts optimal allocation")
-    print("• Portfolio optimization favors defensive assets (BND)")
-    print("• Maximum Sharpe ratio portfolio likely has minimal TSLA exposure")
+    for ticker, forecast in forecasts.items():
+        position = expected_returns.index.get_loc(ticker)
+        print(f"• {ticker}'s {'negative' if forecast < 0 else 'positive'} forecast gives it a "
+              f"{max_sharpe_weights[position]*100:.1f}% maximum Sharpe ratio allocation")
+    print(f"• Minimum variance portfolio is led by {expected_returns.index[np.argmax(min_var_weights)]} "
+          f"({np.max(min_var_weights)*100:.1f}%)")
+    print(f"• Maximum Sharpe ratio portfolio is led by {expected_returns.index[np.argmax(max_sharpe_weights)]} "
+          f"({np.max(max_sharpe_weights)*100:.1f}%)")
     print("• Results demonstrate impact of forecasting on portfolio construction")
 
 if __name__ == "__main__":
@@ -7,33 +7,30 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+from config import DATA_CONFIG
+from price_store import load_assets
+from lstm_inference import forecast_returns_6m
+from returns_panel import ReturnsPanel
+from covariance import (returns_matrix, estimate_covariance, correlation_from_covariance,
+                        FactorCovariance)
 import warnings
 warnings.filterwarnings('ignore')
 
-# Your LSTM forecast results
-TSLA_FORECAST = {
-    'expected_return_6m': -0.356,  # -35.6% from your LSTM model
-    'current_price': 319.04,
-    'forecast_price': 205.52
-}
-
 def load_historical_data():
     """
-    Load historical data for all three assets
+    Load historical data for every asset of the universe
     """
     print("Loading historical data for portfolio optimization...")
     
     try:
-        tsla = pd.read_csv('data/TSLA_data.csv', index_col=0, parse_dates=True)
-        bnd = pd.read_csv('data/BND_data.csv', index_col=0, parse_dates=True)
-        spy = pd.read_csv('data/SPY_data.csv', index_col=0, parse_dates=True)
+        assets_data = load_assets(DATA_CONFIG['tickers'])
         
         # Calculate returns if not present
-        for name, data in [('TSLA', tsla), ('BND', bnd), ('SPY', spy)]:
+        for name, data in assets_data.items():
             if 'Daily_Return' not in data.columns:
                 data['Daily_Return'] = data['Close'].pct_change()
         
-        return {'TSLA': tsla, 'BND': bnd, 'SPY': spy}
+        return assets_data
     
     except FileNotFoundError:
         print("Error: Data files not found. Please run data_loading.py first.")
@@ -42,47 +39,54 @@ def load_historical_data():
 def calculate_expected_returns(assets_data):
     """
     Calculate expected returns for portfolio optimization
-    Uses LSTM forecast for TSLA and historical averages for BND and SPY
+    Uses LSTM forecasts for the assets of lstm_inference.forecast_returns_6m and historical averages for the rest
     """
+    forecasts = forecast_returns_6m()
     print("\n=== EXPECTED RETURNS CALCULATION ===")
     
     expected_returns = {}
     
-    # TSLA: Use LSTM forecast (convert 6-month to annual)
-    tsla_annual_return = TSLA_FORECAST['expected_return_6m'] * 2  # Rough annualization
-    expected_returns['TSLA'] = tsla_annual_return
-    
-    print(f"TSLA Expected Annual Return: {tsla_annual_return*100:.2f}% (from LSTM forecast)")
-    
-    # BND and SPY: Use historical average returns (annualized)
-    for ticker in ['BND', 'SPY']:
-        returns = assets_data[ticker]['Daily_Return'].dropna()
-        historical_annual = returns.mean() * 252
-        expected_returns[ticker] = historical_annual
+    for ticker, data in assets_data.items():
+        if ticker in forecasts:
+            # Use LSTM forecast (convert 6-month to annual)
+            expected_returns[ticker] = forecasts[ticker] * 2  # Rough annualization
+            source = 'from LSTM forecast'
+        else:
+            # Use historical average returns (annualized)
+            expected_returns[ticker] = data['Daily_Return'].dropna().mean() * 252
+            source = 'historical average'
         
-        print(f"{ticker} Expected Annual Return: {historical_annual*100:.2f}% (historical average)")
+        print(f"{ticker} Expected Annual Return: {expected_returns[ticker]*100:.2f}% ({source})")
     
     return expected_returns
 
-def calculate_covariance_matrix(assets_data):
+def calculate_covariance_matrix(assets_data, tickers=None, method='pairwise', **kwargs):
     """
     Calculate covariance matrix from historical daily returns
+    
+    Args:
+        assets_data (dict or ReturnsPanel): Asset dataframes, or their already aligned returns
+        tickers (list): Tickers to include (default all loaded assets)
+        method (str): 'pairwise' (each pair over the dates both have returns, PSD-repaired),
+            'sample', 'ledoit_wolf', 'ewma' or 'factor' (see covariance.py)
+        **kwargs: Estimator options, e.g. decay or n_factors
+    
+    Returns:
+        tuple: (annualized covariance DataFrame, correlation DataFrame)
     """
     print(f"\n=== COVARIANCE MATRIX CALCULATION ===")
     
     # Combine daily returns
-    returns_df = pd.DataFrame({
-        'TSLA': assets_data['TSLA']['Daily_Return'],
-        'BND': assets_data['BND']['Daily_Return'], 
-        'SPY': assets_data['SPY']['Daily_Return']
-    }).dropna()
+    # Only the pairwise estimator can use dates on which some tickers have no return
+    returns_df = returns_matrix(assets_data, tickers, dropna=method != 'pairwise')
     
-    # Calculate annualized covariance matrix
-    daily_cov = returns_df.cov()
-    annual_cov = daily_cov * 252
+    # Calculate annualized covariance matrix (dense, as it is saved to CSV)
+    annual_cov = estimate_covariance(returns_df, method, **kwargs)
+    if isinstance(annual_cov, FactorCovariance):
+        annual_cov = annual_cov.to_dense()
     
     print("Daily Returns Correlation Matrix:")
-    correlation_matrix = returns_df.corr()
+    correlation_matrix = correlation_from_covariance(annual_cov)
     print(correlation_matrix.round(3))
     
     print(f"\nAnnualized Covariance Matrix:")
@@ -118,19 +122,23 @@ def analyze_forecast_impact():
     """
     Analyze how the LSTM forecast affects portfolio construction
     """
+    forecasts = forecast_returns_6m()
     print(f"\n=== FORECAST IMPACT ANALYSIS ===")
     
     print("LSTM Forecast Impact on Portfolio:")
-    print(f"• TSLA shows negative expected return ({TSLA_FORECAST['expected_return_6m']*100:.1f}%)")
-    print("• This will likely result in low or zero TSLA allocation in optimal portfolio")
-    print("• Portfolio optimization will favor BND and SPY with positive expected returns")
-    print("• Risk-return trade-off will favor defensive positioning")
+    for ticker, forecast in forecasts.items():
+        if forecast < 0:
+            print(f"• {ticker} shows negative expected return ({forecast*100:.1f}%)")
+            print(f"• This will likely result in low or zero {ticker} allocation in optimal portfolio")
+        else:
+            print(f"• {ticker} shows positive expected return ({forecast*100:.1f}%)")
+            print(f"• This will likely raise the {ticker} allocation in optimal portfolio")
+    print("• Assets without a forecast enter at their historical average returns")
+    print("• Risk-return trade-off will favor defensive positioning when forecasts are negative")
     
     print(f"\nExpected Portfolio Implications:")
-    print("• Optimal portfolio will likely be conservative")
-    print("• Higher allocation to BND for stability")
-    print("• Moderate allocation to SPY for growth")
-    print("• Minimal allocation to TSLA due to negative forecast")
+    print("• Negative forecasts push allocation toward low-volatility assets")
+    print("• Historical-return assets provide the diversification of the optimal portfolio")
     
     print(f"\nStrategic Considerations:")
     print("• Forecast represents one scenario - consider sensitivity analysis")
@@ -142,6 +150,7 @@ def save_optimization_inputs(expected_returns, covariance_matrix):
     """
     Save inputs for portfolio optimization
     """
+    forecasts = forecast_returns_6m()
     print(f"\n=== SAVING OPTIMIZATION INPUTS ===")
     
     # Save expected returns
@@ -154,13 +163,9 @@ def save_optimization_inputs(expected_returns, covariance_matrix):
     print("Covariance matrix saved to covariance_matrix.csv")
     
     # Create summary for Task 4
-    summary = {
-        'TSLA_forecast_return': TSLA_FORECAST['expected_return_6m'],
-        'TSLA_annual_return': expected_returns['TSLA'],
-        'BND_annual_return': expected_returns['BND'],
-        'SPY_annual_return': expected_returns['SPY'],
-        'data_prepared_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    }
+    summary = {f'{ticker}_forecast_return': forecast for ticker, forecast in forecasts.items()}
+    summary.update({f'{ticker}_annual_return': value for ticker, value in expected_returns.items()})
+    summary['data_prepared_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
     summary_df = pd.DataFrame.from_dict(summary, orient='index', columns=['Value'])
     summary_df.to_csv('task4_inputs_summary.csv')
@@ -248,9 +253,10 @@ def main():
     """
     Main function to prepare for Task 4 portfolio optimization
     """
+    forecasts = forecast_returns_6m()
     print("="*60)
     print("TASK 4 PREPARATION: PORTFOLIO OPTIMIZATION SETUP")
-    print("Using LSTM Forecast Results for TSLA")
+    print(f"Using LSTM Forecast Results for {', '.join(forecasts) or 'no assets'}")
     print("="*60)
     
     # Load data
@@ -262,7 +268,8 @@ def main():
     expected_returns = calculate_expected_returns(assets_data)
     
     # Calculate covariance matrix
-    covariance_matrix, correlation_matrix = calculate_covariance_matrix(assets_data)
+    returns_panel = ReturnsPanel.from_assets(assets_data, policy='pairwise')  # aligned once, shared read-only
+    covariance_matrix, correlation_matrix = calculate_covariance_matrix(returns_panel)
     
     # Summarize inputs
     portfolio_inputs_summary(expected_returns, covariance_matrix)
@@ -284,7 +291,7 @@ def main():
     print("2. Run task4_optimization_template.py for basic optimization")
     print("3. Implement efficient frontier analysis")
     print("4. Consider different risk tolerance levels")
-    print("5. Analyze the impact of the negative TSLA forecast")
+    print("5. Analyze the impact of the LSTM forecasts")
 
 if __name__ == "__main__":
     main()
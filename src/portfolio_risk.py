@@ -0,0 +1,255 @@
+"""
+Monte Carlo portfolio risk
+Value at Risk and Conditional Value at Risk of whole portfolios from correlated return
+scenarios drawn from a covariance matrix (Cholesky root, or the low-rank plus diagonal
+root of a covariance.FactorCovariance).
+
+Asset returns are r = mu + A z for a root A of the covariance (A A' = C), so the returns
+of M portfolios are W r = W mu + (W A) z: the weights are folded into the root once and
+every batch of scenarios is a single M x R times R x batch product. Scenarios are
+generated in batches and only the worst tail of each portfolio is kept: exactly (the k
+worst scenarios) while that fits in max_tail_values, otherwise as a fixed-size histogram
+of the tail, so memory is bounded whatever the number of scenarios.
+"""
+
+import numpy as np
+import pandas as pd
+from covariance import FactorCovariance
+import warnings
+warnings.filterwarnings('ignore')
+
+def _weight_matrix(weights, assets):
+    """
+    Weights as an M x N array plus portfolio names
+    """
+    if isinstance(weights, pd.DataFrame):
+        names, rows = list(weights.index), [row for _, row in weights.iterrows()]
+    elif isinstance(weights, dict) and not all(np.isscalar(w) for w in weights.values()):
+        names, rows = list(weights), list(weights.values())
+    elif isinstance(weights, (dict, pd.Series)) or np.ndim(weights) == 1:
+        names, rows = ['Portfolio'], [weights]
+    else:
+        matrix = np.asarray(weights, dtype=np.float64)
+        return matrix, list(range(len(matrix)))
+
+    matrix = np.array([
+        pd.Series(w, dtype=np.float64).reindex(assets).fillna(0).to_numpy()
+        if isinstance(w, (dict, pd.Series)) else np.asarray(w, dtype=np.float64)
+        for w in rows
+    ])
+    return matrix, names
+
+def _matrix_root(matrix):
+    """
+    A with A A' = matrix: Cholesky factor, or the symmetric root with negative
+    eigenvalues clipped to zero when the matrix is only positive semidefinite
+    """
+    try:
+        return np.linalg.cholesky(matrix)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+def portfolio_shock_loadings(weights, cov_matrix):
+    """
+    Loadings G of the portfolio returns on independent standard normal shocks (G G' = W C W')
+
+    With a FactorCovariance the root is [B L, diag(sqrt(d))] and no N x N matrix is
+    formed. When there are fewer portfolios than shocks, the M x M root of W C W' is
+    used instead, which gives the same joint distribution with fewer draws.
+
+    Args:
+        weights (np.ndarray): M x N weight matrix
+        cov_matrix (np.ndarray or FactorCovariance): Covariance of one period's returns
+
+    Returns:
+        np.ndarray: M x R loadings
+    """
+    if isinstance(cov_matrix, FactorCovariance):
+        factor_root = cov_matrix.loadings @ np.linalg.cholesky(cov_matrix.factor_cov)
+        loadings = np.hstack([weights @ factor_root, weights * np.sqrt(cov_matrix.specific_var)])
+    else:
+        loadings = weights @ _matrix_root(np.asarray(cov_matrix, dtype=np.float64))
+
+    if len(weights) < loadings.shape[1]:
+        loadings = _matrix_root(loadings @ loadings.T)
+    return loadings
+
+class TailBuffer:
+    """
+    The k smallest values seen so far in each of M streams
+    """
+
+    def __init__(self, n_streams, size, dtype=np.float64):
+        self.size = size
+        self.values = np.empty((n_streams, 0), dtype=dtype)
+
+    def update(self, batch):
+        """
+        Merge an M x b batch, keeping the smallest size values per row
+        """
+        merged = np.concatenate([self.values, batch], axis=1)
+        if merged.shape[1] > self.size:
+            merged = np.partition(merged, self.size - 1, axis=1)[:, :self.size]
+        self.values = merged
+
+    def sorted(self):
+        return np.sort(self.values, axis=1)
+
+    def var_cvar(self, k):
+        """
+        k-th smallest value and mean of the k smallest values per stream
+        """
+        worst = self.sorted().astype(np.float64)
+        return worst[:, k - 1], worst[:, :k].mean(axis=1)
+
+class TailHistogram:
+    """
+    Fixed-size summary of the lower tail of each of M streams
+
+    Values between lo and hi are counted in n_bins equal bins together with their sum,
+    values below lo in one underflow bin (count and sum); values above hi are ignored.
+    The k-th smallest value is interpolated within its bin, so it is accurate to one bin
+    width, (hi - lo) / n_bins; the mean of the k smallest values is exact except for the
+    part of that bin, so its error is far smaller.
+    """
+
+    def __init__(self, lo, hi, n_bins=4096):
+        """
+        Args:
+            lo (np.ndarray): Lower edge of the binned range per stream
+            hi (np.ndarray): Upper edge per stream (above every quantile of interest)
+            n_bins (int): Bins per stream
+        """
+        self.lo = np.asarray(lo, dtype=np.float64)
+        self.width = np.maximum((np.asarray(hi, dtype=np.float64) - self.lo) / n_bins, 1e-300)
+        self.n_bins = n_bins
+        n_streams = len(self.lo)
+        self.counts = np.zeros((n_streams, n_bins))
+        self.sums = np.zeros((n_streams, n_bins))
+        self.under_count = np.zeros(n_streams)
+        self.under_sum = np.zeros(n_streams)
+
+    def update(self, batch):
+        """
+        Add an M x b batch
+        """
+        batch = np.asarray(batch, dtype=np.float64)
+        bins = np.floor((batch - self.lo[:, None]) / self.width[:, None])
+        under = bins < 0
+        self.under_count += under.sum(axis=1)
+        self.under_sum += np.where(under, batch, 0).sum(axis=1)
+        inside = ~under & (bins < self.n_bins)
+        rows = np.broadcast_to(np.arange(len(batch))[:, None], batch.shape)
+        flat = (rows[inside] * self.n_bins + bins[inside]).astype(np.int64)
+        size = self.counts.size
+        self.counts += np.bincount(flat, minlength=size).reshape(self.counts.shape)
+        self.sums += np.bincount(flat, weights=batch[inside], minlength=size).reshape(self.sums.shape)
+
+    def var_cvar(self, k):
+        """
+        Estimated k-th smallest value and mean of the k smallest values per stream
+        """
+        cumulative = self.under_count[:, None] + np.cumsum(self.counts, axis=1)
+        if np.any(cumulative[:, -1] < k):
+            raise ValueError("Tail histogram range does not reach the requested quantile")
+        rows = np.arange(len(self.lo))
+        b = np.argmax(cumulative >= k, axis=1)
+        before = cumulative[rows, b] - self.counts[rows, b]
+        inside_bin = k - before  # how many of bin b's values are among the k smallest
+        fraction = np.where(before < k, inside_bin / np.maximum(self.counts[rows, b], 1), 0)
+        var = np.where(before >= k, self.lo, self.lo + self.width * (b + fraction))
+        sums_before = self.under_sum + np.cumsum(self.sums, axis=1)[rows, b] - self.sums[rows, b]
+        bin_mean = self.sums[rows, b] / np.maximum(self.counts[rows, b], 1)
+        cvar = (sums_before + np.maximum(inside_bin, 0) * bin_mean) / k
+        return var, cvar
+
+def monte_carlo_var(weights, expected_returns, cov_matrix, confidence_levels=(0.05, 0.01),
+                    n_scenarios=1000000, horizon=1, annualize=252, batch_size=100000,
+                    df=None, seed=42, dtype=np.float32, max_tail_values=20000000, n_bins=4096):
+    """
+    Monte Carlo VaR and CVaR for one or many portfolios
+
+    Args:
+        weights (dict, pd.Series, array or pd.DataFrame): One weight vector (dict by
+            ticker, Series or array), a dict of named weight vectors, a portfolios x
+            tickers DataFrame or an M x N array
+        expected_returns (pd.Series or array): Annual expected returns
+        cov_matrix (pd.DataFrame, array or FactorCovariance): Annual covariance matrix
+        confidence_levels (tuple): Tail probabilities (0.05 = 5% VaR, as in utils.calculate_var)
+        n_scenarios (int): Number of simulated scenarios
+        horizon (int): Risk horizon in trading days
+        annualize (int): Periods per year of the inputs
+        batch_size (int): Scenarios generated per batch
+        df (float): Degrees of freedom for multivariate Student-t shocks with the same
+            covariance (None = normal)
+        seed (int): Random seed; equal seeds give identical scenarios
+        dtype: Floating type of the scenario batches (np.float32 default)
+        max_tail_values (int): Most tail scenarios kept exactly over all portfolios
+        n_bins (int): Tail histogram bins per portfolio when the exact tail does not fit
+
+    The worst max(confidence_levels) x n_scenarios scenarios of each portfolio are kept
+    exactly when they fit in max_tail_values. Otherwise the tail is summarized in a
+    histogram whose range comes from the first batch (from below its minimum to its
+    3 x max(confidence_levels) quantile); VaR is then accurate to one bin width, about
+    1/n_bins of that range, and CVaR to a small fraction of it. Memory is
+    O(M x (batch_size + min(tail, max_tail_values / M) or n_bins)) for any n_scenarios.
+
+    Returns:
+        pd.DataFrame: Per portfolio the scenario mean and volatility and, for every
+            confidence level, VaR and CVaR as positive fractions of portfolio value
+    """
+    assets = list(cov_matrix.index) if isinstance(cov_matrix, (pd.DataFrame, FactorCovariance)) else None
+    if assets is None and isinstance(expected_returns, pd.Series):
+        assets = list(expected_returns.index)
+    W, names = _weight_matrix(weights, assets)
+    n_portfolios = len(W)
+
+    scale = horizon / annualize
+    mu = np.asarray(expected_returns.reindex(assets) if isinstance(expected_returns, pd.Series) and assets
+                    else expected_returns, dtype=np.float64)
+    centers = (W @ mu * scale).astype(dtype)
+    if isinstance(cov_matrix, FactorCovariance):
+        period_cov = FactorCovariance(cov_matrix.loadings, cov_matrix.factor_cov * scale,
+                                      cov_matrix.specific_var * scale, cov_matrix.index)
+    else:
+        period_cov = np.asarray(cov_matrix, dtype=np.float64) * scale
+    loadings = portfolio_shock_loadings(W, period_cov).astype(dtype)
+
+    levels = sorted(confidence_levels)
+    tail_size = max(int(np.ceil(levels[-1] * n_scenarios)), 1)
+    tail = TailBuffer(n_portfolios, tail_size, dtype) if tail_size * n_portfolios <= max_tail_values else None
+    rng = np.random.default_rng(seed)
+    total = np.zeros(n_portfolios)
+    total_sq = np.zeros(n_portfolios)
+
+    for start in range(0, n_scenarios, batch_size):
+        size = min(batch_size, n_scenarios - start)
+        shocks = rng.standard_normal((loadings.shape[1], size), dtype=dtype)
+        returns = loadings @ shocks
+        if df is not None:
+            # Student-t: normal shocks scaled by sqrt((df - 2) / chi2(df)) per scenario
+            returns *= np.sqrt((df - 2) / rng.chisquare(df, size)).astype(dtype)
+        returns += centers[:, None]
+
+        total += returns.sum(axis=1, dtype=np.float64)
+        total_sq += np.square(returns, dtype=np.float64).sum(axis=1)
+        if tail is None:
+            # Histogram range from the first batch: its 3 x level quantile is well above
+            # the VaR, and values below its minimum still count exactly in the underflow
+            pilot_min = returns.min(axis=1).astype(np.float64)
+            hi = np.quantile(returns, min(3 * levels[-1], 1.0), axis=1).astype(np.float64)
+            tail = TailHistogram(pilot_min - 0.5 * (hi - pilot_min), hi, n_bins)
+        tail.update(returns)
+
+    mean = total / n_scenarios
+    results = pd.DataFrame({
+        'Mean': mean,
+        'Volatility': np.sqrt(np.maximum(total_sq / n_scenarios - mean ** 2, 0) * n_scenarios / (n_scenarios - 1))
+    }, index=pd.Index(names, name='Portfolio'))
+
+    for level in levels:
+        var, cvar = tail.var_cvar(max(int(np.ceil(level * n_scenarios)), 1))
+        results[f'VaR {level * 100:g}%'] = -var
+        results[f'CVaR {level * 100:g}%'] = -cvar
+    return results
@@ -0,0 +1,195 @@
+"""
+Monte Carlo price path simulation
+Generates N paths x T days in one shot under geometric Brownian motion, bootstrapped
+historical returns or GARCH(1,1), and summarizes them as percentile bands for the
+forecast scenario plots and risk analysis.
+
+Paths are generated in chunks of days: only the current price of every path and one
+chunk of steps are in memory at a time, so the bands for millions of paths fit in a
+bounded amount of memory. float32 halves it again.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.signal import lfilter
+import warnings
+warnings.filterwarnings('ignore')
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+def _gbm_model(mu, sigma):
+    """
+    Log returns with daily drift mu and volatility sigma (median growth exp(mu - sigma^2/2) per day)
+    """
+    def generate(rng, n_paths, n_steps, state, dtype):
+        shocks = rng.standard_normal((n_steps, n_paths), dtype=dtype)
+        shocks *= sigma
+        shocks += mu - 0.5 * sigma ** 2
+        return shocks, state
+    return generate
+
+def _bootstrap_model(returns, block_size=1):
+    """
+    Log returns resampled from history, in blocks of consecutive days to keep autocorrelation
+    """
+    log_returns = np.log1p(np.asarray(returns, dtype=np.float64))
+    log_returns = log_returns[~np.isnan(log_returns)]
+    n_obs = len(log_returns)
+
+    def generate(rng, n_paths, n_steps, state, dtype):
+        history = log_returns.astype(dtype)
+        if block_size == 1:
+            return history[rng.integers(0, n_obs, (n_steps, n_paths))], state
+        # state: (block start per path, position within the block)
+        starts, offset = state if state is not None else (rng.integers(0, n_obs, n_paths), 0)
+        index = np.empty((n_steps, n_paths), dtype=np.int64)
+        for step in range(n_steps):
+            if offset == block_size:
+                starts, offset = rng.integers(0, n_obs, n_paths), 0
+            index[step] = (starts + offset) % n_obs
+            offset += 1
+        return history[index], (starts, offset)
+    return generate
+
+def _garch_model(mu, omega, alpha, beta, variance):
+    """
+    Log returns r = mu + e with e ~ N(0, s2) and s2' = omega + alpha * e^2 + beta * s2
+    """
+    def generate(rng, n_paths, n_steps, state, dtype):
+        s2 = np.full(n_paths, variance, dtype=dtype) if state is None else state
+        shocks = rng.standard_normal((n_steps, n_paths), dtype=dtype)
+        for step in range(n_steps):
+            shocks[step] *= np.sqrt(s2)
+            s2 = (omega + alpha * shocks[step] ** 2 + beta * s2).astype(dtype)
+        shocks += mu
+        return shocks, s2
+    return generate
+
+def fit_garch(returns):
+    """
+    Gaussian maximum likelihood GARCH(1,1) fit of daily returns
+
+    Args:
+        returns (pd.Series or array): Daily simple returns
+
+    Returns:
+        dict: mu, omega, alpha, beta and the last conditional variance (daily units)
+    """
+    r = np.log1p(np.asarray(returns, dtype=np.float64))
+    r = r[~np.isnan(r)]
+    mu = r.mean()
+    e = r - mu
+    sample_var = e.var()
+    lagged = np.concatenate([[sample_var], e[:-1] ** 2])
+
+    def variances(params):
+        # s2[t] = omega + alpha * e[t-1]^2 + beta * s2[t-1] as one linear filter pass
+        omega, alpha, beta = params[0] * sample_var, params[1], params[2]
+        drive = omega + alpha * lagged
+        drive[0] = sample_var
+        return lfilter([1], [1, -beta], drive)
+
+    def negative_log_likelihood(params):
+        s2 = variances(params)
+        return 0.5 * np.sum(np.log(s2) + e ** 2 / s2)
+
+    # omega is optimized in units of the sample variance to keep the parameters on one scale
+    result = minimize(
+        negative_log_likelihood, [0.05, 0.05, 0.9],
+        method='SLSQP',
+        bounds=[(1e-6, None), (0, 1), (0, 1)],
+        constraints=({'type': 'ineq', 'fun': lambda p: 0.999 - p[1] - p[2]},)
+    )
+    omega, alpha, beta = result.x[0] * sample_var, result.x[1], result.x[2]
+    s2 = variances(result.x)
+    last_variance = omega + alpha * e[-1] ** 2 + beta * s2[-1]
+    return {'mu': mu, 'omega': omega, 'alpha': alpha, 'beta': beta, 'variance': last_variance}
+
+def simulate_paths(s0, n_days, model='gbm', n_paths=10000, percentiles=DEFAULT_PERCENTILES,
+                   seed=42, dtype=np.float32, chunk_days=21, keep_paths=False, **params):
+    """
+    Simulate price paths and summarize them as percentile bands per day
+
+    Args:
+        s0 (float): Starting price
+        n_days (int): Number of trading days to simulate
+        model (str): 'gbm' (params mu, sigma - daily log drift and volatility),
+            'bootstrap' (params returns, block_size) or 'garch' (params from fit_garch)
+        n_paths (int): Number of paths
+        percentiles (tuple): Percentiles for the bands
+        seed (int): Random seed
+        dtype: np.float32 (default) or np.float64
+        chunk_days (int): Days generated per chunk; memory is O(n_paths x chunk_days)
+        keep_paths (bool): Also return the full n_paths x (n_days + 1) price array
+
+    Returns:
+        dict: 'bands' (DataFrame, day 0..n_days x one column per percentile plus 'mean'),
+            'final_prices' (n_paths array) and 'paths' (array or None)
+    """
+    generators = {'gbm': _gbm_model, 'bootstrap': _bootstrap_model, 'garch': _garch_model}
+    if model not in generators:
+        raise ValueError(f"Unknown model: {model} (choose from {', '.join(generators)})")
+    generate = generators[model](**params)
+
+    rng = np.random.default_rng(seed)
+    log_price = np.full(n_paths, np.log(s0), dtype=dtype)
+    bands = np.empty((n_days + 1, len(percentiles)))
+    means = np.empty(n_days + 1)
+    bands[0], means[0] = s0, s0
+    paths = np.empty((n_paths, n_days + 1), dtype=dtype) if keep_paths else None
+    if keep_paths:
+        paths[:, 0] = s0
+
+    state = None
+    for start in range(0, n_days, chunk_days):
+        steps = min(chunk_days, n_days - start)
+        # One row per day, one column per path, so each day's percentiles read contiguous memory
+        log_returns, state = generate(rng, n_paths, steps, state, dtype)
+        chunk = np.cumsum(log_returns, axis=0, dtype=dtype, out=log_returns)
+        chunk += log_price
+        log_price = chunk[-1].copy()
+        prices = np.exp(chunk, out=chunk)
+
+        bands[start + 1:start + steps + 1] = np.percentile(prices, percentiles, axis=1).T
+        means[start + 1:start + steps + 1] = prices.mean(axis=1, dtype=np.float64)
+        if keep_paths:
+            paths[:, start + 1:start + steps + 1] = prices.T
+
+    bands = pd.DataFrame(bands, columns=[f'p{p:g}' for p in percentiles])
+    bands['mean'] = means
+    bands.index.name = 'Day'
+
+    return {'bands': bands, 'final_prices': np.exp(log_price), 'paths': paths}
+
+def forecast_scenario(current_price, forecast_price, n_days=126, daily_volatility=0.03,
+                      confidence=0.90, model='gbm', **kwargs):
+    """
+    Simulated scenario around a point forecast: paths whose median ends at forecast_price
+
+    Args:
+        current_price (float): Current price
+        forecast_price (float): Forecast price at the horizon (the median path ends here)
+        n_days (int): Horizon in trading days (126 is about 6 months)
+        daily_volatility (float): Daily volatility of returns
+        confidence (float): Two-sided confidence level of the reported range
+        model (str): 'gbm', or 'bootstrap'/'garch' with their parameters in kwargs
+            (the median is then whatever the model implies)
+        **kwargs: Passed to simulate_paths
+
+    Returns:
+        dict: simulate_paths output plus 'low', 'median' and 'high' prices at the horizon
+    """
+    tail = round((1 - confidence) / 2 * 100, 10)
+    percentiles = sorted(set(DEFAULT_PERCENTILES) | {tail, 50, 100 - tail})
+    if model == 'gbm':
+        # Drift so that the median terminal price is the forecast
+        kwargs.setdefault('mu', np.log(forecast_price / current_price) / n_days + 0.5 * daily_volatility ** 2)
+        kwargs.setdefault('sigma', daily_volatility)
+    result = simulate_paths(current_price, n_days, model, percentiles=percentiles, **kwargs)
+
+    final = result['bands'].iloc[-1]
+    result['low'] = final[f'p{tail:g}']
+    result['median'] = final['p50']
+    result['high'] = final[f'p{100 - tail:g}']
+    return result
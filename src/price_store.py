@@ -0,0 +1,394 @@
+"""
+Columnar price store
+Keeps each ticker's price history as typed, memory-mappable .npy column blocks
+so loaders can read only the columns and dates they need instead of re-parsing CSVs.
+
+Layout (under the data folder):
+    store/{TICKER}/meta.json           column names, dtypes, timezone and current version
+    store/{TICKER}/{version}/index.npy dates as int64 nanoseconds
+    store/{TICKER}/{version}/col_N.npy one float64 or int64 block per column
+
+A write creates a new version directory and then swaps meta.json with os.replace,
+so readers always see either the old or the new history, never a partial one. The
+version it replaced is only deleted by the write after it, so a reader that has just
+read the old meta.json can still open that version's files. Version names start with
+their creation time, and a write only deletes versions older than the one it replaced,
+so it never touches a version that another writer is still filling.
+"""
+
+import os
+import json
+import glob
+import shutil
+import time
+import uuid
+import numpy as np
+import pandas as pd
+
+STORE_SUBFOLDER = 'store'
+
+
+def _ticker_path(ticker, folder='data'):
+    return os.path.join(folder, STORE_SUBFOLDER, ticker)
+
+
+def _read_meta(ticker, folder='data'):
+    meta_file = os.path.join(_ticker_path(ticker, folder), 'meta.json')
+    if not os.path.exists(meta_file):
+        raise FileNotFoundError(f"No stored data for {ticker} in {folder}")
+    with open(meta_file) as f:
+        return json.load(f)
+
+
+def new_version_name():
+    """
+    Name for a new version directory: creation time in nanoseconds plus a random suffix
+    """
+    return f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+
+
+def version_key(name):
+    """
+    Sort key of a version name (versions from before timestamped names sort first)
+    """
+    stamp = name.split('-', 1)[0]
+    return (int(stamp), name) if len(stamp) == 20 and stamp.isdigit() else (0, '')
+
+
+def _to_datetime_index(index):
+    """
+    Convert any date-like index (including CSV strings with mixed UTC offsets)
+    to a DatetimeIndex
+    """
+    if isinstance(index, pd.DatetimeIndex):
+        return index
+    try:
+        return pd.DatetimeIndex(pd.to_datetime(index))
+    except (ValueError, TypeError):
+        # yfinance CSVs mix -04:00/-05:00 offsets across DST changes
+        return pd.DatetimeIndex(pd.to_datetime(index, utc=True))
+
+
+def _column_dtype(series):
+    """
+    Map a column to its stored dtype, or None for non-numeric columns
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return 'int64'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'float64'
+    return None
+
+
+def _to_timestamp(value, tz):
+    """
+    Convert a date bound to int64 nanoseconds in the store's timezone convention
+    """
+    ts = pd.Timestamp(value)
+    if tz is not None:
+        ts = ts.tz_localize(tz) if ts.tzinfo is None else ts.tz_convert(tz)
+    elif ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.value
+
+
+def has_ticker(ticker, folder='data'):
+    """
+    Check whether a ticker exists in the store
+
+    Args:
+        ticker (str): Stock ticker symbol
+        folder (str): Data folder
+
+    Returns:
+        bool: True if the ticker has stored history
+    """
+    return os.path.exists(os.path.join(_ticker_path(ticker, folder), 'meta.json'))
+
+
+def list_tickers(folder='data'):
+    """
+    List all tickers held in the store
+
+    Args:
+        folder (str): Data folder
+
+    Returns:
+        list: Sorted ticker symbols
+    """
+    pattern = os.path.join(folder, STORE_SUBFOLDER, '*', 'meta.json')
+    return sorted(os.path.basename(os.path.dirname(path)) for path in glob.glob(pattern))
+
+
+def save_prices(ticker, data, folder='data'):
+    """
+    Write a ticker's full history to the store, replacing any previous version
+
+    Numeric columns are stored as float64 (int64 for integer/bool columns such as
+    Volume); non-numeric columns like 'Ticker' are not stored.
+
+    Args:
+        ticker (str): Stock ticker symbol
+        data (pd.DataFrame): Price data with a date index
+        folder (str): Data folder
+
+    Returns:
+        str: Path of the ticker's store directory
+    """
+    index = _to_datetime_index(data.index).as_unit('ns')
+    order = np.argsort(index.asi8, kind='stable')
+    tz = str(index.tz) if index.tz is not None else None
+
+    ticker_dir = _ticker_path(ticker, folder)
+    version = new_version_name()
+    version_dir = os.path.join(ticker_dir, version)
+    os.makedirs(version_dir)
+
+    np.save(os.path.join(version_dir, 'index.npy'), index.asi8[order])
+
+    columns = []
+    for column in data.columns:
+        dtype = _column_dtype(data[column])
+        if dtype is None:
+            continue
+        file_name = f'col_{len(columns)}.npy'
+        values = data[column].to_numpy(dtype=dtype)
+        np.save(os.path.join(version_dir, file_name), values[order])
+        columns.append({'name': str(column), 'dtype': dtype, 'file': file_name})
+
+    meta = {
+        'ticker': ticker,
+        'version': version,
+        'tz': tz,
+        'rows': int(len(index)),
+        'columns': columns
+    }
+
+    # Swap the pointer atomically, then drop the versions older than the one it replaced
+    # (readers of the previous meta.json may still be opening its files, and newer
+    # versions may belong to another writer that has not swapped meta.json yet)
+    old_version = _read_meta(ticker, folder)['version'] if has_ticker(ticker, folder) else None
+    tmp_meta = os.path.join(ticker_dir, f'meta.{version}.tmp')
+    with open(tmp_meta, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_meta, os.path.join(ticker_dir, 'meta.json'))
+
+    if old_version is not None:
+        for entry in os.listdir(ticker_dir):
+            path = os.path.join(ticker_dir, entry)
+            if os.path.isdir(path) and version_key(entry) < version_key(old_version):
+                shutil.rmtree(path, ignore_errors=True)
+
+    return ticker_dir
+
+
+def load_prices(ticker, folder='data', columns=None, start=None, end=None, last_rows=None, mmap=True):
+    """
+    Load a ticker's history from the store
+
+    Args:
+        ticker (str): Stock ticker symbol
+        folder (str): Data folder
+        columns (list): Columns to load (None loads all stored columns)
+        start (str): First date to include (inclusive)
+        end (str): Last date to include (inclusive)
+        last_rows (int): Only load the last N rows of the selected date range
+        mmap (bool): Memory-map the column blocks instead of reading them fully
+
+    Returns:
+        pd.DataFrame: Price data indexed by date
+    """
+    for attempt in range(3):
+        meta = _read_meta(ticker, folder)
+        try:
+            return _load_version(ticker, folder, meta, columns, start, end, last_rows, mmap)
+        except FileNotFoundError:
+            # Two writes replaced the version while it was being opened: read the new one
+            if attempt == 2 or _read_meta(ticker, folder)['version'] == meta['version']:
+                raise
+
+
+def _load_version(ticker, folder, meta, columns, start, end, last_rows, mmap):
+    """
+    Read the selected rows and columns of the stored version described by meta
+    """
+    version_dir = os.path.join(_ticker_path(ticker, folder), meta['version'])
+    mmap_mode = 'r' if mmap else None
+
+    stored = {col['name']: col for col in meta['columns']}
+    if columns is None:
+        columns = list(stored)
+    missing = [col for col in columns if col not in stored]
+    if missing:
+        raise KeyError(f"{ticker} has no stored columns {missing}")
+
+    index_values = np.load(os.path.join(version_dir, 'index.npy'), mmap_mode=mmap_mode)
+    lo = 0 if start is None else int(np.searchsorted(index_values, _to_timestamp(start, meta['tz']), side='left'))
+    hi = len(index_values) if end is None else int(np.searchsorted(index_values, _to_timestamp(end, meta['tz']), side='right'))
+    if last_rows is not None:
+        lo = max(lo, hi - last_rows)
+
+    index = pd.DatetimeIndex(np.asarray(index_values[lo:hi]).view('datetime64[ns]'), name='Date')
+    if meta['tz'] is not None:
+        index = index.tz_localize('UTC').tz_convert(meta['tz'])
+
+    data = {}
+    for column in columns:
+        block = np.load(os.path.join(version_dir, stored[column]['file']), mmap_mode=mmap_mode)
+        data[column] = np.array(block[lo:hi])
+
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+def last_date(ticker, folder='data'):
+    """
+    Get the most recent stored date for a ticker without loading its history
+
+    Args:
+        ticker (str): Stock ticker symbol
+        folder (str): Data folder
+
+    Returns:
+        pd.Timestamp: Last stored date, or None if the ticker has no rows
+    """
+    meta = _read_meta(ticker, folder)
+    index_values = np.load(os.path.join(_ticker_path(ticker, folder), meta['version'], 'index.npy'), mmap_mode='r')
+    if len(index_values) == 0:
+        return None
+    ts = pd.Timestamp(int(index_values[-1]))
+    return ts.tz_localize('UTC').tz_convert(meta['tz']) if meta['tz'] is not None else ts
+
+
+def new_rows(ticker, data, folder='data'):
+    """
+    Select the rows of data dated after the ticker's last stored date
+
+    The index is converted to the store's timezone so the result can be appended directly.
+
+    Args:
+        ticker (str): Stock ticker symbol
+        data (pd.DataFrame): Candidate rows with a date index
+        folder (str): Data folder
+
+    Returns:
+        pd.DataFrame: Rows not yet in the store
+    """
+    if not has_ticker(ticker, folder):
+        return data
+
+    tz = _read_meta(ticker, folder)['tz']
+    index = _to_datetime_index(data.index)
+    if tz is not None:
+        index = index.tz_localize(tz) if index.tz is None else index.tz_convert(tz)
+    elif index.tz is not None:
+        index = index.tz_localize(None)
+
+    data = data.copy()
+    data.index = index
+    last = last_date(ticker, folder)
+    return data if last is None else data[data.index > last]
+
+
+def append_prices(ticker, new_data, folder='data'):
+    """
+    Append rows dated after the last stored date to a ticker's history
+
+    The combined history is written as a new version, so the append is atomic.
+    Columns missing on either side are filled with NaN.
+
+    Args:
+        ticker (str): Stock ticker symbol
+        new_data (pd.DataFrame): New rows with a date index
+        folder (str): Data folder
+
+    Returns:
+        int: Number of rows appended
+    """
+    if not has_ticker(ticker, folder):
+        save_prices(ticker, new_data, folder)
+        return len(new_data)
+
+    new_data = new_rows(ticker, new_data, folder)
+    if new_data.empty:
+        return 0
+
+    existing = load_prices(ticker, folder, mmap=False)
+    numeric = [col for col in new_data.columns if _column_dtype(new_data[col]) is not None]
+    save_prices(ticker, pd.concat([existing, new_data[numeric]]), folder)
+    return len(new_data)
+
+
+def load_assets(tickers, folder='data', columns=None, start=None, end=None):
+    """
+    Load several tickers from the store
+
+    Tickers that only exist as legacy {TICKER}_data.csv files are migrated on first use.
+
+    Args:
+        tickers (list): Ticker symbols
+        folder (str): Data folder
+        columns (list): Columns to load (None loads all)
+        start (str): First date to include
+        end (str): Last date to include
+
+    Returns:
+        dict: Dictionary containing dataframes for each asset
+
+    Raises:
+        FileNotFoundError: If a ticker is in neither the store nor a CSV file
+    """
+    assets = {}
+    for ticker in tickers:
+        if not has_ticker(ticker, folder):
+            migrate_csv(ticker, folder)
+        assets[ticker] = load_prices(ticker, folder, columns=columns, start=start, end=end)
+    return assets
+
+
+def migrate_csv(ticker, folder='data', remove_csv=False):
+    """
+    Move one legacy {TICKER}_data.csv file into the store
+
+    Args:
+        ticker (str): Stock ticker symbol
+        folder (str): Data folder holding the CSV
+        remove_csv (bool): Delete the CSV after a successful migration
+
+    Returns:
+        int: Number of rows migrated
+    """
+    csv_file = os.path.join(folder, f'{ticker}_data.csv')
+    if not os.path.exists(csv_file):
+        raise FileNotFoundError(f"No stored data or CSV file for {ticker} in {folder}")
+
+    data = pd.read_csv(csv_file, index_col=0)
+    data.index = _to_datetime_index(data.index)
+    save_prices(ticker, data, folder)
+
+    if remove_csv:
+        os.remove(csv_file)
+    return len(data)
+
+
+def migrate_csv_folder(folder='data', remove_csv=False):
+    """
+    One-shot migration of every {TICKER}_data.csv file in a folder into the store
+
+    Args:
+        folder (str): Data folder holding the CSV files
+        remove_csv (bool): Delete each CSV after it is migrated
+
+    Returns:
+        dict: Rows migrated per ticker
+    """
+    migrated = {}
+    for csv_file in sorted(glob.glob(os.path.join(folder, '*_data.csv'))):
+        ticker = os.path.basename(csv_file)[:-len('_data.csv')]
+        migrated[ticker] = migrate_csv(ticker, folder, remove_csv=remove_csv)
+        print(f"Migrated {ticker}: {migrated[ticker]} rows")
+    return migrated
+
+
+if __name__ == "__main__":
+    results = migrate_csv_folder()
+    print(f"\nMigrated {len(results)} tickers into the price store.")
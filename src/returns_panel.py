@@ -0,0 +1,286 @@
+"""
+Aligned returns panel
+Builds the dates x tickers daily returns matrix once, so correlation, covariance and
+risk code can share it instead of each re-aligning a dict of DataFrames.
+
+The matrix is float64 in column-major order: every ticker's returns are one contiguous
+block, panel.column(ticker) and panel.frame are views rather than copies, and the
+values are read-only so a panel can be handed to several consumers safely. A panel can
+also be written to (or built directly in) a folder of .npy files and opened as a
+memory map; such a panel pickles as its folder path, so worker processes that receive
+it map the same file instead of each receiving a copy. Each write goes to a new version
+subfolder (values.npy, dates.npy) and then swaps meta.json, which names the current
+version, with os.replace; the version it replaced is kept until the next write, so
+open always sees one complete panel. Only versions older than the replaced one are
+deleted, so concurrent writers never remove each other's unfinished versions.
+
+Missing-data policies:
+    intersection  dates on which every ticker has a return (the old .dropna())
+    union         every date any ticker has a return; a ticker's gaps after its first
+                  return are forward-filled prices, i.e. zero returns (ffill_limit caps
+                  the gap length), and dates before its first return stay NaN
+    pairwise      every date any ticker has a return, missing values left as NaN for
+                  pairwise-complete statistics (see mask)
+"""
+
+import os
+import json
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+from price_store import new_version_name, version_key
+import warnings
+warnings.filterwarnings('ignore')
+
+POLICIES = ('intersection', 'union', 'pairwise')
+
+def _returns_series(data, column):
+    if isinstance(data, pd.Series):
+        return data
+    return data[column] if column in data.columns else data['Close'].pct_change()
+
+def _fill_gaps(column, limit=None):
+    """
+    Zero the NaN returns after a column's first value (in place), at most limit in a row
+    """
+    missing = np.isnan(column)
+    positions = np.arange(len(column))
+    last_valid = np.maximum.accumulate(np.where(missing, -1, positions))
+    fill = missing & (last_valid >= 0)
+    if limit is not None:
+        fill &= positions - last_valid <= limit
+    column[fill] = 0.0
+
+class ReturnsPanel:
+    """
+    Calendar-aligned daily returns, dates x tickers, shared read-only
+
+    Example:
+        panel = ReturnsPanel.from_assets(assets_data, policy='intersection')
+        corr = panel.corr()
+        cov = estimate_covariance(panel.frame, 'ledoit_wolf')
+    """
+
+    def __init__(self, values, dates, tickers, policy='intersection', path=None):
+        """
+        Args:
+            values (np.ndarray): dates x tickers returns
+            dates (pd.DatetimeIndex): Row dates
+            tickers (list): Column tickers
+            policy (str): Missing-data policy the values were aligned with
+            path (str): Folder the values are memory-mapped from (None = in memory)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.flags.writeable:
+            values = values.view()
+            values.flags.writeable = False
+        self.values = values
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = pd.Index(tickers)
+        self.policy = policy
+        self.path = path
+        self._mask = None
+        if values.shape != (len(self.dates), len(self.tickers)):
+            raise ValueError(f"Values of shape {values.shape} do not match "
+                             f"{len(self.dates)} dates x {len(self.tickers)} tickers")
+
+    @classmethod
+    def from_assets(cls, assets_data, tickers=None, column='Daily_Return', policy='intersection',
+                    ffill_limit=None, path=None):
+        """
+        Align the returns of several assets
+
+        Args:
+            assets_data (dict): Ticker -> DataFrame (or returns Series)
+            tickers (list): Tickers to include (default all keys of assets_data)
+            column (str): Return column; calculated from Close if missing
+            policy (str): 'intersection', 'union' or 'pairwise'
+            ffill_limit (int): Longest gap filled under the union policy (None = any)
+            path (str): Build the matrix directly in this folder and memory-map it
+
+        Returns:
+            ReturnsPanel: Aligned panel
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy} (choose from {', '.join(POLICIES)})")
+        tickers = list(tickers or assets_data.keys())
+
+        # Each ticker's valid returns as (int64 dates, values), without building frames;
+        # tz-aware dates are UTC nanoseconds, so any mix of timezones aligns on the instant
+        columns, tz, naive = [], None, []
+        for ticker in tickers:
+            series = _returns_series(assets_data[ticker], column).dropna()
+            index = pd.DatetimeIndex(series.index)
+            tz = tz or index.tz
+            if index.tz is None:
+                naive.append(ticker)
+            columns.append((index.asi8, series.to_numpy(dtype=np.float64)))
+        if naive and tz is not None:
+            raise ValueError(f"Cannot align tz-naive dates ({', '.join(map(str, naive[:5]))}) with "
+                             f"tz-aware ones; localize or tz_convert(None) them first")
+
+        all_dates = np.concatenate([dates for dates, _ in columns]) if columns else np.empty(0, np.int64)
+        if policy == 'intersection':
+            unique, counts = np.unique(all_dates, return_counts=True)
+            dates = unique[counts == len(columns)]
+        else:
+            dates = np.unique(all_dates)
+
+        shape = (len(dates), len(tickers))
+        if path is None:
+            values = np.full(shape, np.nan, order='F')
+        else:
+            version = ReturnsPanel._new_version(path)
+            values = np.lib.format.open_memmap(os.path.join(path, version, 'values.npy'), mode='w+',
+                                               dtype=np.float64, shape=shape, fortran_order=True)
+            values[:] = np.nan
+
+        for j, (column_dates, column_values) in enumerate(columns):
+            rows = np.searchsorted(dates, column_dates)
+            keep = rows < len(dates)
+            keep[keep] = dates[rows[keep]] == column_dates[keep]
+            values[rows[keep], j] = column_values[keep]
+            if policy == 'union':
+                _fill_gaps(values[:, j], ffill_limit)
+
+        index = pd.DatetimeIndex(pd.to_datetime(dates, utc=tz is not None))
+        if tz is not None:
+            index = index.tz_convert(tz)
+        if path is None:
+            return cls(values, index, tickers, policy)
+
+        values.flush()
+        del values
+        cls._commit(path, version, index, tickers, policy)
+        return cls.open(path)
+
+    @staticmethod
+    def _new_version(path):
+        version = new_version_name()
+        os.makedirs(os.path.join(path, version))
+        return version
+
+    @staticmethod
+    def _commit(path, version, dates, tickers, policy):
+        """
+        Write the dates of a version whose values.npy is complete, then make it current
+        """
+        np.save(os.path.join(path, version, 'dates.npy'), dates.asi8)
+        meta_path = os.path.join(path, 'meta.json')
+        previous = None
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                previous = json.load(f).get('version')
+        meta = {'version': version, 'tickers': [str(t) for t in tickers], 'policy': policy,
+                'tz': str(dates.tz) if dates.tz is not None else None}
+        temp = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(temp, meta_path)
+
+        # Keep the replaced version for readers that opened the previous meta.json, and
+        # newer ones for writers that have not swapped meta.json yet
+        if previous is not None:
+            for entry in os.listdir(path):
+                folder = os.path.join(path, entry)
+                if os.path.isdir(folder) and version_key(entry) < version_key(previous):
+                    shutil.rmtree(folder, ignore_errors=True)
+
+    @classmethod
+    def from_frame(cls, returns, policy='intersection', ffill_limit=None, path=None):
+        """
+        Panel from a dates x tickers returns DataFrame
+        """
+        return cls.from_assets({ticker: returns[ticker] for ticker in returns.columns},
+                               policy=policy, ffill_limit=ffill_limit, path=path)
+
+    def save(self, path):
+        """
+        Write the panel to a folder (a new version of it, if it exists) for ReturnsPanel.open
+
+        Returns:
+            ReturnsPanel: The same panel, memory-mapped from path
+        """
+        version = self._new_version(path)
+        values = np.lib.format.open_memmap(os.path.join(path, version, 'values.npy'), mode='w+',
+                                           dtype=np.float64, shape=self.shape, fortran_order=True)
+        values[:] = self.values
+        values.flush()
+        del values
+        self._commit(path, version, self.dates, self.tickers, self.policy)
+        return ReturnsPanel.open(path)
+
+    @classmethod
+    def open(cls, path):
+        """
+        Memory-map a panel written by save (or from_assets with a path), read-only
+        """
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        folder = os.path.join(path, meta['version'])
+        dates = pd.to_datetime(np.load(os.path.join(folder, 'dates.npy')), utc=meta['tz'] is not None)
+        if meta['tz'] is not None:
+            dates = dates.tz_convert(meta['tz'])
+        values = np.load(os.path.join(folder, 'values.npy'), mmap_mode='r')
+        return cls(values, dates, meta['tickers'], meta['policy'], path)
+
+    def __reduce__(self):
+        # Memory-mapped panels travel to other processes as their folder path
+        if self.path is not None:
+            return (ReturnsPanel.open, (self.path,))
+        return (ReturnsPanel, (np.asfortranarray(self.values), self.dates, list(self.tickers), self.policy))
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __repr__(self):
+        backing = f", path={self.path!r}" if self.path else ''
+        return f"ReturnsPanel({len(self.dates)} dates x {len(self.tickers)} tickers, policy={self.policy!r}{backing})"
+
+    @property
+    def frame(self):
+        """
+        DataFrame view of the values (no copy)
+        """
+        return pd.DataFrame(self.values, index=self.dates, columns=self.tickers, copy=False)
+
+    @property
+    def mask(self):
+        """
+        Boolean dates x tickers array of observed (non-NaN) returns
+        """
+        if self._mask is None:
+            self._mask = ~np.isnan(self.values)
+            self._mask.flags.writeable = False
+        return self._mask
+
+    def column(self, ticker):
+        """
+        One ticker's returns as a contiguous view
+        """
+        return self.values[:, self.tickers.get_loc(ticker)]
+
+    def select(self, tickers):
+        """
+        Panel of some tickers on the same dates (a copy; rows are not re-aligned)
+        """
+        positions = self.tickers.get_indexer(tickers)
+        if (positions < 0).any():
+            missing = [t for t, p in zip(tickers, positions) if p < 0]
+            raise KeyError(f"Tickers not in panel: {missing}")
+        return ReturnsPanel(np.asfortranarray(self.values[:, positions]), self.dates, list(tickers), self.policy)
+
+    def corr(self):
+        """
+        Correlation matrix of the returns (pairwise-complete where values are missing)
+        """
+        if self.mask.all():
+            corr = np.atleast_2d(np.corrcoef(self.values, rowvar=False))
+            return pd.DataFrame(corr, index=self.tickers, columns=self.tickers)
+        from covariance import pairwise_correlation  # covariance imports this module
+        return pairwise_correlation(self)
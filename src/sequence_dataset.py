@@ -0,0 +1,238 @@
+"""
+Sliding-window sequence dataset for the LSTM model
+Replacement for create_sequences in Notebooks/Task2/modeling_analysis.ipynb.
+
+create_sequences copies every 60-day window into a (T - 60) x 60 array. Here all
+windows are one numpy sliding_window_view over the price panel - a view, not a copy -
+and a window is only copied when it is gathered into a batch. Scaling is applied to
+each batch as it is gathered, using min/max fitted on the training rows only, so the
+stored panel is never rescaled either.
+
+Several features (columns) and several tickers are supported: tickers are stacked
+along time and windows that would cross from one ticker into the next are skipped.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from forecasting import _timestamp_like
+import warnings
+warnings.filterwarnings('ignore')
+
+def _as_frames(data):
+    """
+    Input as a dict of ticker -> DataFrame (dates x features)
+    """
+    if isinstance(data, dict):
+        return {ticker: frame.to_frame() if isinstance(frame, pd.Series) else frame
+                for ticker, frame in data.items()}
+    if isinstance(data, pd.Series):
+        return {data.name or 'series': data.to_frame()}
+    if isinstance(data, pd.DataFrame):
+        return {'series': data}
+    values = np.asarray(data)
+    return {'series': pd.DataFrame(values.reshape(len(values), -1))}
+
+def _common_timezone(indexes, tickers):
+    """
+    Date indexes of all tickers in one timezone (the first tz-aware one's), so they can be compared
+
+    Raises:
+        ValueError: If tz-naive and tz-aware indexes are mixed
+    """
+    zones = [index.tz for index in indexes if isinstance(index, pd.DatetimeIndex) and index.tz is not None]
+    if not zones:
+        return indexes
+    naive = [ticker for ticker, index in zip(tickers, indexes)
+             if not isinstance(index, pd.DatetimeIndex) or index.tz is None]
+    if naive:
+        raise ValueError(f"Cannot combine tz-naive dates ({', '.join(map(str, naive[:5]))}) with "
+                         f"tz-aware ones; localize or tz_convert(None) them first")
+    return [index.tz_convert(zones[0]) for index in indexes]
+
+class SequenceDataset:
+    """
+    Windows of seq_length rows predicting the target seq_length + horizon - 1 rows later
+
+    Example (the notebook's 60-day TSLA setup):
+        dataset = SequenceDataset(tsla_prices, seq_length=60)
+        dataset.fit_scaler('2024-01-01')
+        train, test = dataset.split('2024-01-01')
+        for X, y in dataset.batches(32, train, shuffle=True):
+            ...
+    """
+
+    def __init__(self, data, seq_length=60, target=0, horizon=1, dtype=np.float32):
+        """
+        Args:
+            data (pd.Series, pd.DataFrame, dict or array): One series, a dates x features
+                DataFrame, or a dict of ticker -> Series/DataFrame with the same columns
+            seq_length (int): Days in each input window
+            target (int or str): Feature (column position or name) to predict
+            horizon (int): Steps ahead of the window end to predict (1 = next day)
+            dtype: Floating type of the stored panel and of the batches
+        """
+        frames = _as_frames(data)
+        self.tickers = list(frames)
+        self.features = list(next(iter(frames.values())).columns)
+        self.target = self.features.index(target) if target in self.features else int(target)
+        self.seq_length = seq_length
+        self.horizon = horizon
+
+        # One contiguous panel with the tickers one after another
+        self.values = np.concatenate([frame.to_numpy(dtype=dtype) for frame in frames.values()])
+        indexes = _common_timezone([frame.index for frame in frames.values()], self.tickers)
+        self.dates = indexes[0].append(indexes[1:])
+        lengths = np.array([len(frame) for frame in frames.values()])
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        self.segments = np.repeat(np.arange(len(frames)), lengths)
+
+        # All windows as a zero-copy view: windows[s] = values[s:s + seq_length]
+        self.windows = sliding_window_view(self.values, seq_length, axis=0).transpose(0, 2, 1)
+
+        # Valid window starts: window and target inside the same ticker
+        starts = [np.arange(start, stop - seq_length - horizon + 1) for start, stop in zip(bounds[:-1], bounds[1:])]
+        self.starts = np.concatenate(starts).astype(np.int64)
+        self.target_rows = self.starts + seq_length + horizon - 1
+
+        self.scale = np.ones((len(frames), len(self.features)), dtype=dtype)
+        self.offset = np.zeros((len(frames), len(self.features)), dtype=dtype)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _train_rows(self, train_end):
+        if isinstance(train_end, int):
+            # First train_end rows of each ticker
+            first_row = np.searchsorted(self.segments, self.segments, side='left')
+            return np.arange(len(self.values)) - first_row < train_end
+        return self.dates < _timestamp_like(train_end, self.dates)
+
+    def fit_scaler(self, train_end=None, feature_range=(0, 1), per_ticker=True):
+        """
+        Fit min/max scaling on the training rows (the notebook's MinMaxScaler.fit)
+
+        Args:
+            train_end (str or int): First test date, or training rows per ticker (None = all rows)
+            feature_range (tuple): Target range of the scaled values
+            per_ticker (bool): Separate min/max for each ticker, otherwise one over all tickers.
+                A ticker without training rows (e.g. listed after train_end) gets a NaN
+                scale, so its batches are NaN until a scaler is set for it
+
+        Returns:
+            SequenceDataset: self
+
+        Raises:
+            ValueError: If there are no training rows at all
+        """
+        rows = np.ones(len(self.values), dtype=bool) if train_end is None else self._train_rows(train_end)
+        if not rows.any():
+            raise ValueError(f"No training rows before {train_end}")
+        groups = range(len(self.tickers)) if per_ticker else [None]
+        low, high = feature_range
+        for group in groups:
+            mask = rows if group is None else rows & (self.segments == group)
+            target = slice(None) if group is None else group
+            if not mask.any():
+                self.scale[target] = np.nan
+                self.offset[target] = np.nan
+                continue
+            data_min = self.values[mask].min(axis=0)
+            data_range = self.values[mask].max(axis=0) - data_min
+            scale = (high - low) / np.where(data_range == 0, 1, data_range)
+            self.scale[target] = scale
+            self.offset[target] = low - data_min * scale
+        return self
+
+    def set_scaler(self, scaler):
+        """
+        Use an already fitted sklearn MinMaxScaler (its scale_ and min_) for every ticker
+
+        Returns:
+            SequenceDataset: self
+        """
+        self.scale[:] = scaler.scale_
+        self.offset[:] = scaler.min_
+        return self
+
+    def split(self, train_end):
+        """
+        Sample positions whose target falls before / on or after train_end
+
+        The test samples' windows reach back into the training rows, like the notebook's
+        combined_data of the last seq_length training days plus the test days.
+
+        Args:
+            train_end (str or int): First test date, or training rows per ticker
+
+        Returns:
+            tuple: (train sample positions, test sample positions)
+        """
+        in_train = self._train_rows(train_end)[self.target_rows]
+        return np.flatnonzero(in_train), np.flatnonzero(~in_train)
+
+    def batch(self, samples):
+        """
+        Gather and scale the windows and targets of some samples
+
+        Args:
+            samples (array): Sample positions (0 .. len(self) - 1)
+
+        Returns:
+            tuple: X (batch x seq_length x features) and y (batch x 1), scaled
+        """
+        starts = self.starts[samples]
+        segments = self.segments[starts]
+        X = self.windows[starts]
+        X *= self.scale[segments][:, None, :]
+        X += self.offset[segments][:, None, :]
+        rows = self.target_rows[samples]
+        y = self.values[rows, self.target] * self.scale[segments, self.target] + self.offset[segments, self.target]
+        return X, y[:, None]
+
+    def batches(self, batch_size=32, samples=None, shuffle=False, seed=None):
+        """
+        Yield (X, y) batches; only one batch of windows is materialized at a time
+
+        Args:
+            batch_size (int): Samples per batch
+            samples (array): Sample positions to draw from (default all)
+            shuffle (bool): Shuffle the samples once before batching
+            seed (int): Shuffle seed
+        """
+        samples = np.arange(len(self)) if samples is None else np.asarray(samples)
+        if shuffle:
+            samples = np.random.default_rng(seed).permutation(samples)
+        for start in range(0, len(samples), batch_size):
+            yield self.batch(samples[start:start + batch_size])
+
+    def arrays(self, samples=None):
+        """
+        All windows and targets of some samples as arrays, like create_sequences(...)
+
+        Returns:
+            tuple: X (samples x seq_length x features) and y (samples x 1), scaled
+        """
+        return self.batch(np.arange(len(self)) if samples is None else np.asarray(samples))
+
+    def target_dates(self, samples=None):
+        """
+        Date of each sample's target (for indexing predictions)
+        """
+        rows = self.target_rows if samples is None else self.target_rows[samples]
+        return self.dates[rows]
+
+    def inverse_transform(self, y, samples):
+        """
+        Scaled target predictions back in price units
+
+        Args:
+            y (array): Scaled predictions, one per sample
+            samples (array): Sample positions the predictions belong to
+
+        Returns:
+            np.ndarray: Predictions in original units
+        """
+        segments = self.segments[self.starts[samples]]
+        y = np.asarray(y, dtype=np.float64).reshape(len(segments))
+        return (y - self.offset[segments, self.target]) / self.scale[segments, self.target]
@@ -0,0 +1,173 @@
+"""
+Batch stationarity tests
+Augmented Dickey-Fuller (and optionally KPSS) tests over many series at once, split
+into chunks on a process pool, returning one results table.
+
+statsmodels' adfuller with autolag fits a separate OLS regression for every candidate
+lag. All of those regressions use leading columns of the same design matrix on the
+same sample, so the fast path here forms X'X and X'y once per series and gets every
+candidate's residual sum of squares from a small solve on a sub-block. It selects the
+same lag by AIC/BIC and reproduces adfuller's statistic; p-values and critical values
+still come from statsmodels' MacKinnon tables.
+"""
+
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from numpy.lib.stride_tricks import sliding_window_view
+from statsmodels.tsa.stattools import adfuller, kpss
+from statsmodels.tsa.adfvalues import mackinnonp, mackinnoncrit
+import warnings
+warnings.filterwarnings('ignore')
+
+def _trend_columns(regression, n):
+    columns = []
+    if regression in ('c', 'ct', 'ctt'):
+        columns.append(np.ones(n))
+    if regression in ('ct', 'ctt'):
+        columns.append(np.arange(1, n + 1, dtype=np.float64))
+    if regression == 'ctt':
+        columns.append(np.arange(1, n + 1, dtype=np.float64) ** 2)
+    return columns
+
+def _adf_design(x, lags, regression, trend_first):
+    """
+    Design matrix [y(t-1), dy(t-1) .. dy(t-lags)] with the trend columns, and dy(t)
+    """
+    dx = np.diff(x)
+    n = len(dx) - lags
+    lagged_diffs = sliding_window_view(dx[:-1], lags, axis=0)[:, ::-1] if lags else np.empty((n, 0))
+    columns = [x[lags:lags + n, None], lagged_diffs[:n]]
+    trend = np.column_stack(_trend_columns(regression, n)) if regression != 'n' else np.empty((n, 0))
+    X = np.hstack([trend] + columns if trend_first else columns + [trend])
+    return X, dx[lags:]
+
+def adf_fast(x, max_lag=None, autolag='AIC', regression='c'):
+    """
+    Augmented Dickey-Fuller test, equivalent to statsmodels adfuller
+
+    Args:
+        x (array): Series without missing values
+        max_lag (int): Maximum (or, with autolag None, fixed) number of lagged differences;
+            default 12 * (nobs / 100) ** (1/4) as in adfuller
+        autolag (str): 'AIC', 'BIC' or None (use max_lag)
+        regression (str): 'c', 'ct', 'ctt' or 'n'
+
+    Returns:
+        dict: adf_statistic, p_value, used_lag, n_obs, critical_values and is_stationary
+    """
+    x = np.asarray(x, dtype=np.float64)
+    nobs = len(x)
+    n_trend = 0 if regression == 'n' else len(regression)
+    if max_lag is None:
+        max_lag = int(np.ceil(12.0 * np.power(nobs / 100.0, 1 / 4.0)))
+        max_lag = max(min(nobs // 2 - n_trend - 1, max_lag), 0)
+
+    if autolag is not None and max_lag > 0:
+        # Every candidate regression uses the leading columns of one design on one sample
+        X, y = _adf_design(x, max_lag, regression, trend_first=True)
+        n = len(y)
+        XtX, Xty, yty = X.T @ X, X.T @ y, y @ y
+        start = n_trend + 1
+        criteria = []
+        for k in range(start, start + max_lag + 1):
+            beta = np.linalg.solve(XtX[:k, :k], Xty[:k])
+            ssr = yty - beta @ Xty[:k]
+            penalty = 2 * k if autolag.upper() == 'AIC' else np.log(n) * k
+            criteria.append(n * np.log(ssr / n) + penalty)
+        used_lag = int(np.argmin(criteria))
+    else:
+        used_lag = max_lag
+
+    # Final regression with the chosen lag on the longest available sample
+    X, y = _adf_design(x, used_lag, regression, trend_first=False)
+    n, k = X.shape
+    XtX_inv = np.linalg.inv(X.T @ X)
+    beta = XtX_inv @ (X.T @ y)
+    residuals = y - X @ beta
+    sigma2 = residuals @ residuals / (n - k)
+    statistic = beta[0] / np.sqrt(sigma2 * XtX_inv[0, 0])
+
+    critical = mackinnoncrit(N=1, regression=regression, nobs=n)
+    p_value = mackinnonp(statistic, regression=regression, N=1)
+    return {
+        'adf_statistic': statistic,
+        'p_value': p_value,
+        'used_lag': used_lag,
+        'n_obs': n,
+        'critical_values': {'1%': critical[0], '5%': critical[1], '10%': critical[2]},
+        'is_stationary': p_value <= 0.05
+    }
+
+def _test_chunk(chunk, max_lag, autolag, regression, method, run_kpss):
+    """
+    Test a list of (name, values) pairs (runs in a worker process)
+    """
+    rows = []
+    for name, values in chunk:
+        if method == 'fast':
+            adf = adf_fast(values, max_lag, autolag, regression)
+        else:
+            statistic, p_value, used_lag, n_obs, critical, *_ = adfuller(
+                values, maxlag=max_lag, autolag=autolag, regression=regression)
+            adf = {'adf_statistic': statistic, 'p_value': p_value, 'used_lag': used_lag,
+                   'n_obs': n_obs, 'critical_values': critical}
+        row = {
+            'Series': name,
+            'ADF Statistic': adf['adf_statistic'],
+            'ADF P-Value': adf['p_value'],
+            'ADF Lags': adf['used_lag'],
+            'N Obs': adf['n_obs'],
+            'Critical 1%': adf['critical_values']['1%'],
+            'Critical 5%': adf['critical_values']['5%'],
+            'Critical 10%': adf['critical_values']['10%'],
+            'ADF Stationary': adf['p_value'] <= 0.05
+        }
+        if run_kpss:
+            # KPSS has the opposite null: the series is (trend) stationary
+            statistic, p_value, lags, _ = kpss(values, regression='ct' if regression == 'ct' else 'c', nlags='auto')
+            row.update({'KPSS Statistic': statistic, 'KPSS P-Value': p_value, 'KPSS Lags': lags,
+                        'KPSS Stationary': p_value > 0.05})
+        rows.append(row)
+    return rows
+
+def stationarity_tests(series, max_lag=None, autolag='AIC', regression='c', method='fast',
+                       run_kpss=False, max_workers=None, chunk_size=50):
+    """
+    ADF (and optionally KPSS) tests for many series
+
+    Args:
+        series (dict or pd.DataFrame): Series per name, or a DataFrame with one column
+            per series (missing values are dropped per series)
+        max_lag (int): Maximum lag, or the fixed lag when autolag is None
+        autolag (str): 'AIC', 'BIC' or None for the fixed-lag path
+        regression (str): Deterministic terms: 'c', 'ct', 'ctt' or 'n'
+        method (str): 'fast' (shared design matrix) or 'statsmodels' (adfuller)
+        run_kpss (bool): Also run the KPSS test
+        max_workers (int): Worker processes (default os.cpu_count(); a single chunk
+            runs in this process)
+        chunk_size (int): Series per task
+
+    Returns:
+        pd.DataFrame: One row per series, indexed by name
+    """
+    if method not in ('fast', 'statsmodels'):
+        raise ValueError(f"Unknown method: {method}")
+    items = series.items() if isinstance(series, (dict, pd.DataFrame)) else enumerate(series)
+    pairs = [(name, pd.Series(values).dropna().to_numpy(dtype=np.float64)) for name, values in items]
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+    options = (max_lag, autolag, regression, method, run_kpss)
+
+    if len(chunks) <= 1 or max_workers == 1:
+        rows = [row for chunk in chunks for row in _test_chunk(chunk, *options)]
+    else:
+        # Workers start from a fresh interpreter: forking is unsafe when the caller
+        # has other threads running (e.g. a stage of the main_analysis pipeline)
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context(start_method)) as executor:
+            futures = [executor.submit(_test_chunk, chunk, *options) for chunk in chunks]
+            rows = [row for future in futures for row in future.result()]
+
+    return pd.DataFrame(rows).set_index('Series') if rows else pd.DataFrame()
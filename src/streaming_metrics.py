@@ -0,0 +1,314 @@
+"""
+Streaming risk metrics
+Online accumulators that are fed one bar at a time and keep O(1) state per ticker,
+so a long-running process can publish current risk metrics for thousands of tickers
+without recomputing from the full history.
+
+Every accumulator is vectorized across tickers: update() takes one value per ticker
+(NaN means "no new bar for this ticker") and updates all of them with array operations.
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import ANALYSIS_CONFIG
+
+
+class RunningMoments:
+    """
+    Running mean and variance per ticker (Welford's algorithm)
+    """
+
+    def __init__(self, n_tickers):
+        self.count = np.zeros(n_tickers)
+        self.mean = np.zeros(n_tickers)
+        self.m2 = np.zeros(n_tickers)
+
+    def update(self, values):
+        """
+        Add one observation per ticker (NaN skips that ticker)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        active = ~np.isnan(values)
+        self.count[active] += 1
+        delta = values[active] - self.mean[active]
+        self.mean[active] += delta / self.count[active]
+        self.m2[active] += delta * (values[active] - self.mean[active])
+
+    @property
+    def variance(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def sharpe_ratio(self, risk_free_rate=0.03/252):
+        """
+        Per-period Sharpe ratio, as utils.calculate_sharpe_ratio
+        """
+        std = self.std
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(std == 0, 0.0, (self.mean - risk_free_rate) / std)
+
+
+class RunningDrawdown:
+    """
+    Running peak, current drawdown and maximum drawdown per ticker
+    """
+
+    def __init__(self, n_tickers, from_prices=False):
+        """
+        Args:
+            n_tickers (int): Number of tickers
+            from_prices (bool): update() receives prices instead of returns
+        """
+        self.from_prices = from_prices
+        self.level = np.full(n_tickers, np.nan if from_prices else 1.0)
+        self.peak = self.level.copy()
+        self.max_drawdown = np.zeros(n_tickers)
+
+    def update(self, values):
+        """
+        Add one return (or price) per ticker (NaN skips that ticker)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        active = ~np.isnan(values)
+        if self.from_prices:
+            self.level[active] = values[active]
+        else:
+            self.level[active] *= 1 + values[active]
+        self.peak[active] = np.fmax(self.peak[active], self.level[active])
+        self.max_drawdown[active] = np.minimum(self.max_drawdown[active], self.drawdown[active])
+
+    @property
+    def drawdown(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.level / self.peak - 1
+
+
+class EWMAVolatility:
+    """
+    Exponentially weighted volatility per ticker (RiskMetrics recursion)
+    """
+
+    def __init__(self, n_tickers, decay=0.94):
+        """
+        Args:
+            n_tickers (int): Number of tickers
+            decay (float): Weight on the previous variance (0.94 is the RiskMetrics daily value)
+        """
+        self.decay = decay
+        self.variance = np.full(n_tickers, np.nan)
+
+    def update(self, values):
+        """
+        Add one return per ticker (NaN skips that ticker); the first return seeds the variance
+        """
+        values = np.asarray(values, dtype=np.float64)
+        active = ~np.isnan(values)
+        squared = values[active] ** 2
+        previous = self.variance[active]
+        self.variance[active] = np.where(np.isnan(previous), squared,
+                                         self.decay * previous + (1 - self.decay) * squared)
+
+    @property
+    def volatility(self):
+        return np.sqrt(self.variance)
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate per ticker with the P-squared algorithm (Jain & Chlamtac, 1985)
+
+    Keeps five markers per ticker whatever the stream length. The first five observations
+    are buffered and answered exactly.
+    """
+
+    def __init__(self, n_tickers, quantile=0.05):
+        p = quantile
+        self.quantile = quantile
+        self.count = np.zeros(n_tickers, dtype=np.int64)
+        self.heights = np.full((n_tickers, 5), np.nan)
+        self.positions = np.tile(np.arange(5, dtype=np.float64), (n_tickers, 1))
+        self.desired = np.tile(np.array([0, 2 * p, 4 * p, 2 + 2 * p, 4]), (n_tickers, 1))
+        self.increments = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    def update(self, values):
+        """
+        Add one observation per ticker (NaN skips that ticker)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        active = ~np.isnan(values)
+
+        # Warm-up: buffer the first five observations, sorted once the buffer is full
+        warming = active & (self.count < 5)
+        if warming.any():
+            rows = np.flatnonzero(warming)
+            self.heights[rows, self.count[rows]] = values[rows]
+            self.count[rows] += 1
+            full = rows[self.count[rows] == 5]
+            self.heights[full] = np.sort(self.heights[full], axis=1)
+
+        rows = np.flatnonzero(active & ~warming)
+        if len(rows) == 0:
+            return
+        self.count[rows] += 1
+        x = values[rows]
+        q = self.heights[rows]
+        n = self.positions[rows]
+        desired = self.desired[rows] + self.increments
+
+        # Extend the extreme markers and find the cell each observation falls in
+        q[:, 0] = np.minimum(q[:, 0], x)
+        q[:, 4] = np.maximum(q[:, 4], x)
+        cell = (x[:, None] >= q[:, 1:4]).sum(axis=1)
+        n += np.arange(5) > cell[:, None]
+
+        # Move the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = desired[:, i] - n[:, i]
+            move = ((d >= 1) & (n[:, i + 1] - n[:, i] > 1)) | ((d <= -1) & (n[:, i - 1] - n[:, i] < -1))
+            if not move.any():
+                continue
+            step = np.sign(d[move])
+            qm, nm = q[move], n[move]
+            parabolic = qm[:, i] + step / (nm[:, i + 1] - nm[:, i - 1]) * (
+                (nm[:, i] - nm[:, i - 1] + step) * (qm[:, i + 1] - qm[:, i]) / (nm[:, i + 1] - nm[:, i])
+                + (nm[:, i + 1] - nm[:, i] - step) * (qm[:, i] - qm[:, i - 1]) / (nm[:, i] - nm[:, i - 1])
+            )
+            neighbour = i + step.astype(np.int64)
+            idx = np.arange(len(step))
+            linear = qm[:, i] + step * (qm[idx, neighbour] - qm[:, i]) / (nm[idx, neighbour] - nm[:, i])
+            inside = (qm[:, i - 1] < parabolic) & (parabolic < qm[:, i + 1])
+            qm[:, i] = np.where(inside, parabolic, linear)
+            nm[:, i] += step
+            q[move], n[move] = qm, nm
+
+        self.heights[rows] = q
+        self.positions[rows] = n
+        self.desired[rows] = desired
+
+    @property
+    def value(self):
+        """
+        Current quantile estimate per ticker (exact while fewer than five observations)
+        """
+        estimate = self.heights[:, 2].copy()
+        for k in range(1, 5):
+            rows = self.count == k
+            if rows.any():
+                estimate[rows] = np.percentile(self.heights[rows, :k], self.quantile * 100, axis=1)
+        estimate[self.count == 0] = np.nan
+        return estimate
+
+
+class StreamingTailRisk:
+    """
+    Streaming historical VaR and CVaR per ticker
+
+    VaR is the P-squared estimate of the return quantile. CVaR is the running mean of
+    the returns that fell at or below the VaR estimate current at the time they
+    arrived, which converges to the exact CVaR as the estimate settles.
+    """
+
+    def __init__(self, n_tickers, confidence_level=0.05):
+        self.quantile = P2Quantile(n_tickers, confidence_level)
+        self.tail_sum = np.zeros(n_tickers)
+        self.tail_count = np.zeros(n_tickers)
+
+    def update(self, values):
+        """
+        Add one return per ticker (NaN skips that ticker)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.quantile.update(values)
+        with np.errstate(invalid='ignore'):
+            in_tail = values <= self.quantile.value
+        self.tail_sum[in_tail] += values[in_tail]
+        self.tail_count[in_tail] += 1
+
+    @property
+    def var(self):
+        return -self.quantile.value
+
+    @property
+    def cvar(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.tail_count > 0, -self.tail_sum / self.tail_count, np.nan)
+
+
+class StreamingRiskMonitor:
+    """
+    Live risk metrics for a ticker universe, updated one bar at a time
+
+    Example:
+        monitor = StreamingRiskMonitor(['TSLA', 'BND', 'SPY'])
+        for date, row in returns.iterrows():
+            monitor.update(row)
+        print(monitor.snapshot())
+    """
+
+    def __init__(self, tickers, confidence_levels=(0.05, 0.01), ewma_decay=0.94,
+                 risk_free_rate=None, periods_per_year=None):
+        """
+        Args:
+            tickers (list): Ticker symbols, in the order update() values are given
+            confidence_levels (tuple): VaR/CVaR levels
+            ewma_decay (float): Decay for the EWMA volatility
+            risk_free_rate (float): Annual risk-free rate (default ANALYSIS_CONFIG)
+            periods_per_year (int): Bars per year for annualizing (default trading days)
+        """
+        self.tickers = list(tickers)
+        n = len(self.tickers)
+        self.periods_per_year = periods_per_year or ANALYSIS_CONFIG['trading_days_per_year']
+        annual_rate = ANALYSIS_CONFIG['risk_free_rate'] if risk_free_rate is None else risk_free_rate
+        self.risk_free_rate = annual_rate / self.periods_per_year
+
+        self.moments = RunningMoments(n)
+        self.drawdown = RunningDrawdown(n)
+        self.ewma = EWMAVolatility(n, ewma_decay)
+        self.tails = {q: StreamingTailRisk(n, q) for q in confidence_levels}
+
+    def update(self, returns):
+        """
+        Feed one bar of returns
+
+        Args:
+            returns (array-like, pd.Series or dict): One return per ticker; a Series or
+                dict is matched by ticker and missing tickers are skipped
+        """
+        if isinstance(returns, (pd.Series, dict)):
+            returns = pd.Series(returns).reindex(self.tickers).to_numpy(dtype=np.float64)
+        values = np.asarray(returns, dtype=np.float64)
+
+        self.moments.update(values)
+        self.drawdown.update(values)
+        self.ewma.update(values)
+        for tail in self.tails.values():
+            tail.update(values)
+
+    def snapshot(self):
+        """
+        Current metrics for every ticker
+
+        Returns:
+            pd.DataFrame: Metrics per ticker, in the units of utils.create_summary_table
+        """
+        root = np.sqrt(self.periods_per_year)
+        metrics = {
+            'Observations': self.moments.count.astype(np.int64),
+            'Annual Return (%)': self.moments.mean * self.periods_per_year * 100,
+            'Annual Volatility (%)': self.moments.std * root * 100,
+            'EWMA Volatility (%)': self.ewma.volatility * root * 100,
+            'Sharpe Ratio': self.moments.sharpe_ratio(self.risk_free_rate) * root,
+        }
+        for q, tail in self.tails.items():
+            metrics[f'Daily VaR {q*100:g}% (%)'] = tail.var * 100
+        for q, tail in self.tails.items():
+            metrics[f'Daily CVaR {q*100:g}% (%)'] = tail.cvar * 100
+        metrics['Current Drawdown (%)'] = self.drawdown.drawdown * 100
+        metrics['Max Drawdown (%)'] = self.drawdown.max_drawdown * 100
+
+        return pd.DataFrame(metrics, index=self.tickers)
@@ -0,0 +1,162 @@
+"""
+Backtest parameter sweeps
+Runs a grid of weight vectors x rebalance frequencies x lookback windows through
+backtest.backtest on a process pool and gathers calculate_metrics for every scenario
+into one tidy table.
+
+The returns matrix and the weight vectors are placed in shared memory once; workers
+attach to them by name instead of receiving a pickled copy with every task. Finished
+scenarios are appended to a CSV file as they complete, so an interrupted sweep resumes
+where it stopped.
+"""
+
+import os
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from backtest import backtest, calculate_metrics
+import warnings
+warnings.filterwarnings('ignore')
+
+# Shared arrays attached by each worker process (name -> (SharedMemory, ndarray))
+_shared = {}
+
+def _share(array):
+    """
+    Copy an array into a new shared memory block
+
+    Returns:
+        tuple: (SharedMemory, spec dict used by workers to attach)
+    """
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, {'name': block.name, 'shape': array.shape, 'dtype': array.dtype.str}
+
+def _attach(spec):
+    block = shared_memory.SharedMemory(name=spec['name'])
+    return block, np.ndarray(spec['shape'], dtype=np.dtype(spec['dtype']), buffer=block.buf)
+
+def _init_worker(specs, dates, assets):
+    """
+    Attach the shared returns and weights once per worker process
+    """
+    for key, spec in specs.items():
+        _shared[key] = _attach(spec)
+    _shared['dates'] = pd.DatetimeIndex(dates)
+    _shared['assets'] = assets
+
+def _run_scenarios(scenarios, risk_free_rate, initial_value, backtest_options):
+    """
+    Backtest a batch of scenarios in a worker against the shared arrays
+    """
+    _, returns = _shared['returns']
+    _, weights = _shared['weights']
+    dates, assets = _shared['dates'], _shared['assets']
+
+    rows = []
+    for scenario in scenarios:
+        start = 0 if scenario['lookback'] is None else max(len(dates) - scenario['lookback'], 0)
+        window = pd.DataFrame(returns[start:], index=dates[start:], columns=assets, copy=False)
+        result = backtest(window, weights[scenario['weight_index']], scenario['rebalance_freq'],
+                          initial_value=initial_value, **backtest_options)
+        row = {key: scenario[key] for key in ('scenario_id', 'weights', 'rebalance_freq', 'lookback')}
+        row.update(calculate_metrics(result, risk_free_rate))
+        rows.append(row)
+    return rows
+
+def scenario_grid(weight_sets, rebalance_freqs=('M',), lookbacks=(None,)):
+    """
+    Every combination of weight set, rebalance frequency and lookback window
+
+    Args:
+        weight_sets (dict): Weight vector (dict, Series or array) per name
+        rebalance_freqs (list): Rebalance frequencies (None = buy and hold)
+        lookbacks (list): Backtest lengths in trading days, counted back from the
+            last date (None = full history)
+
+    Returns:
+        list: Scenario dicts with a stable scenario_id
+    """
+    scenarios = []
+    for (index, name), freq, lookback in itertools.product(enumerate(weight_sets), rebalance_freqs, lookbacks):
+        scenarios.append({
+            'scenario_id': f"{name}|{freq}|{lookback}",
+            'weights': name,
+            'weight_index': index,
+            'rebalance_freq': freq,
+            'lookback': lookback
+        })
+    return scenarios
+
+def run_sweep(returns, weight_sets, rebalance_freqs=('M',), lookbacks=(None,), results_path=None,
+              max_workers=None, chunk_size=50, risk_free_rate=0.045, initial_value=100000,
+              backtest_options=None):
+    """
+    Backtest a grid of scenarios in parallel
+
+    Args:
+        returns (pd.DataFrame): Daily asset returns, dates x assets
+        weight_sets (dict): Weight vector (dict, Series or array) per name
+        rebalance_freqs (list): Rebalance frequencies (None = buy and hold)
+        lookbacks (list): Backtest lengths in trading days (None = full history)
+        results_path (str): CSV file that finished scenarios are appended to; scenarios
+            already in it are skipped, so rerunning resumes an interrupted sweep
+        max_workers (int): Worker processes (default os.cpu_count())
+        chunk_size (int): Scenarios per task
+        risk_free_rate (float): Annual risk-free rate for the Sharpe ratio
+        initial_value (float): Starting portfolio value
+        backtest_options (dict): Extra backtest() arguments shared by all scenarios,
+            e.g. cost_rate, slippage or no_trade_band
+
+    Returns:
+        pd.DataFrame: One row per scenario of the grid - weights, rebalance_freq,
+            lookback and the calculate_metrics columns - indexed by scenario_id
+    """
+    scenarios = scenario_grid(weight_sets, rebalance_freqs, lookbacks)
+    order = [s['scenario_id'] for s in scenarios]
+
+    done = pd.DataFrame()
+    if results_path and os.path.exists(results_path):
+        done = pd.read_csv(results_path)
+        completed = set(done['scenario_id'])
+        scenarios = [s for s in scenarios if s['scenario_id'] not in completed]
+        print(f"Resuming sweep: {len(completed)} scenarios done, {len(scenarios)} to run")
+
+    rows = []
+    if scenarios:
+        assets = list(returns.columns)
+        weight_matrix = np.array([
+            pd.Series(w, dtype=np.float64).reindex(assets).fillna(0).to_numpy()
+            if isinstance(w, (dict, pd.Series)) else np.asarray(w, dtype=np.float64)
+            for w in weight_sets.values()
+        ])
+        blocks, specs = {}, {}
+        try:
+            for key, array in (('returns', returns.to_numpy(dtype=np.float64)), ('weights', weight_matrix)):
+                blocks[key], specs[key] = _share(array)
+
+            chunks = [scenarios[i:i + chunk_size] for i in range(0, len(scenarios), chunk_size)]
+            print(f"Running {len(scenarios)} scenarios in {len(chunks)} tasks...")
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(specs, returns.index.asi8, assets)) as executor:
+                futures = [executor.submit(_run_scenarios, chunk, risk_free_rate, initial_value,
+                                           backtest_options or {})
+                           for chunk in chunks]
+                for future in as_completed(futures):
+                    chunk_rows = future.result()
+                    rows.extend(chunk_rows)
+                    if results_path:
+                        pd.DataFrame(chunk_rows).to_csv(results_path, mode='a', index=False,
+                                                        header=not os.path.exists(results_path))
+        finally:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+
+    # One row per scenario of this grid, in grid order
+    results = pd.concat([done, pd.DataFrame(rows)], ignore_index=True)
+    results = results.drop_duplicates('scenario_id', keep='last').set_index('scenario_id')
+    return results.loc[order]
@@ -0,0 +1,88 @@
+"""
+Regression tests for the vectorized backtest engine against a per-day loop
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from backtest import backtest, rebalance_schedule, simulate_portfolio, calculate_metrics
+
+def _returns(n_days=300, n_assets=4, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2022-01-03', periods=n_days)
+    return pd.DataFrame(rng.normal(0.0004, 0.015, (n_days, n_assets)), index=dates,
+                        columns=[f'A{i}' for i in range(n_assets)])
+
+def _naive_backtest(returns, target, rebalance_positions, threshold=None, cost_rate=0.0,
+                    initial_value=100000):
+    """
+    One step per day, as the notebook's iterrows simulate_portfolio
+    """
+    target = np.asarray(target, dtype=np.float64) / np.sum(target)
+    weights = target.copy()
+    value = initial_value
+    values = []
+    for t, daily in enumerate(returns.fillna(0).to_numpy()):
+        value *= 1 + weights @ daily
+        weights = weights * (1 + daily)
+        weights /= weights.sum()
+        breached = threshold is not None and np.abs(weights - target).max() > threshold
+        if (t in rebalance_positions or breached) and t < len(returns) - 1:
+            value -= cost_rate * np.abs(target - weights).sum() * value
+            weights = target.copy()
+        values.append(value)
+    return np.array(values)
+
+def test_calendar_rebalance_matches_daily_loop():
+    returns = _returns()
+    target = [0.4, 0.3, 0.2, 0.1]
+    result = backtest(returns, target, rebalance_freq='M')
+    expected = _naive_backtest(returns, target, set(rebalance_schedule(returns.index, 'M')))
+    np.testing.assert_allclose(result['values'], expected, rtol=1e-10)
+
+def test_block_size_does_not_change_result():
+    returns = _returns()
+    target = [0.25, 0.25, 0.25, 0.25]
+    full = backtest(returns, target, rebalance_freq='Q')
+    blocked = backtest(returns, target, rebalance_freq='Q', block_size=7)
+    np.testing.assert_allclose(blocked['values'], full['values'], rtol=1e-12)
+    np.testing.assert_allclose(blocked['weights'], full['weights'], rtol=1e-12)
+
+def test_threshold_rebalance_matches_daily_loop():
+    returns = _returns(seed=1)
+    target = [0.5, 0.2, 0.2, 0.1]
+    result = backtest(returns, target, rebalance_freq=None, threshold=0.02)
+    expected = _naive_backtest(returns, target, set(), threshold=0.02)
+    np.testing.assert_allclose(result['values'], expected, rtol=1e-10)
+
+def test_proportional_costs_match_daily_loop():
+    returns = _returns(seed=2)
+    target = [0.4, 0.3, 0.2, 0.1]
+    result = backtest(returns, target, rebalance_freq='M', cost_rate=0.001)
+    expected = _naive_backtest(returns, target, set(rebalance_schedule(returns.index, 'M')),
+                               cost_rate=0.001)
+    np.testing.assert_allclose(result['values'], expected, rtol=1e-10)
+    assert result['costs'].sum() > 0
+
+def test_weights_sum_to_one_with_no_trade_band():
+    returns = _returns(seed=3)
+    result = backtest(returns, [0.0, 0.5, 0.3, 0.2], rebalance_freq='M', no_trade_band=0.01)
+    np.testing.assert_allclose(result['weights'].sum(axis=1), 1.0, rtol=1e-12)
+
+def test_simulate_portfolio_drop_in():
+    returns = _returns()
+    weights = {'A0': 0.6, 'A2': 0.4}
+    frame, history = simulate_portfolio(returns, weights)
+    expected = _naive_backtest(returns, [0.6, 0, 0.4, 0], set(rebalance_schedule(returns.index, 'M')))
+    np.testing.assert_allclose(frame['Portfolio_Value'].to_numpy(), expected, rtol=1e-10)
+    assert len(history) == len(rebalance_schedule(returns.index, 'M'))
+    assert history[0]['A0'] == pytest.approx(0.6)
+
+def test_calculate_metrics_frame_and_dict_agree():
+    returns = _returns()
+    result = backtest(returns, [0.25] * 4)
+    from_dict = calculate_metrics(result)
+    frame, _ = simulate_portfolio(returns, [0.25] * 4)
+    from_frame = calculate_metrics(frame)
+    for key in from_frame:
+        assert from_frame[key] == pytest.approx(from_dict[key], rel=1e-9)
@@ -0,0 +1,96 @@
+"""
+Regression tests for the covariance estimators against pandas and direct formulas
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from covariance import (sample_covariance, ledoit_wolf_covariance, ewma_covariance, factor_covariance,
+                        nearest_psd, estimate_covariance, pairwise_covariance, pairwise_correlation)
+
+def _returns(n_days=400, n_assets=6, seed=0):
+    rng = np.random.default_rng(seed)
+    mixing = rng.normal(size=(n_assets, n_assets)) / n_assets
+    values = rng.normal(0.0005, 0.01, (n_days, n_assets)) @ (np.eye(n_assets) + mixing)
+    return pd.DataFrame(values, index=pd.bdate_range('2021-01-04', periods=n_days),
+                        columns=[f'T{i}' for i in range(n_assets)])
+
+def test_sample_covariance_matches_pandas():
+    returns = _returns()
+    np.testing.assert_allclose(sample_covariance(returns).values, returns.cov().values * 252, rtol=1e-10)
+
+def test_ledoit_wolf_matches_direct_formula():
+    returns = _returns(n_days=60, n_assets=10)
+    X = returns.values - returns.values.mean(axis=0)
+    n_obs, n_assets = X.shape
+    sample = X.T @ X / n_obs
+    target = np.trace(sample) / n_assets
+    delta = np.sum((sample - target * np.eye(n_assets)) ** 2) / n_assets
+    beta = sum(np.sum((np.outer(x, x) - sample) ** 2) for x in X) / (n_assets * n_obs ** 2)
+    shrinkage = min(beta, delta) / delta
+    expected = (1 - shrinkage) * sample + shrinkage * target * np.eye(n_assets)
+
+    result = ledoit_wolf_covariance(returns)
+    assert result.attrs['shrinkage'] == pytest.approx(shrinkage, rel=1e-10)
+    np.testing.assert_allclose(result.values, expected * 252, rtol=1e-10)
+
+def test_ewma_matches_weighted_loop():
+    returns = _returns(n_days=100, n_assets=3)
+    values = returns.values
+    weights = np.array([0.94 ** (len(values) - 1 - t) for t in range(len(values))])
+    weights /= weights.sum()
+    mean = sum(w * x for w, x in zip(weights, values))
+    expected = sum(w * np.outer(x - mean, x - mean) for w, x in zip(weights, values))
+    np.testing.assert_allclose(ewma_covariance(returns, decay=0.94).values, expected * 252, rtol=1e-10)
+
+def test_factor_covariance_products_match_dense():
+    returns = _returns()
+    cov = factor_covariance(returns, n_factors=2)
+    dense = cov.to_dense().values
+    weights = np.random.default_rng(1).dirichlet(np.ones(returns.shape[1]), size=5)
+    np.testing.assert_allclose(cov @ weights[0], dense @ weights[0], rtol=1e-10)
+    np.testing.assert_allclose(cov.quad_form(weights), np.einsum('ij,jk,ik->i', weights, dense, weights),
+                               rtol=1e-10)
+    np.testing.assert_allclose(cov.diagonal(), np.diag(dense), rtol=1e-10)
+    # The specific variances make up the rest of each asset's sample variance
+    np.testing.assert_allclose(cov.diagonal(), returns.var().values * 252, rtol=1e-8)
+
+def test_full_rank_factor_model_is_sample_covariance():
+    returns = _returns()
+    cov = factor_covariance(returns, n_factors=returns.shape[1])
+    np.testing.assert_allclose(cov.to_dense().values, returns.cov().values * 252, atol=1e-9)
+
+def test_nearest_psd_keeps_diagonal_and_fixes_eigenvalues():
+    matrix = np.array([[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]])
+    repaired = nearest_psd(matrix)
+    np.testing.assert_allclose(np.diag(repaired), 1.0)
+    assert np.linalg.eigvalsh(repaired).min() >= -1e-12
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        estimate_covariance(_returns(), method='robust')
+
+def _ragged_returns():
+    returns = _returns(n_days=300, n_assets=5, seed=2)
+    returns.iloc[:120, 1] = np.nan           # listed later
+    returns.iloc[250:, 3] = np.nan           # delisted
+    returns.iloc[::7, 4] = np.nan            # scattered gaps
+    returns.iloc[:295, 0] = np.nan           # too few common dates with most tickers
+    return returns
+
+def test_pairwise_covariance_matches_pandas():
+    returns = _ragged_returns()
+    expected = returns.cov(min_periods=10) * 252
+    result = pairwise_covariance(returns, min_periods=10, psd=False)
+    np.testing.assert_allclose(result.values, expected.values, rtol=1e-9, atol=1e-14)
+    assert result.isna().equals(expected.isna())
+
+def test_pairwise_correlation_matches_pandas():
+    returns = _ragged_returns()
+    expected = returns.corr(min_periods=10)
+    result = pairwise_correlation(returns, min_periods=10)
+    np.testing.assert_allclose(result.values, expected.values, rtol=1e-9, atol=1e-12)
+
+def test_pairwise_covariance_repair_is_psd():
+    result = pairwise_covariance(_ragged_returns(), min_periods=10)
+    assert np.linalg.eigvalsh(result.values).min() >= -1e-12
@@ -0,0 +1,37 @@
+"""
+Regression tests for the lazy legacy data variables
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import data_definition
+
+class FakeProvider:
+    """
+    Ticker.history-shaped frames: tz-aware dates, nothing for unknown tickers
+    """
+    def fetch(self, ticker, start_date, end_date):
+        if ticker != 'TSLA':
+            return pd.DataFrame()
+        index = pd.bdate_range('2024-01-02', periods=10, tz='America/New_York', name='Date')
+        close = np.linspace(100, 110, 10)
+        return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000}, index=index)
+
+@pytest.fixture
+def provider():
+    data_definition.set_provider(FakeProvider())
+    yield
+    data_definition.set_provider(None)
+
+def test_legacy_variables_keep_the_download_shape(provider):
+    df_tsla = data_definition.df_tsla
+    assert 'Ticker' not in df_tsla.columns
+    assert df_tsla.index.tz is None
+    assert df_tsla.index[0] == pd.Timestamp('2024-01-02')
+    assert len(data_definition.df_tsla_returns) == 9
+
+def test_missing_ticker_gives_an_empty_frame(provider):
+    assert data_definition.get_prices('BND').empty
+    assert data_definition.get_returns('BND').empty
+    assert set(data_definition.df) == set(data_definition.TICKERS)
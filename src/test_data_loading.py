@@ -0,0 +1,70 @@
+"""
+Regression tests for the incremental refresh of the price store
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from data_loading import refresh_assets, compute_derived_columns, DERIVED_COLUMNS
+from price_store import load_prices, has_ticker
+
+class FakeProvider:
+    """
+    Serves slices of fixed histories and records the requested start dates
+    """
+    def __init__(self, history):
+        self.history = history
+        self.requests = []
+
+    def fetch(self, ticker, start_date, end_date):
+        self.requests.append((ticker, start_date))
+        data = self.history[ticker]
+        return data[(data.index >= start_date) & (data.index < end_date)].copy()
+
+def _history(periods=60, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2024-01-02', periods=periods, name='Date')
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, periods))
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                         'Volume': rng.integers(1_000, 10_000, periods)}, index=index)
+
+def _expected(history):
+    expected = history.copy()
+    expected[DERIVED_COLUMNS] = compute_derived_columns(history['Close'])
+    return expected
+
+def test_refresh_fetches_new_tickers_then_only_new_rows(tmp_path):
+    folder = str(tmp_path)
+    history = _history()
+    end = '2024-12-31'
+    provider = FakeProvider({'AAA': history.iloc[:40]})
+    assert refresh_assets(['AAA'], '2024-01-01', end, provider=provider, folder=folder) == {'AAA': 40}
+    provider.history = {'AAA': history}
+    assert refresh_assets(['AAA'], '2024-01-01', end, provider=provider, folder=folder) == {'AAA': 20}
+    assert provider.requests[-1] == ('AAA', (history.index[39] + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+    stored = load_prices('AAA', folder)
+    pd.testing.assert_frame_equal(stored, _expected(history), check_freq=False)
+    # Nothing new: no rows appended and no error
+    assert refresh_assets(['AAA'], '2024-01-01', end, provider=provider, folder=folder) == {'AAA': 0}
+
+def test_legacy_csv_is_migrated_before_refresh(tmp_path):
+    folder = str(tmp_path)
+    history = _history()
+    history.iloc[:45].to_csv(os.path.join(folder, 'AAA_data.csv'))
+    provider = FakeProvider({'AAA': history})
+    assert refresh_assets(['AAA'], '2024-01-01', '2024-12-31', provider=provider, folder=folder) == {'AAA': 15}
+    # Only the dates after the CSV's last row were requested
+    assert provider.requests == [('AAA', (history.index[44] + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))]
+    assert has_ticker('AAA', folder)
+    stored = load_prices('AAA', folder)
+    np.testing.assert_allclose(stored['Close'].values, history['Close'].values)
+    np.testing.assert_allclose(stored[DERIVED_COLUMNS].values, _expected(history)[DERIVED_COLUMNS].values)
+
+def test_new_ticker_without_data_is_reported(tmp_path, capsys):
+    provider = FakeProvider({'AAA': _history().iloc[:0]})
+    assert refresh_assets(['AAA'], '2024-01-01', '2024-12-31', provider=provider,
+                          folder=str(tmp_path)) == {'AAA': 0}
+    assert 'Failed to refresh AAA' in capsys.readouterr().out
+    with pytest.raises(FileNotFoundError):
+        load_prices('AAA', str(tmp_path))
@@ -0,0 +1,55 @@
+"""
+Regression tests for the single-fit rolling-origin ARIMA evaluation against per-origin forecasts
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.arima.model import ARIMA
+from forecasting import rolling_origin_forecast, forecast_metrics, series_hash
+
+def _prices(periods=260, tz=None, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2023-06-01', periods=periods, tz=tz)
+    return pd.Series(200 + np.cumsum(rng.normal(0.1, 2.0, periods)), index=index, name='Close')
+
+def test_rolling_origin_matches_per_origin_forecasts():
+    series = _prices()
+    result = rolling_origin_forecast(series, order=(1, 1, 1), train_end=220, horizons=(1, 3, 5), verbose=False)
+    fitted = ARIMA(series.iloc[:220], order=(1, 1, 1)).fit()
+    forecasts = result['forecasts']
+    assert len(forecasts) == len(series) - 220
+    for row, origin in enumerate(range(219, len(series) - 1)):
+        # Same parameters, observations up to the origin only
+        expected = fitted.apply(series.iloc[:origin + 1]).forecast(5).to_numpy()
+        for column, h in enumerate((1, 3, 5)):
+            if origin + h < len(series):
+                assert forecasts.iloc[row, column] == pytest.approx(expected[h - 1], rel=1e-8)
+                assert result['actuals'].iloc[row, column] == series.iloc[origin + h]
+            else:
+                assert np.isnan(forecasts.iloc[row, column])
+    np.testing.assert_allclose(result['params'], fitted.params)
+
+def test_train_end_date_and_count_agree():
+    series = _prices(tz='America/New_York')
+    split_date = series.index[200]
+    by_date = rolling_origin_forecast(series, train_end=str(split_date.date()), horizons=(1,), verbose=False)
+    by_count = rolling_origin_forecast(series, train_end=200, horizons=(1,), verbose=False)
+    pd.testing.assert_frame_equal(by_date['forecasts'], by_count['forecasts'])
+    assert by_date['forecasts'].index[0] == series.index[199]
+
+def test_train_end_must_leave_a_test_span():
+    with pytest.raises(ValueError):
+        rolling_origin_forecast(_prices(), train_end='2030-01-01', verbose=False)
+
+def test_forecast_metrics_skip_missing_values():
+    metrics = forecast_metrics([100.0, 200.0, np.nan, 50.0], [110.0, 190.0, 1.0, np.nan])
+    assert metrics['N'] == 2
+    assert metrics['MAE'] == pytest.approx(10.0)
+    assert metrics['RMSE'] == pytest.approx(10.0)
+    assert metrics['MAPE'] == pytest.approx(7.5)
+
+def test_series_hash_changes_with_appended_data():
+    series = _prices()
+    assert series_hash(series) == series_hash(series.copy())
+    assert series_hash(series) != series_hash(series.iloc[:-1])
@@ -0,0 +1,102 @@
+"""
+Regression tests for the critical line frontier against SLSQP and for the analytic
+objective gradients against finite differences
+"""
+
+import numpy as np
+import pytest
+from scipy.optimize import minimize, approx_fprime
+from covariance import FactorCovariance
+from portfolio_optimization import (critical_line, generate_efficient_frontier, optimize_portfolios,
+                                    minimize_variance, minimize_variance_gradient, negative_sharpe_ratio,
+                                    negative_sharpe_ratio_gradient, budget_constraint,
+                                    return_target_constraint)
+
+def _inputs(n_assets=6, seed=0):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n_assets, n_assets))
+    cov = factors @ factors.T / n_assets * 0.04 + np.eye(n_assets) * 0.01
+    mu = rng.uniform(0.02, 0.2, n_assets)
+    return mu, cov
+
+def _min_variance(mu, cov, target=None):
+    n_assets = len(mu)
+    constraints = [budget_constraint(n_assets)]
+    if target is not None:
+        constraints.append({'type': 'eq', 'fun': lambda w: mu @ w - target})
+    result = minimize(minimize_variance, np.full(n_assets, 1 / n_assets), args=(mu, cov), method='SLSQP',
+                      bounds=[(0, 1)] * n_assets, constraints=constraints,
+                      options={'ftol': 1e-12, 'maxiter': 500})
+    return result.x
+
+def test_critical_line_ends_at_max_return_and_min_variance():
+    mu, cov = _inputs()
+    lambdas, weights = critical_line(mu, cov)
+    assert lambdas[-1] == 0
+    assert np.all(np.diff(lambdas) < 0)
+    np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+    assert weights.min() >= 0
+    assert weights[0] @ mu == pytest.approx(mu.max())
+    np.testing.assert_allclose(weights[-1], _min_variance(mu, cov), atol=1e-5)
+
+def test_cla_frontier_matches_slsqp_per_target():
+    mu, cov = _inputs()
+    cla = generate_efficient_frontier(mu, cov, num_portfolios=15, method='cla')
+    for port_return, port_risk, weights in cla:
+        expected = _min_variance(mu, cov, port_return)
+        assert weights @ mu == pytest.approx(port_return)
+        assert port_risk == pytest.approx(np.sqrt(expected @ cov @ expected), rel=1e-5)
+
+def test_cla_and_slsqp_methods_agree():
+    mu, cov = _inputs(seed=1)
+    cla, diagnostics = generate_efficient_frontier(mu, cov, num_portfolios=10, method='cla',
+                                                   return_diagnostics=True)
+    slsqp = generate_efficient_frontier(mu, cov, num_portfolios=10, method='slsqp')
+    assert len(cla) == len(slsqp) == 10
+    np.testing.assert_allclose([row[1] for row in cla], [row[1] for row in slsqp], rtol=1e-4)
+    # Diagnostics rows are independent records
+    diagnostics.loc[0, 'Message'] = 'changed'
+    assert diagnostics.loc[1, 'Message'] == 'Critical line interpolation'
+
+def test_optimize_portfolios_min_variance_matches_critical_line():
+    mu, cov = _inputs(seed=2)
+    _, min_var = optimize_portfolios(mu, cov, verbose=False)
+    _, weights = critical_line(mu, cov)
+    # SLSQP stops at its default tolerance, so compare the risks rather than the weights
+    cla_variance = weights[-1] @ cov @ weights[-1]
+    assert min_var @ cov @ min_var == pytest.approx(cla_variance, rel=1e-4)
+    assert cla_variance <= min_var @ cov @ min_var + 1e-15
+
+@pytest.mark.parametrize('objective, gradient', [(negative_sharpe_ratio, negative_sharpe_ratio_gradient),
+                                                 (minimize_variance, minimize_variance_gradient)])
+def test_objective_gradients_match_finite_differences(objective, gradient):
+    mu, cov = _inputs()
+    weights = np.random.default_rng(3).dirichlet(np.ones(len(mu)))
+    numeric = approx_fprime(weights, objective, 1e-7, mu, cov)
+    np.testing.assert_allclose(gradient(weights, mu, cov), numeric, rtol=1e-4, atol=1e-6)
+
+def test_gradients_accept_factor_covariance():
+    mu, cov = _inputs()
+    rng = np.random.default_rng(4)
+    factor_cov = FactorCovariance(rng.normal(size=(len(mu), 2)) * 0.1, np.eye(2), np.full(len(mu), 0.01))
+    weights = rng.dirichlet(np.ones(len(mu)))
+    dense = factor_cov.to_dense().values
+    np.testing.assert_allclose(negative_sharpe_ratio_gradient(weights, mu, factor_cov),
+                               negative_sharpe_ratio_gradient(weights, mu, dense), rtol=1e-10)
+
+def test_constraint_jacobians():
+    mu, _ = _inputs()
+    weights = np.random.default_rng(5).dirichlet(np.ones(len(mu)))
+    target = np.array([0.1])
+    for constraint in (budget_constraint(len(mu)), return_target_constraint(mu, target)):
+        numeric = approx_fprime(weights, constraint['fun'], 1e-7)
+        np.testing.assert_allclose(constraint['jac'](weights), numeric, rtol=1e-5, atol=1e-7)
+
+def test_gradients_do_not_change_the_solution():
+    mu, cov = _inputs(seed=6)
+    sharpe_analytic, min_var_analytic = optimize_portfolios(mu, cov, use_gradients=True, verbose=False)
+    sharpe_numeric, min_var_numeric = optimize_portfolios(mu, cov, use_gradients=False, verbose=False)
+    assert negative_sharpe_ratio(sharpe_analytic, mu, cov) == pytest.approx(
+        negative_sharpe_ratio(sharpe_numeric, mu, cov), rel=1e-4)
+    assert minimize_variance(min_var_analytic, mu, cov) == pytest.approx(
+        minimize_variance(min_var_numeric, mu, cov), rel=1e-4)
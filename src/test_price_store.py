@@ -0,0 +1,83 @@
+"""
+Regression tests for the columnar price store: save, load and append round-trips
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from price_store import (save_prices, load_prices, load_assets, append_prices, last_date, has_ticker,
+                         list_tickers, migrate_csv, new_version_name, version_key)
+
+def _prices(start='2024-01-02', periods=30, tz='America/New_York', seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, periods=periods, tz=tz, name='Date')
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, periods))
+    return pd.DataFrame({'Open': close * 0.99, 'High': close * 1.01, 'Low': close * 0.98, 'Close': close,
+                         'Volume': rng.integers(1_000, 10_000, periods), 'Ticker': 'AAA'}, index=index)
+
+def test_save_load_round_trip(tmp_path):
+    data = _prices()
+    save_prices('AAA', data, str(tmp_path))
+    loaded = load_prices('AAA', str(tmp_path))
+    pd.testing.assert_frame_equal(loaded, data.drop(columns='Ticker'), check_freq=False)
+    assert loaded['Volume'].dtype == np.int64
+    assert has_ticker('AAA', str(tmp_path)) and list_tickers(str(tmp_path)) == ['AAA']
+
+def test_unsorted_input_is_stored_by_date(tmp_path):
+    data = _prices()
+    save_prices('AAA', data.iloc[::-1], str(tmp_path))
+    assert load_prices('AAA', str(tmp_path)).index.equals(data.index)
+
+def test_load_selects_columns_dates_and_last_rows(tmp_path):
+    data = _prices()
+    save_prices('AAA', data, str(tmp_path))
+    folder = str(tmp_path)
+    subset = load_prices('AAA', folder, columns=['Close'], start='2024-01-10', end='2024-01-20')
+    expected = data.loc['2024-01-10':'2024-01-20', ['Close']]
+    pd.testing.assert_frame_equal(subset, expected, check_freq=False)
+    tail = load_prices('AAA', folder, columns=['Close'], last_rows=5)
+    pd.testing.assert_frame_equal(tail, data[['Close']].iloc[-5:], check_freq=False)
+    with pytest.raises(KeyError):
+        load_prices('AAA', folder, columns=['Adj Close'])
+
+def test_naive_index_round_trip(tmp_path):
+    data = _prices(tz=None)
+    save_prices('AAA', data, str(tmp_path))
+    loaded = load_prices('AAA', str(tmp_path))
+    assert loaded.index.tz is None
+    assert loaded.index.equals(data.index)
+
+def test_append_only_adds_new_dates(tmp_path):
+    folder = str(tmp_path)
+    data = _prices(periods=40)
+    save_prices('AAA', data.iloc[:25], folder)
+    # The overlap with stored dates is dropped; rows in another timezone are converted
+    appended = append_prices('AAA', data.iloc[20:].tz_convert('UTC'), folder)
+    assert appended == 15
+    pd.testing.assert_frame_equal(load_prices('AAA', folder), data.drop(columns='Ticker'), check_freq=False)
+    assert last_date('AAA', folder) == data.index[-1]
+    assert append_prices('AAA', data.iloc[-3:], folder) == 0
+
+def test_legacy_csv_is_migrated_on_load(tmp_path):
+    folder = str(tmp_path)
+    data = _prices()
+    data.to_csv(os.path.join(folder, 'AAA_data.csv'))
+    loaded = load_assets(['AAA'], folder)['AAA']
+    np.testing.assert_allclose(loaded['Close'].values, data['Close'].values)
+    assert has_ticker('AAA', folder)
+    with pytest.raises(FileNotFoundError):
+        migrate_csv('BBB', folder)
+
+def test_save_keeps_replaced_and_newer_versions(tmp_path):
+    folder = str(tmp_path)
+    ticker_dir = os.path.join(folder, 'store', 'AAA')
+    save_prices('AAA', _prices(seed=1), folder)
+    save_prices('AAA', _prices(seed=2), folder)
+    # A version another writer is still filling must survive this save
+    pending = new_version_name()
+    os.makedirs(os.path.join(ticker_dir, pending))
+    save_prices('AAA', _prices(seed=3), folder)
+    versions = sorted((entry for entry in os.listdir(ticker_dir) if entry != 'meta.json'), key=version_key)
+    assert len(versions) == 3 and pending in versions
+    np.testing.assert_allclose(load_prices('AAA', folder)['Close'].values, _prices(seed=3)['Close'].values)
@@ -0,0 +1,65 @@
+"""
+Regression tests for ReturnsPanel alignment against the pandas concat/dropna it replaces
+"""
+
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from returns_panel import ReturnsPanel
+
+def _assets(tz='America/New_York'):
+    rng = np.random.default_rng(0)
+    assets = {}
+    for ticker, start, periods in (('AAA', '2023-01-02', 200), ('BBB', '2023-02-01', 150), ('CCC', '2023-01-02', 180)):
+        index = pd.bdate_range(start, periods=periods, tz=tz)
+        frame = pd.DataFrame({'Close': 100 * np.cumprod(1 + rng.normal(0, 0.01, periods))}, index=index)
+        frame['Daily_Return'] = frame['Close'].pct_change()
+        assets[ticker] = frame.drop(index[::17])  # scattered missing bars
+    return assets
+
+def _concat(assets):
+    return pd.concat({ticker: frame['Daily_Return'] for ticker, frame in assets.items()}, axis=1)
+
+def test_intersection_matches_concat_dropna():
+    assets = _assets()
+    panel = ReturnsPanel.from_assets(assets, policy='intersection')
+    pd.testing.assert_frame_equal(panel.frame, _concat(assets).dropna(), check_freq=False, check_names=False)
+
+def test_pairwise_matches_concat():
+    assets = _assets()
+    panel = ReturnsPanel.from_assets(assets, policy='pairwise')
+    expected = _concat(assets).dropna(how='all')
+    pd.testing.assert_frame_equal(panel.frame, expected, check_freq=False, check_names=False)
+    pd.testing.assert_frame_equal(panel.corr(), expected.corr(), check_names=False)
+
+def test_union_fills_gaps_after_first_value_only():
+    assets = _assets()
+    panel = ReturnsPanel.from_assets(assets, policy='union', ffill_limit=1)
+    frame = panel.frame
+    # Before a ticker's first return nothing is filled; single-day gaps become 0
+    assert frame['BBB'].loc[:'2023-02-01'].isna().all()
+    expected = _concat(assets).dropna(how='all')
+    filled = expected.isna() & frame.notna()
+    assert (frame[filled] == 0).sum().sum() == filled.sum().sum() > 0
+
+def test_values_are_read_only():
+    panel = ReturnsPanel.from_assets(_assets())
+    with pytest.raises(ValueError):
+        panel.values[0, 0] = 1.0
+
+def test_save_open_and_pickle_round_trip(tmp_path):
+    panel = ReturnsPanel.from_assets(_assets(), policy='pairwise')
+    saved = panel.save(str(tmp_path))
+    pd.testing.assert_frame_equal(saved.frame, panel.frame)
+    built = ReturnsPanel.from_assets(_assets(), policy='pairwise', path=str(tmp_path))
+    pd.testing.assert_frame_equal(built.frame, panel.frame)
+    restored = pickle.loads(pickle.dumps(built))
+    assert restored.path == str(tmp_path)
+    pd.testing.assert_frame_equal(restored.frame, panel.frame)
+
+def test_mixed_naive_and_aware_dates_raise():
+    assets = _assets()
+    assets['BBB'] = assets['BBB'].tz_localize(None)
+    with pytest.raises(ValueError, match='BBB'):
+        ReturnsPanel.from_assets(assets)
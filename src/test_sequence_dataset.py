@@ -0,0 +1,83 @@
+"""
+Regression tests for SequenceDataset against the notebook's create_sequences and MinMaxScaler
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sequence_dataset import SequenceDataset
+
+def create_sequences(data, seq_length):
+    # As in Notebooks/Task2/modeling_analysis.ipynb
+    X, y = [], []
+    for i in range(seq_length, len(data)):
+        X.append(data[i-seq_length:i])
+        y.append(data[i])
+    return np.array(X), np.array(y)
+
+def _prices(start='2023-01-02', periods=300, tz=None, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, periods=periods, tz=tz)
+    return pd.Series(100 * np.cumprod(1 + rng.normal(0, 0.01, periods)), index=index, name='Close')
+
+def _min_max(values, train):
+    low, high = values[train].min(), values[train].max()
+    return (values - low) / (high - low)
+
+def test_arrays_match_create_sequences():
+    prices = _prices()
+    dataset = SequenceDataset(prices, seq_length=20, dtype=np.float64).fit_scaler(200)
+    X, y = dataset.arrays()
+    scaled = _min_max(prices.to_numpy(), slice(0, 200))
+    X_expected, y_expected = create_sequences(scaled.reshape(-1, 1), 20)
+    np.testing.assert_allclose(X, X_expected, rtol=1e-12)
+    np.testing.assert_allclose(y, y_expected, rtol=1e-12)
+
+def test_batches_cover_every_sample_once():
+    dataset = SequenceDataset(_prices(), seq_length=20).fit_scaler()
+    X_all, y_all = dataset.arrays()
+    seen = []
+    for X, y in dataset.batches(32, shuffle=True, seed=1):
+        assert X.shape[1:] == (20, 1) and len(X) <= 32
+        seen.append(y[:, 0])
+    np.testing.assert_allclose(np.sort(np.concatenate(seen)), np.sort(y_all[:, 0]))
+    # Gathering a batch never writes through to the stored panel
+    assert dataset.values.max() > 1
+
+def test_split_and_inverse_transform():
+    prices = _prices()
+    dataset = SequenceDataset(prices, seq_length=20, dtype=np.float64).fit_scaler('2023-09-01')
+    train, test = dataset.split('2023-09-01')
+    assert (dataset.target_dates(train) < pd.Timestamp('2023-09-01')).all()
+    assert (dataset.target_dates(test) >= pd.Timestamp('2023-09-01')).all()
+    assert len(train) + len(test) == len(dataset) == len(prices) - 20
+    _, y = dataset.batch(test)
+    np.testing.assert_allclose(dataset.inverse_transform(y, test), prices.loc[dataset.target_dates(test)].values)
+
+def test_windows_do_not_cross_tickers():
+    data = {'AAA': _prices(periods=100), 'BBB': _prices(periods=80, seed=1)}
+    dataset = SequenceDataset(data, seq_length=20, dtype=np.float64).fit_scaler()
+    assert len(dataset) == (100 - 20) + (80 - 20)
+    X, y = dataset.arrays()
+    for ticker, (first, last) in (('AAA', (0, 80)), ('BBB', (80, 140))):
+        scaled = _min_max(data[ticker].to_numpy(), slice(None))
+        X_expected, y_expected = create_sequences(scaled.reshape(-1, 1), 20)
+        np.testing.assert_allclose(X[first:last], X_expected, rtol=1e-12)
+        np.testing.assert_allclose(y[first:last], y_expected, rtol=1e-12)
+
+def test_ticker_without_training_rows_gets_nan_scale():
+    data = {'AAA': _prices(), 'BBB': _prices(start='2024-01-02', periods=60, seed=1)}
+    dataset = SequenceDataset(data, seq_length=20).fit_scaler('2023-12-01')
+    assert np.isnan(dataset.scale[1]).all() and np.isfinite(dataset.scale[0]).all()
+    with pytest.raises(ValueError):
+        SequenceDataset(data, seq_length=20).fit_scaler('2020-01-01')
+
+def test_timezones_are_normalised_and_mixing_raises():
+    data = {'AAA': _prices(tz='America/New_York'), 'BBB': _prices(tz='UTC', seed=1)}
+    dataset = SequenceDataset(data, seq_length=20).fit_scaler('2023-06-01')
+    assert str(dataset.dates.tz) == 'America/New_York'
+    train, test = dataset.split('2023-06-01')
+    assert len(train) and len(test)
+    data['BBB'] = data['BBB'].tz_localize(None)
+    with pytest.raises(ValueError, match='BBB'):
+        SequenceDataset(data, seq_length=20)
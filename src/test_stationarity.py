@@ -0,0 +1,52 @@
+"""
+Regression tests for adf_fast and the batch stationarity tests against statsmodels adfuller
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.stattools import adfuller
+from stationarity import adf_fast, stationarity_tests
+
+def _series(seed, n=600):
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(size=n)
+    return {
+        'random_walk': np.cumsum(noise),
+        'ar1': pd.Series(noise).ewm(alpha=0.5).mean().to_numpy(),
+        'trend': np.arange(n) * 0.05 + np.cumsum(noise) * 0.2,
+    }
+
+@pytest.mark.parametrize('regression', ['c', 'ct', 'n'])
+@pytest.mark.parametrize('autolag', ['AIC', 'BIC', None])
+def test_adf_fast_matches_adfuller(regression, autolag):
+    for name, x in _series(0).items():
+        max_lag = None if autolag else 4
+        statistic, p_value, used_lag, n_obs, critical, *_ = adfuller(x, maxlag=max_lag, autolag=autolag,
+                                                                     regression=regression)
+        fast = adf_fast(x, max_lag, autolag, regression)
+        assert fast['used_lag'] == used_lag, name
+        assert fast['n_obs'] == n_obs
+        assert fast['adf_statistic'] == pytest.approx(statistic, rel=1e-8)
+        assert fast['p_value'] == pytest.approx(p_value, rel=1e-8, abs=1e-12)
+        for level, value in critical.items():
+            assert fast['critical_values'][level] == pytest.approx(value)
+
+def test_batch_fast_and_statsmodels_methods_agree():
+    series = pd.DataFrame(_series(1))
+    series.iloc[:50, 0] = np.nan  # dropped per series
+    fast = stationarity_tests(series, method='fast', max_workers=1)
+    reference = stationarity_tests(series, method='statsmodels', max_workers=1)
+    assert list(fast.index) == list(series.columns)
+    pd.testing.assert_frame_equal(fast, reference, check_dtype=False, rtol=1e-8)
+    assert fast.loc['random_walk', 'N Obs'] < fast.loc['ar1', 'N Obs']
+
+def test_batch_process_pool_matches_serial():
+    series = {f'{name}_{seed}': x for seed in range(3) for name, x in _series(seed, 300).items()}
+    serial = stationarity_tests(series, max_workers=1)
+    parallel = stationarity_tests(series, max_workers=2, chunk_size=3)
+    pd.testing.assert_frame_equal(parallel, serial)
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        stationarity_tests({'x': np.arange(10.0)}, method='exact')
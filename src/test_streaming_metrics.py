@@ -0,0 +1,63 @@
+"""
+Regression tests for the streaming accumulators against batch calculations
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from streaming_metrics import RunningMoments, RunningDrawdown, EWMAVolatility, P2Quantile, StreamingRiskMonitor
+from utils import calculate_sharpe_ratio, calculate_max_drawdown
+
+def _returns(n_days=2000, n_assets=3, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = pd.DataFrame(rng.normal(0.0003, 0.012, (n_days, n_assets)), columns=['A', 'B', 'C'])
+    returns.iloc[:100, 1] = np.nan
+    returns.iloc[500:520, 2] = np.nan
+    return returns
+
+def _feed(accumulator, returns):
+    for row in returns.to_numpy():
+        accumulator.update(row)
+    return accumulator
+
+def test_running_moments_match_batch():
+    returns = _returns()
+    moments = _feed(RunningMoments(3), returns)
+    np.testing.assert_allclose(moments.mean, returns.mean().values, rtol=1e-10)
+    np.testing.assert_allclose(moments.std, returns.std().values, rtol=1e-10)
+    np.testing.assert_allclose(moments.sharpe_ratio(), [calculate_sharpe_ratio(returns[c]) for c in returns],
+                               rtol=1e-9)
+
+def test_running_drawdown_matches_batch():
+    returns = _returns()
+    prices = (1 + returns.fillna(0)).cumprod()
+    from_returns = _feed(RunningDrawdown(3), returns)
+    from_prices = _feed(RunningDrawdown(3, from_prices=True), prices)
+    expected = [calculate_max_drawdown(prices[c]) for c in prices]
+    np.testing.assert_allclose(from_returns.max_drawdown, expected, rtol=1e-10)
+    np.testing.assert_allclose(from_prices.max_drawdown, expected, rtol=1e-10)
+
+def test_ewma_volatility_matches_recursion():
+    returns = _returns().dropna()
+    ewma = _feed(EWMAVolatility(3, decay=0.94), returns)
+    variance = returns.iloc[0].values ** 2
+    for row in returns.iloc[1:].to_numpy():
+        variance = 0.94 * variance + 0.06 * row ** 2
+    np.testing.assert_allclose(ewma.volatility, np.sqrt(variance), rtol=1e-10)
+
+def test_p2_quantile_close_to_exact():
+    returns = _returns(n_days=20000)
+    estimate = _feed(P2Quantile(3, 0.05), returns).value
+    exact = returns.quantile(0.05).values
+    np.testing.assert_allclose(estimate, exact, rtol=0.05)
+
+def test_p2_quantile_exact_for_first_observations():
+    quantile = _feed(P2Quantile(1, 0.5), pd.DataFrame([[3.0], [1.0], [2.0]]))
+    assert quantile.value[0] == pytest.approx(2.0)
+
+def test_monitor_skips_missing_tickers():
+    monitor = StreamingRiskMonitor(['A', 'B'])
+    monitor.update({'A': 0.01})
+    monitor.update({'A': -0.02, 'B': 0.005})
+    assert monitor.moments.count.tolist() == [2, 1]
+    assert len(monitor.snapshot()) == 2
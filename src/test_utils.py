@@ -0,0 +1,83 @@
+"""
+Regression tests for the panel-wide and rolling risk metrics against the per-series
+functions and pandas rolling windows
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils import (calculate_var, calculate_cvar, calculate_sharpe_ratio, calculate_max_drawdown,
+                   annualize_metrics, calculate_panel_metrics, rolling_sharpe_ratio, rolling_skewness,
+                   rolling_kurtosis, rolling_var, rolling_cvar, rolling_max_drawdown)
+
+def _returns(n_days=500, n_assets=4, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = pd.DataFrame(rng.standard_t(4, (n_days, n_assets)) * 0.01,
+                           index=pd.bdate_range('2020-01-01', periods=n_days),
+                           columns=[f'T{i}' for i in range(n_assets)])
+    returns.iloc[:60, 1] = np.nan
+    returns.iloc[200:210, 2] = np.nan
+    return returns
+
+def test_panel_metrics_match_per_series_functions():
+    returns = _returns()
+    prices = (1 + returns.fillna(0)).cumprod() * 100
+    metrics = calculate_panel_metrics(returns, prices)
+    for ticker in returns.columns:
+        series = returns[ticker]
+        row = metrics.loc[ticker]
+        assert row['Annual Return (%)'] == pytest.approx(annualize_metrics(series.mean(), 'return') * 100)
+        assert row['Annual Volatility (%)'] == pytest.approx(annualize_metrics(series.std(), 'volatility') * 100)
+        assert row['Sharpe Ratio'] == pytest.approx(annualize_metrics(calculate_sharpe_ratio(series), 'sharpe'))
+        for q in (0.05, 0.01):
+            assert row[f'Daily VaR {q*100:g}% (%)'] == pytest.approx(calculate_var(series, q) * 100)
+            assert row[f'Daily CVaR {q*100:g}% (%)'] == pytest.approx(calculate_cvar(series, q) * 100)
+        assert row['Max Drawdown (%)'] == pytest.approx(calculate_max_drawdown(prices[ticker]) * 100)
+        assert row['Skewness'] == pytest.approx(series.skew())
+        assert row['Kurtosis'] == pytest.approx(series.kurtosis())
+
+def test_panel_metrics_all_missing_column_is_nan():
+    returns = _returns()
+    returns['T3'] = np.nan
+    metrics = calculate_panel_metrics(returns)
+    assert metrics.loc['T3'].drop('Max Drawdown (%)').isna().all()
+    assert metrics.loc['T0'].notna().all()
+
+def _rolling_reference(frame, window, func):
+    return frame.rolling(window, min_periods=window).apply(lambda x: func(pd.Series(x)), raw=True)
+
+def test_rolling_moments_match_pandas():
+    returns = _returns()
+    window = 63
+    np.testing.assert_allclose(rolling_skewness(returns, window).values,
+                               returns.rolling(window).skew().values, rtol=1e-7, atol=1e-10)
+    np.testing.assert_allclose(rolling_kurtosis(returns, window).values,
+                               returns.rolling(window).kurt().values, rtol=1e-7, atol=1e-10)
+
+def test_rolling_sharpe_matches_per_window_function():
+    returns = _returns()
+    window = 63
+    expected = _rolling_reference(returns, window, calculate_sharpe_ratio)
+    np.testing.assert_allclose(rolling_sharpe_ratio(returns, window).values, expected.values,
+                               rtol=1e-8, atol=1e-12)
+
+@pytest.mark.parametrize('confidence_level', [0.05, 0.01])
+def test_rolling_var_cvar_match_per_window_functions(confidence_level):
+    returns = _returns()
+    window = 100
+    expected_var = _rolling_reference(returns, window, lambda x: calculate_var(x, confidence_level))
+    expected_cvar = _rolling_reference(returns, window, lambda x: calculate_cvar(x, confidence_level))
+    np.testing.assert_allclose(rolling_var(returns, window, confidence_level).values,
+                               expected_var.values, rtol=1e-10, atol=1e-14)
+    np.testing.assert_allclose(rolling_cvar(returns, window, confidence_level).values,
+                               expected_cvar.values, rtol=1e-10, atol=1e-14)
+
+def test_rolling_max_drawdown_matches_per_window_function():
+    returns = _returns()
+    prices = (1 + returns.fillna(0)).cumprod() * 100
+    window = 60
+    expected = prices.rolling(window).apply(lambda x: calculate_max_drawdown(pd.Series(x)), raw=True)
+    np.testing.assert_allclose(rolling_max_drawdown(prices, window).values, expected.values,
+                               rtol=1e-10, atol=1e-14)
+    # A window longer than the history gives no values
+    assert rolling_max_drawdown(prices.iloc[:10], window).isna().all().all()
@@ -3,6 +3,9 @@ Utility functions for financial analysis
 Contains reusable functions for calculations and analysis
 """
 
+import bisect
+import math
+import warnings
 import pandas as pd
 import numpy as np
 from scipy import stats
@@ -159,6 +162,119 @@ def annualize_metrics(daily_metric, metric_type='return'):
     else:
         return daily_metric
 
+def _lerp(a, b, t):
+    """
+    Linear interpolation matching numpy's percentile arithmetic
+    """
+    diff = b - a
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+def calculate_panel_metrics(returns, prices=None, risk_free_rate=0.03/252, confidence_levels=(0.05, 0.01)):
+    """
+    Calculate summary risk metrics for every column of a wide returns matrix at once
+    
+    Matches the per-series functions (calculate_sharpe_ratio, calculate_var,
+    calculate_cvar, calculate_max_drawdown, pandas skew/kurtosis) but uses a
+    handful of NumPy reductions over the whole panel: a single sort for all
+    VaR/CVaR levels and a running maximum for drawdowns. Missing values are
+    ignored per column, as dropna() would.
+    
+    Args:
+        returns (pd.DataFrame): Daily returns, dates x tickers
+        prices (pd.DataFrame): Close prices for max drawdown (default: compounded returns)
+        risk_free_rate (float): Daily risk-free rate
+        confidence_levels (tuple): VaR/CVaR levels
+    
+    Returns:
+        pd.DataFrame: Metrics per ticker (annualized return, volatility and Sharpe in the
+            same units as create_summary_table)
+    """
+    tickers = returns.columns if isinstance(returns, pd.DataFrame) else range(np.shape(returns)[1])
+    values = np.ascontiguousarray(np.asarray(returns, dtype=np.float64).T)
+    if values.shape[1] == 0:
+        # No dates: one all-missing row keeps every reduction well defined (all NaN)
+        values = np.full((values.shape[0], 1), np.nan)
+    valid = ~np.isnan(values)
+    complete = valid.all()
+    count = valid.sum(axis=1)
+    filled = values if complete else np.where(valid, values, 0.0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Moments
+        mean = filled.sum(axis=1) / count
+        centered = filled - mean[:, None]
+        if not complete:
+            centered[~valid] = 0.0
+        centered2 = np.square(centered)
+        m2 = centered2.sum(axis=1)
+        m3 = np.einsum('ij,ij->i', centered2, centered)
+        m4 = np.einsum('ij,ij->i', centered2, centered2)
+        std = np.where(count > 1, np.sqrt(m2 / (count - 1)), np.nan)
+        sharpe = np.where(std == 0, 0.0, (mean - risk_free_rate) / std)
+        
+        # Bias-corrected skewness and excess kurtosis, as in pandas
+        m2 = np.where(np.abs(m2) < 1e-14, 0.0, m2)
+        m3 = np.where(np.abs(m3) < 1e-14, 0.0, m3)
+        skew = np.where(m2 == 0, 0.0, count * (count - 1) ** 0.5 / (count - 2) * m3 / m2 ** 1.5)
+        skew[count < 3] = np.nan
+        numerator = count * (count + 1) * (count - 1) * m4
+        denominator = (count - 2) * (count - 3) * m2 ** 2
+        numerator = np.where(np.abs(numerator) < 1e-14, 0.0, numerator)
+        denominator = np.where(np.abs(denominator) < 1e-14, 0.0, denominator)
+        kurt = np.where(denominator == 0, 0.0,
+                        numerator / denominator - 3 * (count - 1) ** 2 / ((count - 2) * (count - 3)))
+        kurt[count < 4] = np.nan
+    
+    # One sort serves every VaR level (NaNs sort to the end of each row). The returns at
+    # or below a VaR threshold form a prefix of the sorted row, so each CVaR only needs
+    # running sums over the first few percent of the columns
+    ordered = np.sort(values, axis=1)
+    rows = np.arange(len(count))
+    last = np.maximum(count - 1, 0)
+    
+    metrics = {
+        'Annual Return (%)': annualize_metrics(mean, 'return') * 100,
+        'Annual Volatility (%)': annualize_metrics(std, 'volatility') * 100,
+        'Sharpe Ratio': annualize_metrics(sharpe, 'sharpe')
+    }
+    
+    cvars = {}
+    for q in confidence_levels:
+        position = last * q
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        threshold = _lerp(ordered[rows, low], ordered[rows, high], position - low)
+        threshold[count == 0] = np.nan
+        
+        tail_size = (ordered <= threshold[:, None]).sum(axis=1)
+        prefix_sums = np.cumsum(ordered[:, :max(int(tail_size.max()), 1)], axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cvars[q] = np.where(tail_size > 0,
+                                -prefix_sums[rows, np.maximum(tail_size - 1, 0)] / tail_size, np.nan)
+        metrics[f'Daily VaR {q*100:g}% (%)'] = -threshold * 100
+    for q in confidence_levels:
+        metrics[f'Daily CVaR {q*100:g}% (%)'] = cvars[q] * 100
+    
+    # Max drawdown from the running maximum of each price column
+    if prices is None:
+        level = filled + 1
+        np.cumprod(level, axis=1, out=level)
+    else:
+        level = np.ascontiguousarray(np.asarray(prices, dtype=np.float64).T)
+    if level.shape[1] == 0:
+        level = np.full((len(count), 1), np.nan)
+    drawdown = np.fmax.accumulate(level, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        np.divide(level, drawdown, out=drawdown)
+        max_drawdown = np.nanmin(drawdown, axis=1) - 1
+    metrics['Max Drawdown (%)'] = max_drawdown * 100
+    
+    metrics['Skewness'] = skew
+    metrics['Kurtosis'] = kurt
+    
+    return pd.DataFrame(metrics, index=tickers)
+
 def create_summary_table(assets_data):
     """
     Create comprehensive summary table of metrics
@@ -169,26 +285,294 @@ def create_summary_table(assets_data):
     Returns:
         pd.DataFrame: Summary table
     """
-    summary = pd.DataFrame(index=list(assets_data.keys()))
+    returns = pd.DataFrame({ticker: data['Daily_Return'] for ticker, data in assets_data.items()})
+    prices = pd.DataFrame({ticker: data['Close'] for ticker, data in assets_data.items()})
     
-    for ticker, data in assets_data.items():
-        returns = data['Daily_Return'].dropna()
-        
-        # Basic metrics
-        summary.loc[ticker, 'Annual Return (%)'] = annualize_metrics(returns.mean(), 'return') * 100
-        summary.loc[ticker, 'Annual Volatility (%)'] = annualize_metrics(returns.std(), 'volatility') * 100
-        summary.loc[ticker, 'Sharpe Ratio'] = annualize_metrics(calculate_sharpe_ratio(returns), 'sharpe')
+    summary = calculate_panel_metrics(returns, prices)
+    columns = ['Annual Return (%)', 'Annual Volatility (%)', 'Sharpe Ratio',
+               'Daily VaR 5% (%)', 'Daily VaR 1% (%)', 'Max Drawdown (%)',
+               'Skewness', 'Kurtosis']
+    
+    return summary[columns].round(3)
+
+def _as_panel(data):
+    """
+    Convert a Series, DataFrame or array to a (dates x columns) float64 array,
+    plus a function that wraps a result array back into the input's type
+    """
+    if isinstance(data, pd.Series):
+        return (data.to_numpy(dtype=np.float64)[:, None],
+                lambda result: pd.Series(result[:, 0], index=data.index, name=data.name))
+    if isinstance(data, pd.DataFrame):
+        return (data.to_numpy(dtype=np.float64),
+                lambda result: pd.DataFrame(result, index=data.index, columns=data.columns))
+    values = np.asarray(data, dtype=np.float64)
+    if values.ndim == 1:
+        return values[:, None], lambda result: result[:, 0]
+    return values, lambda result: result
+
+def _rolling_power_sums(values, window, max_power):
+    """
+    Windowed observation counts and power sums of each column via running sums
+    
+    Columns are shifted by their mean first so the differenced running sums stay
+    accurate. Missing values are excluded from every window.
+    
+    Returns:
+        tuple: (count, [sum of y**1, ..., sum of y**max_power], shift) with y = x - shift
+    """
+    valid = ~np.isnan(values)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        shift = np.nan_to_num(np.nanmean(values, axis=0))
+    shifted = np.where(valid, values - shift, 0.0)
+    
+    def windowed(x):
+        running = np.cumsum(x, axis=0)
+        running[window:] -= running[:-window].copy()
+        return running
+    
+    count = windowed(valid.astype(np.float64))
+    sums = []
+    power = np.ones_like(shifted)
+    for _ in range(max_power):
+        power *= shifted
+        sums.append(windowed(power))
+    return count, sums, shift
+
+def rolling_sharpe_ratio(returns, window=252, risk_free_rate=0.03/252, min_periods=None):
+    """
+    Calculate the rolling (daily) Sharpe ratio in O(n) with running sums
+    
+    Each value matches calculate_sharpe_ratio on the window ending at that date.
+    The metrics.ipynb loop (window ending the day before, annualized) equals
+    rolling_sharpe_ratio(returns, 252).shift(1) * np.sqrt(252).
+    
+    Args:
+        returns (pd.Series or pd.DataFrame): Return series or dates x tickers panel
+        window (int): Rolling window size
+        risk_free_rate (float): Daily risk-free rate
+        min_periods (int): Minimum non-missing observations (default window)
+    
+    Returns:
+        pd.Series or pd.DataFrame: Rolling Sharpe ratio, same shape as returns
+    """
+    values, wrap = _as_panel(returns)
+    min_periods = window if min_periods is None else min_periods
+    count, (s1, s2), shift = _rolling_power_sums(values, window, 2)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = np.clip(s2 - s1 * s1 / count, 0, None) / (count - 1)
+        std = np.sqrt(variance)
+        sharpe = np.where(std == 0, 0.0, (s1 / count + shift - risk_free_rate) / std)
+    sharpe[(count < min_periods) | (count < 2)] = np.nan
+    return wrap(sharpe)
+
+def _rolling_central_moments(returns, window):
+    """
+    Windowed count and central moment sums M2, M3, M4 of each column
+    """
+    values, wrap = _as_panel(returns)
+    n, (s1, s2, s3, s4), _ = _rolling_power_sums(values, window, 4)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s1 / n
+        m2 = s2 - s1 * mean
+        m3 = s3 - 3 * s2 * mean + 2 * s1 * mean ** 2
+        m4 = s4 - 4 * s3 * mean + 6 * s2 * mean ** 2 - 3 * s1 * mean ** 3
+    return n, m2, m3, m4, wrap
+
+def rolling_skewness(returns, window=252, min_periods=None):
+    """
+    Calculate rolling bias-corrected skewness (as pandas .skew()) in O(n)
+    
+    Args:
+        returns (pd.Series or pd.DataFrame): Return series or dates x tickers panel
+        window (int): Rolling window size
+        min_periods (int): Minimum non-missing observations (default window)
+    
+    Returns:
+        pd.Series or pd.DataFrame: Rolling skewness
+    """
+    min_periods = window if min_periods is None else min_periods
+    n, m2, m3, _, wrap = _rolling_central_moments(returns, window)
+    m2 = np.where(np.abs(m2) < 1e-14, 0.0, m2)
+    m3 = np.where(np.abs(m3) < 1e-14, 0.0, m3)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        skew = np.where(m2 == 0, 0.0, n * (n - 1) ** 0.5 / (n - 2) * m3 / m2 ** 1.5)
+    skew[(n < min_periods) | (n < 3)] = np.nan
+    return wrap(skew)
+
+def rolling_kurtosis(returns, window=252, min_periods=None):
+    """
+    Calculate rolling bias-corrected excess kurtosis (as pandas .kurtosis()) in O(n)
+    
+    Args:
+        returns (pd.Series or pd.DataFrame): Return series or dates x tickers panel
+        window (int): Rolling window size
+        min_periods (int): Minimum non-missing observations (default window)
+    
+    Returns:
+        pd.Series or pd.DataFrame: Rolling kurtosis
+    """
+    min_periods = window if min_periods is None else min_periods
+    n, m2, _, m4, wrap = _rolling_central_moments(returns, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        numerator = n * (n + 1) * (n - 1) * m4
+        denominator = (n - 2) * (n - 3) * m2 ** 2
+        numerator = np.where(np.abs(numerator) < 1e-14, 0.0, numerator)
+        denominator = np.where(np.abs(denominator) < 1e-14, 0.0, denominator)
+        kurt = np.where(denominator == 0, 0.0,
+                        numerator / denominator - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)))
+    kurt[(n < min_periods) | (n < 4)] = np.nan
+    return wrap(kurt)
+
+def _rolling_tail_column(column, window, confidence_level, min_periods):
+    """
+    Rolling historical VaR and CVaR of one column using a sorted window
+    
+    Each step inserts the new return and removes the expired one by binary search,
+    so the window never has to be re-sorted. The sum of the tail below the VaR
+    threshold is kept as a running sum that only moves by the elements entering
+    or leaving it, and is re-summed once per window to stop rounding drift.
+    """
+    var = np.full(len(column), np.nan)
+    cvar = np.full(len(column), np.nan)
+    ordered = []
+    tail_sum = 0.0
+    tail_count = 0
+    
+    for t, value in enumerate(column.tolist()):
+        if value == value:
+            position = bisect.bisect_right(ordered, value)
+            ordered.insert(position, value)
+            if position < tail_count:
+                tail_sum += value
+                tail_count += 1
+        if t >= window:
+            expired = column[t - window]
+            if expired == expired:
+                position = bisect.bisect_left(ordered, expired)
+                del ordered[position]
+                if position < tail_count:
+                    tail_sum -= expired
+                    tail_count -= 1
         
-        # Risk metrics
-        summary.loc[ticker, 'Daily VaR 5% (%)'] = calculate_var(returns, 0.05) * 100
-        summary.loc[ticker, 'Daily VaR 1% (%)'] = calculate_var(returns, 0.01) * 100
-        summary.loc[ticker, 'Max Drawdown (%)'] = calculate_max_drawdown(data['Close']) * 100
+        n = len(ordered)
+        if n == 0 or n < min_periods:
+            continue
+        position = (n - 1) * confidence_level
+        low = ordered[int(position)]
+        high = ordered[math.ceil(position)]
+        frac = position - int(position)
+        threshold = high - (high - low) * (1 - frac) if frac >= 0.5 else low + (high - low) * frac
         
-        # Additional metrics
-        summary.loc[ticker, 'Skewness'] = returns.skew()
-        summary.loc[ticker, 'Kurtosis'] = returns.kurtosis()
+        tail = bisect.bisect_right(ordered, threshold)
+        if t % window == 0:
+            tail_sum, tail_count = math.fsum(ordered[:tail]), tail
+        while tail_count < tail:
+            tail_sum += ordered[tail_count]
+            tail_count += 1
+        while tail_count > tail:
+            tail_count -= 1
+            tail_sum -= ordered[tail_count]
+        var[t] = -threshold
+        cvar[t] = -tail_sum / tail
+    
+    return var, cvar
+
+def _rolling_tail(returns, window, confidence_level, min_periods):
+    values, wrap = _as_panel(returns)
+    min_periods = window if min_periods is None else min_periods
+    var = np.full(values.shape, np.nan)
+    cvar = np.full(values.shape, np.nan)
+    for j in range(values.shape[1]):
+        var[:, j], cvar[:, j] = _rolling_tail_column(values[:, j], window, confidence_level, min_periods)
+    return var, cvar, wrap
+
+def rolling_var(returns, window=252, confidence_level=0.05, min_periods=None):
+    """
+    Calculate rolling historical Value at Risk with a sorted window (O(n log w) searches)
+    
+    Args:
+        returns (pd.Series or pd.DataFrame): Return series or dates x tickers panel
+        window (int): Rolling window size
+        confidence_level (float): Confidence level (0.05 = 5% VaR)
+        min_periods (int): Minimum non-missing observations (default window)
     
-    return summary.round(3)
+    Returns:
+        pd.Series or pd.DataFrame: Rolling VaR as positive numbers
+    """
+    var, _, wrap = _rolling_tail(returns, window, confidence_level, min_periods)
+    return wrap(var)
+
+def rolling_cvar(returns, window=252, confidence_level=0.05, min_periods=None):
+    """
+    Calculate rolling Conditional Value at Risk with a sorted window
+    
+    Args:
+        returns (pd.Series or pd.DataFrame): Return series or dates x tickers panel
+        window (int): Rolling window size
+        confidence_level (float): Confidence level
+        min_periods (int): Minimum non-missing observations (default window)
+    
+    Returns:
+        pd.Series or pd.DataFrame: Rolling CVaR as positive numbers
+    """
+    _, cvar, wrap = _rolling_tail(returns, window, confidence_level, min_periods)
+    return wrap(cvar)
+
+def rolling_max_drawdown(prices, window=252):
+    """
+    Calculate the maximum drawdown within each trailing window of prices in O(n)
+    
+    The dates are cut into blocks of window rows. Every window is the suffix of
+    one block followed by the prefix of the next, so prefix and suffix scans of
+    the blocks (running max, min and drawdown) give each window's drawdown as
+    the worst of the two parts and the fall from the suffix peak to the prefix low.
+    
+    Args:
+        prices (pd.Series or pd.DataFrame): Price series or dates x tickers panel
+        window (int): Rolling window size
+    
+    Returns:
+        pd.Series or pd.DataFrame: Rolling max drawdown as negative fractions
+    """
+    values, wrap = _as_panel(prices)
+    n_dates, n_columns = values.shape
+    result = np.full(values.shape, np.nan)
+    if n_dates < window:
+        return wrap(result)
+    
+    n_blocks = -(-n_dates // window)
+    padded = np.full((n_blocks * window, n_columns), np.nan)
+    padded[:n_dates] = values
+    blocks = padded.reshape(n_blocks, window, n_columns)
+    reverse = blocks[:, ::-1]
+    
+    def flat(scan):
+        return scan.reshape(n_blocks * window, n_columns)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Prefix of each block: lowest price, and worst ratio to the running peak
+        prefix_max = np.fmax.accumulate(blocks, axis=1)
+        prefix_min = flat(np.fmin.accumulate(blocks, axis=1))
+        prefix_drawdown = flat(np.fmin.accumulate(blocks / prefix_max, axis=1))
+        
+        # Suffix of each block: highest price, and worst ratio of a later low to each price
+        suffix_max = flat(np.fmax.accumulate(reverse, axis=1)[:, ::-1])
+        suffix_min = np.fmin.accumulate(reverse, axis=1)[:, ::-1]
+        suffix_drawdown = flat(np.fmin.accumulate((suffix_min / blocks)[:, ::-1], axis=1)[:, ::-1])
+        
+        end = np.arange(window - 1, n_dates)
+        start = end - window + 1
+        drawdown = np.fmin(np.fmin(suffix_drawdown[start], prefix_drawdown[end]),
+                           prefix_min[end] / suffix_max[start])
+        # Windows that coincide with a block are the block's full suffix
+        aligned = start % window == 0
+        drawdown[aligned] = suffix_drawdown[start[aligned]]
+    
+    result[window - 1:] = drawdown - 1
+    return wrap(result)
 
 def plot_price_comparison(assets_data, figsize=(15, 10)):
     """
@@ -0,0 +1,117 @@
+"""
+Walk-forward portfolio re-optimization
+Rolls a training window forward one rebalance period at a time, re-optimizes on the
+window and records the weights to hold until the next rebalance, giving an
+out-of-sample weight schedule for backtest.backtest.
+
+The window's mean and covariance are kept as running sums: each step adds the rows
+that entered the window and subtracts the rows that left it, so a step costs
+O(delta x N^2) instead of O(window x N^2), and each optimization is warm-started from
+the previous step's weights.
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from backtest import rebalance_schedule
+from portfolio_optimization import optimize_portfolios, portfolio_metrics
+import warnings
+warnings.filterwarnings('ignore')
+
+class RollingMoments:
+    """
+    Mean and covariance of a sliding block of rows, updated by adding and removing rows
+    """
+
+    def __init__(self, n_assets):
+        self.count = 0
+        self.total = np.zeros(n_assets)
+        self.cross = np.zeros((n_assets, n_assets))
+
+    def add(self, rows):
+        self.count += len(rows)
+        self.total += rows.sum(axis=0)
+        self.cross += rows.T @ rows
+
+    def remove(self, rows):
+        self.count -= len(rows)
+        self.total -= rows.sum(axis=0)
+        self.cross -= rows.T @ rows
+
+    @property
+    def mean(self):
+        return self.total / self.count
+
+    @property
+    def covariance(self):
+        mean = self.mean
+        return (self.cross - self.count * np.outer(mean, mean)) / (self.count - 1)
+
+def walk_forward_optimize(returns, window=756, rebalance_freq='M', objective='max_sharpe',
+                          risk_free_rate=0.03, annualize=252):
+    """
+    Re-optimize on a rolling training window at every rebalance date
+
+    Expected returns are the window's historical mean (annualized) and the covariance
+    is the window's sample covariance (annualized). Weights chosen at the close of a
+    rebalance date only use returns up to that date.
+
+    Args:
+        returns (pd.DataFrame): Daily asset returns, dates x assets, without missing values
+        window (int): Training window in trading days
+        rebalance_freq (str or list): Re-optimization dates, see backtest.rebalance_schedule
+        objective (str): 'max_sharpe' or 'min_variance'
+        risk_free_rate (float): Annual risk-free rate for reporting the Sharpe ratio
+        annualize (int): Periods per year
+
+    Returns:
+        tuple: (weight schedule DataFrame indexed by rebalance date, per-step diagnostics
+            DataFrame with expected return, volatility, Sharpe ratio, turnover and time)
+    """
+    if objective not in ('max_sharpe', 'min_variance'):
+        raise ValueError(f"Unknown objective: {objective}")
+
+    values = returns.to_numpy(dtype=np.float64)
+    n_days, n_assets = values.shape
+    steps = rebalance_schedule(returns.index, rebalance_freq)
+    steps = steps[steps >= window - 1]
+    print(f"Walk-forward: {len(steps)} re-optimizations, {window}-day window, {n_assets} assets")
+
+    moments = RollingMoments(n_assets)
+    first, last = 0, -1  # rows currently in the window: first..last
+    previous = None
+    schedule, rows = [], []
+
+    for step in steps:
+        start = time.perf_counter()
+
+        # Slide the window to end at this step: add new rows, drop expired ones
+        new_first = step - window + 1
+        moments.add(values[last + 1:step + 1])
+        moments.remove(values[first:new_first])
+        first, last = new_first, step
+
+        expected_returns = moments.mean * annualize
+        cov_matrix = moments.covariance * annualize
+        max_sharpe_weights, min_var_weights = optimize_portfolios(
+            expected_returns, cov_matrix, initial_guess=previous, verbose=False)
+        weights = max_sharpe_weights if objective == 'max_sharpe' else min_var_weights
+        previous = (max_sharpe_weights, min_var_weights)
+
+        port_return, port_risk = portfolio_metrics(weights, expected_returns, cov_matrix)
+        turnover = np.nan if not schedule else np.abs(weights - schedule[-1]).sum()
+        schedule.append(weights)
+        rows.append({
+            'Date': returns.index[step],
+            'Expected Return': port_return,
+            'Volatility': port_risk,
+            'Sharpe Ratio': (port_return - risk_free_rate) / port_risk if port_risk > 0 else 0,
+            'Turnover': turnover,
+            'Time (s)': time.perf_counter() - start
+        })
+
+    dates = returns.index[steps]
+    schedule = pd.DataFrame(np.array(schedule).reshape(len(steps), n_assets),
+                            index=dates, columns=returns.columns)
+    diagnostics = pd.DataFrame(rows).set_index('Date') if rows else pd.DataFrame()
+    return schedule, diagnostics